@@ -2,19 +2,62 @@ import os
 import typing
 
 import click
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pylab as plt
 
-HeatMapData = typing.List[typing.List[float]]
+HeatMapData = typing.Union[typing.List[typing.List[float]], np.ndarray]
+Region = typing.Tuple[int, int]
+
+# Charts draw at most this many columns, wider data is averaged over groups of columns.
+MAX_COLUMNS = 500
+
+
+def levelOfDetail(data: pd.DataFrame, region: typing.Optional[Region] = None,
+                  max_columns: int = MAX_COLUMNS) -> pd.DataFrame:
+    '''
+    Selects a region of the road and averages groups of neighbouring columns to fit a chart.
+    :param data: lanes by columns labelled with their first cells.
+    :param region: first and last cell of the region, columns starting in it are selected.
+        The whole road by default.
+    :param max_columns: maximum number of columns.
+    :return: columns of the region labelled with their first cells.
+    '''
+    positions = np.asarray(data.columns, dtype=int)
+    if region is not None:
+        begin, end = region
+        data = data.loc[:, (positions >= begin) & (positions <= end)]
+        positions = np.asarray(data.columns, dtype=int)
+    group = -(-data.shape[1] // max_columns)
+    if group <= 1:
+        return data
+    groups = np.arange(data.shape[1]) // group
+    averaged = data.T.groupby(groups).mean().T
+    averaged.columns = positions[::group]
+    return averaged
 
 
 class HeatMap:
     data: pd.DataFrame
     title: str
     max_value: float
-
-    def __init__(self, data: HeatMapData, title: str, max_value: float, skip: int = 0):
+    region: typing.Optional[Region]
+    max_columns: int
+
+    def __init__(self, data: HeatMapData, title: str, max_value: float, skip: int = 0,
+                 bin_width: int = 1, region: typing.Optional[Region] = None,
+                 max_columns: int = MAX_COLUMNS):
+        '''
+        :param data: lanes by bins of cells.
+        :param title: title of the chart.
+        :param max_value: maximum value of the chart.
+        :param skip: number of bins left out at both ends.
+        :param bin_width: number of cells in a bin, the columns are labelled with their first
+            cells.
+        :param region: first and last cell drawn, the whole road by default.
+        :param max_columns: maximum number of columns drawn, groups of bins are averaged.
+        '''
         if skip > 0:
             new_data = []
             for lane in data:
@@ -22,8 +65,12 @@ class HeatMap:
         else:
             new_data = data
         self.data = pd.DataFrame(data=new_data)
+        if bin_width > 1:
+            self.data.columns = (self.data.columns + skip) * bin_width
         self.title = title
         self.max_value = max_value
+        self.region = region
+        self.max_columns = max_columns
 
     def show(self, only_data: bool) -> None:
         click.secho(self.title, fg='yellow')
@@ -67,8 +114,9 @@ class HeatMap:
         sns.utils.despine(ax=ax_plot, left=True)
         f.tight_layout()
 
+        data = levelOfDetail(self.data, self.region, self.max_columns)
         plt.sca(ax_heatmap)
-        sns.heatmap(self.data, linewidth=0.01, xticklabels=10, cbar_kws=dict(
+        sns.heatmap(data, linewidth=0.01, xticklabels=max(10, data.shape[1] // 10), cbar_kws=dict(
             orientation='horizontal', shrink=.75, aspect=25, pad=.2))
         ax_heatmap.set(ylabel='Lane')
 
@@ -80,7 +128,7 @@ class HeatMap:
         else:
             ylabel = 'Density (vehicles/step)'
         ax_plot.set(xlabel=None, ylabel=ylabel)
-        sns.lineplot(data=self.data.sum(axis=0) / self.data.shape[0])
+        sns.lineplot(data=data.sum(axis=0) / data.shape[0])
 
 
 @click.command()
@@ -88,9 +136,13 @@ class HeatMap:
 @click.option('--ylim', '-y', default=1.0, help='Maximum value on the cumulative graph')
 @click.option('--output', '-o', default=None, help='Save output to a directory')
 @click.option('--prefix', '-p', default='', help='Prefix for output file names')
-@click.option('--skip', '-s', default=0, help='Skip first and last n cells')
+@click.option('--skip', '-s', default=0, help='Skip first and last n bins')
+@click.option('--region', '-r', type=(int, int), help='Draw only the cells from BEGIN to END')
+@click.option('--max-columns', default=MAX_COLUMNS,
+              help='Average neighbouring bins to draw at most n columns')
 @click.argument('files', nargs=-1, type=click.File())
-def main(title: str, ylim: float, output: typing.Optional[str], prefix: str, skip: int, files):
+def main(title: str, ylim: float, output: typing.Optional[str], prefix: str, skip: int,
+         region: typing.Optional[Region], max_columns: int, files):
     data = None
     if len(files) < 1:
         click.secho('Requires at least one data file', fg='red')
@@ -104,7 +156,11 @@ def main(title: str, ylim: float, output: typing.Optional[str], prefix: str, ski
             data = current
 
     data /= len(files)
-    heatmap = HeatMap(data.values.tolist(), title=title, max_value=ylim, skip=skip)
+    # Binned data is labelled with the first cells of the bins.
+    positions = np.asarray(data.columns, dtype=int)
+    bin_width = int(positions[1] - positions[0]) if len(positions) > 1 else 1
+    heatmap = HeatMap(data.values.tolist(), title=title, max_value=ylim, skip=skip,
+                      bin_width=bin_width, region=region, max_columns=max_columns)
     if output is not None:
         heatmap.save(output, prefix, only_data=False)
     else:
@@ -8,4 +8,14 @@ def informer(dir_name, **kwargs):
     for variable in sorted(kwargs):
         file.write(f"{variable}".ljust(25, " ") + str(kwargs[variable]) + "\n")
 
+    file.close()
+
+
+def informRuns(dir_name, seeds):
+
+    file = open(f"./{dir_name}/!info!.txt", "a")
+    file.write("\n~~~~~~RUN SEEDS~~~~~~ \n\n")
+    for prefix in sorted(seeds):
+        file.write(f"{prefix}".ljust(25, " ") + str(seeds[prefix]) + "\n")
+
     file.close()
\ No newline at end of file
@@ -0,0 +1,101 @@
+import os
+import sys
+import typing
+
+import click
+import numpy as np
+import seaborn as sns
+import matplotlib.pylab as plt
+
+if __name__ == '__main__':
+    # Run as a script, the packages of the simulator are in the parent directory.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulator.statistics.spacetime import SpaceTimeData, loadSpaceTime  # noqa: E402
+
+METRICS = {
+    'occupancy': ('Occupancy (vehicles/cell)', 'Greys'),
+    'velocity': ('Speed', 'RdYlGn'),
+}
+
+
+class SpaceTimeChart:
+    data: SpaceTimeData
+    metric: str
+    lane: typing.Optional[int]
+    title: str
+
+    def __init__(self, data: SpaceTimeData, metric: str = 'occupancy',
+                 lane: typing.Optional[int] = None, title: str = 'Space-time diagram'):
+        '''
+        :param data: rows of the diagram.
+        :param metric: occupancy or velocity.
+        :param lane: drawn lane, all the lanes together by default.
+        :param title: title of the chart.
+        '''
+        if metric not in METRICS:
+            raise ValueError(f'expected one of {", ".join(METRICS)}, got {metric}')
+        self.data = data
+        self.metric = metric
+        self.lane = lane
+        self.title = title
+
+    def image(self) -> np.ndarray:
+        '''
+        :return: the metric by rows and columns, the velocity of all the lanes is weighted by
+            their occupancy.
+        '''
+        occupancy, velocity = self.data.occupancy, self.data.velocity
+        if self.lane is not None:
+            return (occupancy if self.metric == 'occupancy' else velocity)[:, self.lane]
+        if self.metric == 'occupancy':
+            return occupancy.sum(axis=1)
+        occupied = occupancy.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.nansum(velocity * occupancy, axis=1) / occupied
+
+    def show(self) -> None:
+        self._prepareChart()
+        plt.show()
+
+    def save(self, path: str, prefix: str) -> None:
+        self._prepareChart()
+        plt_path = os.path.join(path, f'{prefix}.png')
+        plt.savefig(plt_path, bbox_inches='tight', dpi=200)
+
+    def _prepareChart(self) -> None:
+        sns.set(font='serif', style='white')
+        label, colors = METRICS[self.metric]
+        image = self.image()
+        columns = image.shape[1] * self.data.bin_width
+        first, last = self.data.first[0], self.data.first[-1] + self.data.steps[-1]
+        f = plt.figure(figsize=(6, 6))
+        ax = f.add_subplot()
+        shown = ax.imshow(image, aspect='auto', origin='lower', cmap=colors,
+                          interpolation='nearest', extent=(0, columns, first, last))
+        f.colorbar(shown, ax=ax, label=label)
+        ax.set(xlabel='Position', ylabel='Step', title=self.title)
+
+
+@click.command()
+@click.option('--title', '-t', default='Space-time diagram', help='Title')
+@click.option('--metric', '-m', default='occupancy', type=click.Choice(list(METRICS)),
+              help='Drawn metric')
+@click.option('--lane', '-l', type=int, help='Draw a single lane instead of all of them')
+@click.option('--begin', '-b', type=int, help='Draw only the steps from the given one')
+@click.option('--end', '-e', type=int, help='Draw only the steps to the given one')
+@click.option('--output', '-o', default=None, help='Save output to a directory')
+@click.option('--prefix', '-p', default='', help='Prefix for output file names')
+@click.argument('directory', type=click.Path(file_okay=False, exists=True))
+def main(title: str, metric: str, lane: typing.Optional[int], begin: typing.Optional[int],
+         end: typing.Optional[int], output: typing.Optional[str], prefix: str, directory: str):
+    chart = SpaceTimeChart(loadSpaceTime(directory, begin, end), metric=metric, lane=lane,
+                           title=title)
+    if output is not None:
+        chart.save(output, prefix)
+    else:
+        chart.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import os
+import sys
+import typing
+
+import click
+import numpy as np
+import pandas as pd
+import seaborn as sns
+import matplotlib.pylab as plt
+
+if __name__ == '__main__':
+    # Run as a script, the packages of the simulator are in the parent directory.
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from util.lttb import largestTriangleThreeBuckets  # noqa: E402
+
+# Lines are downsampled to at most this many points.
+MAX_POINTS = 1000
+
+METRICS = (('velocity', 'Speed'), ('vehicles', 'Vehicles'), ('throughput', 'Throughput'),
+           ('waiting', 'Waiting'))
+TYPES = (('all', 'All'), ('autonomous', 'Autonomous'), ('conventional', 'Conventional'),
+         ('emergency', 'Emergency'))
+
+
+def downsample(data: pd.DataFrame, column: str, max_points: int = MAX_POINTS) -> pd.DataFrame:
+    '''
+    Downsamples a metric of the time series for a line chart, periods without a value are
+    left out.
+    :param data: time series with the step and steps columns of the periods.
+    :param column: column of the metric.
+    :param max_points: maximum number of points.
+    :return: middle steps of the kept periods and the values as x and y columns.
+    '''
+    x = (data['step'] + (data['steps'] - 1) / 2).to_numpy(dtype=float)
+    y = data[column].to_numpy(dtype=float)
+    known = ~np.isnan(y)
+    x, y = x[known], y[known]
+    kept = largestTriangleThreeBuckets(x, y, max_points) if len(x) > 0 else []
+    return pd.DataFrame({'x': x[kept], 'y': y[kept]})
+
+
+class TimeSeriesChart:
+    data: pd.DataFrame
+    max_points: int
+
+    def __init__(self, data: pd.DataFrame, max_points: int = MAX_POINTS):
+        '''
+        :param data: periods of the time series with the metrics of the vehicle types.
+        :param max_points: maximum number of points of a line.
+        '''
+        self.data = data
+        self.max_points = max_points
+
+    def show(self, only_data: bool) -> None:
+        click.secho('Time series', fg='yellow')
+        if not only_data:
+            self._prepareChart()
+            plt.show()
+
+    def save(self, path: str, prefix: str, only_data: bool) -> None:
+        csv_path = os.path.join(path, f'{prefix}.csv')
+        self.data.to_csv(csv_path, index=False)
+        if not only_data:
+            self._prepareChart()
+            plt_path = os.path.join(path, f'{prefix}.pdf')
+            plt.savefig(plt_path, bbox_inches='tight')
+
+    def _prepareChart(self) -> None:
+        # Do not use LaTeX if NO_LATEX variable is set.
+        no_latex = bool(os.getenv('NO_LATEX', False))
+        params = dict(font='serif', style='darkgrid')
+        if not no_latex:
+            params['rc'] = {'text.usetex': True}
+        sns.set(**params)
+
+        f, axes = plt.subplots(len(METRICS), 1, sharex=True, figsize=(6, 8))
+        for ax, (metric, label) in zip(axes, METRICS):
+            lines = []
+            for name, title in TYPES:
+                line = downsample(self.data, f'{metric}_{name}', self.max_points)
+                # Types missing from the run are left out.
+                if line['y'].any():
+                    lines.append(line.assign(type=title))
+            if lines:
+                sns.lineplot(x='x', y='y', hue='type', data=pd.concat(lines), ax=ax)
+                ax.legend(title=None, fontsize='small')
+            ax.set(xlabel=None, ylabel=label)
+        axes[-1].set(xlabel='Step')
+        f.tight_layout()
+
+
+@click.command()
+@click.option('--output', '-o', default=None, help='Save output to a directory')
+@click.option('--prefix', '-p', default='', help='Prefix for output file names')
+@click.option('--max-points', default=MAX_POINTS, help='Maximum number of points of a line')
+@click.argument('file', type=click.File())
+def main(output: typing.Optional[str], prefix: str, max_points: int, file):
+    chart = TimeSeriesChart(pd.read_csv(file, header=0), max_points=max_points)
+    if output is not None:
+        chart.save(output, prefix, only_data=False)
+    else:
+        chart.show(only_data=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,12 @@ import os
 import typing
 
 import click
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pylab as plt
 
-VelocityData = typing.List[typing.List[float]]
+VelocityData = typing.Union[typing.List[typing.List[float]], np.ndarray]
 
 
 class VelocityChart:
@@ -15,11 +16,16 @@ class VelocityChart:
     conventional: pd.DataFrame
     emergency: pd.DataFrame
 
-    def __init__(self, car: VelocityData, autonomous: VelocityData, conventional: VelocityData, emergency: VelocityData):
+    def __init__(self, car: VelocityData, autonomous: VelocityData, conventional: VelocityData, emergency: VelocityData,
+                 bin_width: int = 1):
         self.car = pd.DataFrame(car)
         self.autonomous = pd.DataFrame(autonomous)
         self.conventional = pd.DataFrame(conventional)
         self.emergency = pd.DataFrame(emergency)
+        # Bins of cells are labelled with their first cells.
+        if bin_width > 1:
+            for data in (self.car, self.autonomous, self.conventional, self.emergency):
+                data.columns = data.columns * bin_width
 
     def show(self, only_data: bool) -> None:
         click.secho('Average speed', fg='yellow')
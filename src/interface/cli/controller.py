@@ -1,19 +1,21 @@
+import contextlib
 import os
 import typing
 import click
 
-import pandas as pd
-
-from charts.heatmap import HeatMap
-from charts.velocity import VelocityChart
-from charts.travel import TravelHistogram
-
-from simulator.simulator import Simulator
-from simulator.statistics.averageresult import AverageResult
+from charts.spacetime import SpaceTimeChart
+from interface.run import RunResult
+from simulator.checkpoint import Checkpointer
+from simulator.simulator import HookPipeline, Simulator
+from simulator.snapshot import Snapshot
 from simulator.statistics.collector import Collector, Statistics
+from simulator.statistics.sampling import SamplingPolicy
+from simulator.statistics.spacetime import SpaceTimeDiagram, loadSpaceTime
+from simulator.statistics.steadystate import SteadyStateMonitor
+from simulator.statistics.timeseries import TimeSeries
 from simulator.statistics.tracker import Tracker
 from simulator.statistics.vehicletype import VehicleType
-from simulator.vehicle.emergency import VehicleFlags
+from simulator.warmup import runUntilSettled
 
 from util.format import OptionalFormat
 
@@ -24,103 +26,114 @@ class Controller:
     def __init__(self, simulator: Simulator):
         self.simulator = simulator
 
+    @staticmethod
+    def checkpointPath(output: typing.Optional[str], prefix: str) -> str:
+        return os.path.join(output if output is not None else '.', f'{prefix}.checkpoint')
+
     def run(self, steps: int, skip: int, statistics: Statistics, no_charts: bool,
-            output: typing.Optional[str] = None, prefix: str = '') -> None:
-        with Collector(simulator=self.simulator, statistics=statistics, skip=skip) as collector, \
-                Tracker(simulator=self.simulator, buffer_size=steps - skip) as tracker:
+            output: typing.Optional[str] = None, prefix: str = '',
+            checkpoint_every: typing.Optional[int] = None,
+            checkpoint_interval: typing.Optional[float] = None, resume: bool = False,
+            auto_skip: bool = False, stop_precision: typing.Optional[float] = None,
+            sampling: typing.Optional[SamplingPolicy] = None, bin_width: int = 1,
+            timeseries: bool = False, spacetime: bool = False,
+            spacetime_period: int = 10, pipeline: int = 0) -> None:
+        checkpoint = self.checkpointPath(output, prefix)
+        spacetime_path = os.path.join(output if output is not None else '.',
+                                      f'{prefix}_spacetime')
+        params = dict(steps=steps, skip=skip, statistics=statistics, auto_skip=auto_skip,
+                      stop_precision=stop_precision, sampling=str(sampling), bin_width=bin_width,
+                      timeseries=timeseries, spacetime=spacetime,
+                      spacetime_period=spacetime_period)
+        if resume and os.path.isfile(checkpoint):
+            self.simulator, objects = Snapshot.load(checkpoint).restoreObjects()
+            if objects['params'] != params:
+                raise click.UsageError(
+                    f'checkpoint {checkpoint} was created with different parameters {objects["params"]}')
+            collector, tracker, target = objects['collector'], objects['tracker'], objects['target']
+            monitor, warmup = objects['monitor'], objects['warmup']
+            series, diagram = objects['timeseries'], objects['spacetime']
+            click.secho(f'Resuming from step {self.simulator.steps} of {checkpoint}', fg='blue')
+        else:
+            if resume:
+                click.secho(f'No checkpoint {checkpoint} found, starting from scratch', fg='yellow')
+            warmup = skip
+            if auto_skip:
+                warmup = runUntilSettled(self.simulator, max_steps=steps // 2)
+                click.secho(f'Traffic settled after {warmup} steps', fg='blue')
+                steps, skip = steps - warmup, 0
+            collector = Collector(simulator=self.simulator, statistics=statistics, skip=skip,
+                                  sampling=sampling, bin_width=bin_width)
+            tracker = Tracker(simulator=self.simulator, buffer_size=None, skip=skip,
+                              sampling=sampling)
+            monitor = SteadyStateMonitor(simulator=self.simulator) \
+                if stop_precision is not None else None
+            series = TimeSeries(simulator=self.simulator) if timeseries else None
+            diagram = SpaceTimeDiagram(
+                simulator=self.simulator, path=spacetime_path, period=spacetime_period,
+                bin_width=bin_width, skip=skip) if spacetime else None
+            target = self.simulator.steps + steps
+
+        checkpointing = checkpoint_every is not None or checkpoint_interval is not None
+        if checkpointing:
+            checkpointer = Checkpointer(
+                simulator=self.simulator, path=checkpoint, every_steps=checkpoint_every,
+                every_seconds=checkpoint_interval, params=params,
+                collector=collector, tracker=tracker, target=target, monitor=monitor,
+                warmup=warmup, timeseries=series, spacetime=diagram)
+        else:
+            checkpointer = contextlib.nullcontext()
+        # Frame hooks may run up to the given number of steps behind the simulation.
+        pipelined = HookPipeline(self.simulator, max_pending=pipeline) if pipeline > 0 \
+            else contextlib.nullcontext()
+
+        with collector, tracker, monitor if monitor is not None else contextlib.nullcontext(), \
+                series if series is not None else contextlib.nullcontext(), \
+                diagram if diagram is not None else contextlib.nullcontext():
 
             def show_stats(_: typing.Any) -> str:
+                # Pipelined hooks may be a few steps behind, the progress shows a finished one.
+                with self.simulator.synchronized():
+                    velocities = [tracker.getAverageVelocity(vehicle_type) for vehicle_type in (
+                        VehicleType.ANY, VehicleType.CONVENTIONAL, VehicleType.AUTONOMOUS,
+                        VehicleType.EMERGENCY)]
                 return '{:.2f}|{:.2f}|{:.2f}|{:.2f} (Average|Conventional|Autonomous|Emergency)'.format(
-                    OptionalFormat(tracker.getAverageVelocity(VehicleType.ANY)),
-                    OptionalFormat(tracker.getAverageVelocity(VehicleType.CONVENTIONAL)),
-                    OptionalFormat(tracker.getAverageVelocity(VehicleType.AUTONOMOUS)),
-                    OptionalFormat(tracker.getAverageVelocity(VehicleType.EMERGENCY))
-                )
-
-            with click.progressbar(range(steps), steps, item_show_func=show_stats) as bar:
+                    *map(OptionalFormat, velocities))
+
+            # Steps the monitor recorded before the run, it is checked once the pipelined hooks
+            # caught up with its check steps.
+            monitored = self.simulator.steps - len(monitor.velocity) if monitor is not None else 0
+            remaining = target - self.simulator.steps
+            with checkpointer, pipelined, \
+                    click.progressbar(range(remaining), remaining, item_show_func=show_stats) as bar:
                 for _ in bar:
                     self.simulator.step()
-
-            if statistics & Statistics.THROUGHPUT:
-                click.secho('Generating throughput charts', fg='blue')
-                throughput = HeatMap(
-                    data=collector.getThrougput(), title='Throughput', max_value=3)
-                if output is not None:
-                    throughput.save(path=output, prefix=f'{prefix}_throughput', only_data=no_charts)
-                else:
-                    throughput.show(only_data=no_charts)
-
-            if statistics & Statistics.HEAT_MAP:
-                click.secho('Generating traffic density charts', fg='blue')
-                heat_map = HeatMap(
-                    data=collector.getHeatMap(), title='Traffic density', max_value=1)
-                if output is not None:
-                    heat_map.save(path=output, prefix=f'{prefix}_traffic', only_data=no_charts)
-                else:
-                    heat_map.show(only_data=no_charts)
-
-            if statistics & Statistics.VELOCITY:
-                click.secho('Generating speed charts', fg='blue')
-
-                def mapper(x: AverageResult) -> float:
-                    return x.toZeroFloat()
-
-                velocity = \
-                    [list(map(mapper, lane)) for lane in collector.velocity]
-                autonomous = \
-                    [list(map(mapper, lane)) for lane in collector.velocity_autonomous]
-                conventional = \
-                    [list(map(mapper, lane)) for lane in collector.velocity_conventional]
-                emergency = \
-                    [list(map(mapper, lane)) for lane in collector.velocity_emergency]
-                velocity = VelocityChart(
-                    car=velocity, autonomous=autonomous, conventional=conventional, emergency=emergency)
-                if output is not None:
-                    velocity.save(path=output, prefix=f'{prefix}_speed', only_data=no_charts)
-                else:
-                    velocity.show(only_data=no_charts)
-
-            if statistics & Statistics.TRAVEL_TIME:
-                click.secho('Generating travel time histogram', fg='blue')
-
-                df = pd.DataFrame(columns=['x', 'y', 'type'])
-                n = sum(collector.travel)
-                na = sum(collector.travel_autonomous)
-                nc = sum(collector.travel_conventional)
-                if collector.travel_emergency:
-                    ne = sum(collector.travel_emergency)
-                for i in range(collector._travelLimit):
-                    if not n == 0:
-                        df = df.append({'x': i, 'y': collector.travel[i] / n * 100,
-                                        'type': 'All'}, ignore_index=True)
-                    else:
-                        df = df.append({'x': i, 'y': 0,
-                                        'type': 'All'}, ignore_index=True)
-                    if not na == 0:
-                        df = df.append({'x': i, 'y': collector.travel_autonomous[i] / na * 100,
-                                        'type': 'Autonomous'}, ignore_index=True)
-                    else:
-                        df = df.append({'x': i, 'y': 0,
-                                        'type': 'Autonomous'}, ignore_index=True)
-                    if not nc == 0:
-                        df = df.append({'x': i, 'y': collector.travel_conventional[i] / nc * 100,
-                                        'type': 'Conventional'}, ignore_index=True)
-                    else:
-                         df = df.append({'x': i, 'y': 0,
-                                        'type': 'Conventional'}, ignore_index=True)
-                    if not ne == 0:
-                        df = df.append({'x': i, 'y': collector.travel_emergency[i] / ne * 100,
-                                        'type': 'Emergency'}, ignore_index=True)
-
-                travel = TravelHistogram(data=df)
+                    if monitor is None or \
+                            (self.simulator.steps - monitored) % monitor.check_interval != 0:
+                        continue
+                    self.simulator.flush()
+                    if monitor.isCheckStep() and \
+                            monitor.isPrecise(stop_precision, start=collector.skip):
+                        measured = collector.steps - collector.skip
+                        click.secho(f'\nReached the precision after {measured} steps', fg='blue')
+                        break
+
+            result = RunResult.collect(collector, tracker, series)
+            if auto_skip or stop_precision is not None:
+                result.addRunLength(warmup, collector.steps - collector.skip)
+            result.output(output=output, prefix=prefix, no_charts=no_charts)
+
+        # The diagram writes its last rows when it is removed from the simulator.
+        if diagram is not None and diagram.chunks > 0 and not no_charts:
+            click.secho('Generating space-time diagrams', fg='blue')
+            data = loadSpaceTime(spacetime_path)
+            for metric in ('occupancy', 'velocity'):
+                chart = SpaceTimeChart(data, metric=metric)
                 if output is not None:
-                    travel.save(path=output, prefix=prefix, only_data=no_charts)
+                    chart.save(path=output, prefix=f'{prefix}_spacetime_{metric}')
                 else:
-                    travel.show(only_data=no_charts)
+                    chart.show()
 
-            click.secho('Generating average statistics', fg='blue')
-            data = tracker.getAverageData()
-            if output is not None:
-                data.to_csv(os.path.join(output, f'{prefix}_average.csv'), index=False)
-            else:
-                click.echo(data.to_csv(index=False))
+        # The run is complete, there is nothing left to resume.
+        if (checkpointing or resume) and os.path.isfile(checkpoint):
+            os.remove(checkpoint)
@@ -1,21 +1,25 @@
-import random
+import os
 import typing
 import click
 import click_config_file
 import yaml
 
-from interface.obstacle import ObstacleParamType, ObstacleValue, addObstacle
-from interface.experiment_list import PenListParamType
+from interface.obstacle import ObstacleParamType
+from interface.experiment_list import MetricListParamType, PenListParamType
 from interface.gui.controller import Controller as GUIController
 from interface.cli.controller import Controller as CLIController
+from interface.estimate import CostModel, Estimate
 from interface.exp.controller import experiment
+from interface.exp.runner import runWorkers
+from interface.exp.sweep import SweepParamType, sweep as runSweep
+from interface.run import openWarmCache, warmCacheKey
+from interface.sampling import SamplingParamType
+from interface.scenario import Scenario
 
-from simulator.dispatcher.emergency import EmergencyDispatcher
-from simulator.road.dense import DenseRoad
-from simulator.road.speedcontroller import SpeedController
 from simulator.simulator import Simulator
+from simulator.snapshot import Snapshot
+from simulator.warmup import warmUp
 from simulator.statistics.collector import Statistics
-from simulator.vehicle.conventional import Driver
 
 
 def configProvider(file_path: str, cmd: str) -> typing.Dict[str, typing.Any]:
@@ -45,47 +49,21 @@ def configProvider(file_path: str, cmd: str) -> typing.Dict[str, typing.Any]:
 @click.option('--limit', default=0, help='Difference in maximum speed between vehicles')
 # Other options.
 @click.option('--seed', type=int, help='Seed for the RNG')
+@click.option('--restore', type=click.Path(dir_okay=False, exists=True),
+              help='Start from a saved simulator snapshot instead of a new road')
 # Configuration file option.
 @click_config_file.configuration_option(provider=configProvider, implicit=False)
 @click.pass_context
 def command(ctx: click.Context, **kwargs) -> None:
-    # Extract options.
-    length: int = kwargs['length']
-    lanes: int = kwargs['lanes']
-    emergency_lane: int = kwargs["emergency_lane"]
-    max_speed: int = kwargs['max_speed']
-    density: float = kwargs['density']
-    dispatch: int = kwargs['dispatch']
-    penetration: float = kwargs['penetration']
-    car_length: int = kwargs['car_length']
-    emergency: int = kwargs['emergency']
-    pslow: float = kwargs['pslow']
-    pchange: float = kwargs['pchange']
-    symmetry: bool = kwargs['symmetry']
-    limit: int = kwargs['limit']
-    obstacles: typing.List[ObstacleValue] = kwargs['obstacles']
-    seed: typing.Optional[int] = kwargs['seed']
-    # Initialize random number generator.
-    if seed is not None:
-        random.seed(seed)
-    # Create a road.
-    speed_controller = SpeedController(max_speed=max_speed)
-    road = DenseRoad(
-        length=length, lanes_count=lanes, lane_width=1, emergency_lane=emergency_lane, controller=speed_controller)
-    # Add obstacles.
-    for obstacle in obstacles:
-        addObstacle(road=road, obstacle=obstacle)
-    # Create the dispatcher.
-    driver = Driver(slow=pslow, change=pchange, symmetry=symmetry)
-    dispatcher = EmergencyDispatcher(
-        count=dispatch, road=road, penetration=penetration,
-        driver=driver, length=car_length, limit=limit, emergency_rate=emergency)
-    # Create the simulator and scatter vehicles.
-    simulator = Simulator(road=road, dispatcher=dispatcher)
-    simulator.scatterVehicles(density=density)
-    ctx.obj = simulator
+    restore: typing.Optional[str] = kwargs.pop('restore')
     global sim_info
     sim_info = kwargs
+    # Continue a saved simulation, the snapshot carries its own RNG state.
+    if restore is not None:
+        ctx.obj = Snapshot.load(restore).restore()
+        return
+    ctx.obj = Scenario(**kwargs).build()
+
 
 @command.command()
 @click.option('--step', default=100, help='Animation time of a single simulation step (ms)')
@@ -105,6 +83,11 @@ def gui(ctx: click.Context, step: int, fps: int, buffer: int, quiet: int) -> Non
 # Simulation parameters.
 @click.option('--steps', default=1000, help='Number of simulation steps to run')
 @click.option('--skip', default=0, help='Skip first n steps when gathering statistics')
+@click.option('--auto-skip', is_flag=True,
+              help='Skip the steps until the traffic settled instead of --skip steps, '
+                   'at most half of the steps')
+@click.option('--stop-precision', type=float,
+              help='Stop once the average velocity is known within this fraction of its value')
 # Output parameters.
 @click.option('--output', '-o', type=click.Path(file_okay=False), help='Output directory')
 @click.option('--prefix', '-p', default='', help='Output files name prefix')
@@ -115,10 +98,35 @@ def gui(ctx: click.Context, step: int, fps: int, buffer: int, quiet: int) -> Non
 @click.option('--heatmap', is_flag=True, help='Toggle heatmap statistics')
 @click.option('--throughput', is_flag=True, help='Toggle throughput statistics')
 @click.option('--travel', is_flag=True, help='Toggle travel time statistics')
+@click.option('--sample', 'sampling', type=SamplingParamType(),
+              help='Gather statistics of every:K-th step, random:FRACTION of the steps or a '
+                   'sample of vehicles:N vehicles in every step')
+@click.option('--bin-width', type=click.IntRange(min=1), default=1,
+              help='Gather cell statistics in bins of n cells')
+@click.option('--timeseries', is_flag=True,
+              help='Record the per-step metrics of the vehicle types over the whole run')
+@click.option('--spacetime', is_flag=True,
+              help='Record a space-time diagram of the occupancy and velocity in every lane')
+@click.option('--spacetime-period', type=click.IntRange(min=1), default=10,
+              help='Number of steps in a row of the space-time diagram')
+@click.option('--pipeline', type=click.IntRange(min=0), default=0,
+              help='Gather statistics on a worker thread, at most n steps behind the simulation')
+# Warm-up cache.
+@click.option('--warm-cache', type=click.Path(file_okay=False),
+              help='Directory caching simulator states after the skipped steps (requires --seed)')
+@click.option('--warm-cache-size', default=1024, help='Maximum warm-up cache size (MB)')
+@click.option('--warm-cache-age', default=7., help='Evict warm-up cache entries unused for n days')
+# Checkpoints.
+@click.option('--checkpoint-every', type=int, help='Save a checkpoint every n steps')
+@click.option('--checkpoint-interval', type=float, help='Save a checkpoint every n seconds')
+@click.option('--resume', is_flag=True, help='Continue from the last checkpoint if there is one')
+@click.option('--dry-run', is_flag=True,
+              help='Only predict the run time, memory and output size of the simulation')
 @click.pass_context
 def cli(ctx: click.Context, all_statistics: bool, velocity: bool, heatmap: bool, throughput: bool,
-        travel: bool, **kwargs):
-    controller = CLIController(simulator=ctx.obj)
+        travel: bool, warm_cache: typing.Optional[str], warm_cache_size: int,
+        warm_cache_age: float, dry_run: bool, **kwargs):
+    simulator: Simulator = ctx.obj
     statistics = Statistics.ALL if all_statistics else Statistics.NONE
     if velocity:
         statistics ^= statistics.VELOCITY
@@ -128,14 +136,135 @@ def cli(ctx: click.Context, all_statistics: bool, velocity: bool, heatmap: bool,
         statistics ^= statistics.THROUGHPUT
     if travel:
         statistics ^= statistics.TRAVEL_TIME
+    if dry_run:
+        click.secho('Calibrating the cost model', fg='blue')
+        scenario = Scenario(**sim_info)
+        model = CostModel.calibrate(scenario, statistics)
+        click.echo(Estimate([model.predict(scenario, kwargs['steps'])]))
+        return
+    checkpoint = CLIController.checkpointPath(kwargs['output'], kwargs['prefix'])
+    resuming = kwargs['resume'] and os.path.isfile(checkpoint)
+    if warm_cache is not None:
+        if kwargs['auto_skip']:
+            click.secho('Warm-up cache does not support --auto-skip, ignoring', fg='yellow')
+        elif sim_info['seed'] is None or ctx.parent.params['restore'] is not None:
+            click.secho('Warm-up cache requires --seed and no --restore, ignoring', fg='yellow')
+        else:
+            cache = openWarmCache(warm_cache, max_size=warm_cache_size, max_age=warm_cache_age)
+            key = warmCacheKey(Scenario(**sim_info), skip=kwargs['skip'])
+            # Resumed runs continue from the checkpoint, no need to warm up.
+            if not resuming:
+                simulator = warmUp(simulator, steps=kwargs['skip'], cache=cache, key=key)
+            kwargs['steps'] -= kwargs['skip']
+            kwargs['skip'] = 0
+    controller = CLIController(simulator=simulator)
     controller.run(statistics=statistics, **kwargs)
 
 
+@command.command()
+@click.option('--steps', default=1000, help='Number of simulation steps to run before saving')
+@click.argument('output', type=click.Path(dir_okay=False))
+@click.pass_context
+def snapshot(ctx: click.Context, steps: int, output: str) -> None:
+    simulator: Simulator = ctx.obj
+    with click.progressbar(range(steps), steps) as bar:
+        for _ in bar:
+            simulator.step()
+    Snapshot.take(simulator).save(output)
+    click.secho(f'Saved simulator state after {simulator.steps} steps to {output}', fg='blue')
+
+
 @command.command()
 @click.option('--penetration-list', default ='.01, .1, .2, .3, .4, .5, .6, .7, .8, .9, .99', type=PenListParamType(), help = 'Penetration rates used in an experiment')
 @click.option('--num', default=10, help = 'Number of simulations in one experiment for every penetration rate')
 @click.option('--steps', default=2000, help='Number of simulation steps to run')
 @click.option('--skip', default=100, help='Skip first n steps when gathering statistics')
+@click.option('--auto-skip', is_flag=True,
+              help='Skip the steps until the traffic settled instead of --skip steps, '
+                   'at most half of the steps')
+@click.option('--stop-precision', type=float,
+              help='Stop a run once the average velocity is known within this fraction '
+                   'of its value')
+@click.option('--warm-cache', type=click.Path(file_okay=False),
+              help='Directory caching simulator states after the skipped steps (requires --seed)')
+@click.option('--jobs', '-j', default=os.cpu_count() or 1,
+              help='Number of simulations run in parallel')
+@click.option('--cache', default=os.path.join('out', '.cache'), type=click.Path(file_okay=False),
+              help='Directory storing results of finished simulations (requires --seed)')
+@click.option('--no-cache', is_flag=True, help='Do not read or update the result cache')
+@click.option('--cache-size', default=1024, help='Maximum result cache size (MB)')
+@click.option('--cache-age', default=30., help='Evict result cache entries unused for n days')
+@click.option('--queue', type=click.Path(file_okay=False),
+              help='Shared directory distributing the simulations to workers on other hosts')
+# Adaptive replication.
+@click.option('--adaptive', is_flag=True,
+              help='Run replications until the confidence intervals are narrow enough, '
+                   'ignores --num')
+@click.option('--metrics', default='velocity_all,throughput_all', type=MetricListParamType(),
+              help='Average statistics whose confidence intervals are checked')
+@click.option('--precision', default=.05,
+              help='Target half width of the intervals relative to the mean')
+@click.option('--confidence', default=.95, help='Confidence level of the intervals')
+@click.option('--min-num', default=3,
+              help='Number of replications run before checking the intervals')
+@click.option('--max-num', default=30,
+              help='Maximum number of replications for every penetration rate')
+@click.option('--crn', is_flag=True,
+              help='Use common random numbers, replica i of every penetration rate gets '
+                   'the same seed')
+# Budget allocation.
+@click.option('--budget', type=float,
+              help='Processor time in seconds divided between the penetration rates, ignores --num')
+@click.option('--pilot', default=3,
+              help='Number of replications estimating the variance and cost of every point')
+@click.option('--dry-run', is_flag=True,
+              help='Only predict the run time, memory and output size of the experiment')
 @click.pass_context
 def exp(ctx: click.Context, **kwargs):
-    experiment(sim_info, **kwargs)
\ No newline at end of file
+    experiment(sim_info, **kwargs)
+
+
+@command.command()
+@click.option('--param', multiple=True, required=True, type=SweepParamType(),
+              help='Swept option and its levels, f.e. pslow=.1,.2 or pslow=.1:.3 for --design lhs, '
+                   'obstacle layouts are divided by a comma and obstacles in a layout by '
+                   'a plus sign')
+@click.option('--design', default='grid', type=click.Choice(['grid', 'lhs', 'list']),
+              help='Every combination of levels, a Latin hypercube or the i-th level of '
+                   'every option')
+@click.option('--samples', default=10, help='Number of points of a Latin hypercube')
+@click.option('--num', default=10, help='Number of simulations for every point')
+@click.option('--steps', default=2000, help='Number of simulation steps to run')
+@click.option('--skip', default=100, help='Skip first n steps when gathering statistics')
+@click.option('--warm-cache', type=click.Path(file_okay=False),
+              help='Directory caching simulator states after the skipped steps (requires --seed)')
+@click.option('--jobs', '-j', default=os.cpu_count() or 1,
+              help='Number of simulations run in parallel')
+@click.option('--cache', default=os.path.join('out', '.cache'), type=click.Path(file_okay=False),
+              help='Directory storing results of finished simulations (requires --seed)')
+@click.option('--no-cache', is_flag=True, help='Do not read or update the result cache')
+@click.option('--cache-size', default=1024, help='Maximum result cache size (MB)')
+@click.option('--cache-age', default=30., help='Evict result cache entries unused for n days')
+@click.option('--queue', type=click.Path(file_okay=False),
+              help='Shared directory distributing the simulations to workers on other hosts')
+# Budget allocation.
+@click.option('--budget', type=float,
+              help='Processor time in seconds divided between the points, ignores --num')
+@click.option('--pilot', default=3,
+              help='Number of replications estimating the variance and cost of every point')
+@click.option('--metrics', default='velocity_all,throughput_all', type=MetricListParamType(),
+              help='Average statistics whose confidence intervals are narrowed by --budget')
+@click.option('--confidence', default=.95, help='Confidence level of the intervals')
+@click.pass_context
+def sweep(ctx: click.Context, **kwargs):
+    runSweep(sim_info, **kwargs)
+
+
+@command.command()
+@click.option('--queue', required=True, type=click.Path(file_okay=False),
+              help='Shared work queue directory of exp or sweep')
+@click.option('--jobs', '-j', default=os.cpu_count() or 1,
+              help='Number of simulations run in parallel')
+@click.option('--exit-when-idle', is_flag=True, help='Stop once there are no simulations left')
+def worker(queue: str, jobs: int, exit_when_idle: bool):
+    runWorkers(queue, jobs=jobs, exit_when_idle=exit_when_idle)
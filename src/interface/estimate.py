@@ -0,0 +1,230 @@
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+import typing
+
+import numpy as np
+
+from interface.run import RunResult
+from interface.scenario import Scenario
+from simulator.simulator import Simulator
+from simulator.statistics.collector import Collector, Statistics
+from simulator.statistics.tracker import Tracker
+from simulator.vehicle.autonomous import isAutonomous
+
+# Calibration roads are at most this long, longer roads are extrapolated.
+CALIBRATION_LENGTHS = (50, 100, 200)
+
+
+def formatSize(size: float) -> str:
+    for unit in ('B', 'kB', 'MB', 'GB'):
+        if size < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} TB'
+
+
+def formatDuration(seconds: float) -> str:
+    minutes, seconds = divmod(int(math.ceil(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}'
+
+
+class RunEstimate:
+    '''
+    Predicted cost of a single simulation run.
+    '''
+    seconds: float
+    memory: float
+    output: float
+
+    def __init__(self, seconds: float, memory: float, output: float):
+        '''
+        :param seconds: processor time in seconds.
+        :param memory: peak memory of the simulation in bytes.
+        :param output: size of the data files in bytes.
+        '''
+        self.seconds = seconds
+        self.memory = memory
+        self.output = output
+
+
+class Estimate:
+    '''
+    Predicted cost of a set of simulation runs executed in parallel.
+    '''
+    runs: int
+    jobs: int
+    cpu: float
+    seconds: float
+    memory: float
+    output: float
+
+    def __init__(self, runs: typing.Sequence[RunEstimate], jobs: int = 1):
+        '''
+        :param runs: estimates of the single runs.
+        :param jobs: number of runs executed in parallel.
+        '''
+        self.runs = len(runs)
+        self.jobs = max(1, min(jobs, len(runs)))
+        self.cpu = sum(run.seconds for run in runs)
+        # Parallel runs finish no sooner than the longest one.
+        self.seconds = max([self.cpu / self.jobs] + [run.seconds for run in runs])
+        self.memory = self.jobs * max([run.memory for run in runs], default=0)
+        self.output = sum(run.output for run in runs)
+
+    def __str__(self) -> str:
+        return '\n'.join([
+            f'Runs:           {self.runs} ({self.jobs} in parallel)',
+            f'Processor time: {formatDuration(self.cpu)}',
+            f'Wall time:      {formatDuration(self.seconds)}',
+            f'Peak memory:    {formatSize(self.memory)}',
+            f'Output size:    {formatSize(self.output)}',
+        ])
+
+
+class CostModel:
+    '''
+    Linear models of the cost of a simulation run fitted to short calibration runs on the
+    local machine. The time of a step grows with the number of cells and of conventional and
+    autonomous vehicles on the road, the memory with the number of cells and of steps, the
+    time of gathering and saving the results and their size with the number of cells.
+    Calibration runs are shorter copies of the planned scenario without and with autonomous
+    cars only, so the lanes, density and enabled statistics are those of the planned runs.
+    '''
+    # Number of steps timed together.
+    BLOCK = 10
+
+    statistics: Statistics
+    # Coefficients of the constant, cells, conventional and autonomous vehicles.
+    step_time: np.ndarray
+    # Coefficients of the constant and cells.
+    finish_time: np.ndarray
+    # Coefficients of the constant, cells and steps.
+    memory: np.ndarray
+    # Coefficients of the constant and cells.
+    output: np.ndarray
+    # Active vehicles per cell without and with autonomous cars only.
+    vehicle_density: typing.Tuple[float, float]
+
+    def __init__(self, statistics: Statistics, step_time: np.ndarray, finish_time: np.ndarray,
+                 memory: np.ndarray, output: np.ndarray,
+                 vehicle_density: typing.Tuple[float, float]):
+        self.statistics = statistics
+        self.step_time = step_time
+        self.finish_time = finish_time
+        self.memory = memory
+        self.output = output
+        self.vehicle_density = vehicle_density
+
+    @staticmethod
+    def _calibrationScenario(scenario: Scenario, length: int, penetration: float) -> Scenario:
+        obstacles = [(lane, begin, end) for lane, begin, end in scenario.obstacles if end < length]
+        return scenario.replace(length=length, penetration=penetration, obstacles=obstacles)
+
+    @staticmethod
+    def _countVehicles(simulator: Simulator) -> typing.Tuple[int, int]:
+        vehicles, autonomous = 0, 0
+        for vehicle in simulator.road.getAllActiveVehicles():
+            vehicles += 1
+            autonomous += isAutonomous(vehicle)
+        return vehicles - autonomous, autonomous
+
+    @classmethod
+    def _timeRun(cls, scenario: Scenario, statistics: Statistics, steps: int
+                 ) -> typing.Tuple[typing.List[typing.Tuple[int, int, int, float]], float, int]:
+        simulator = scenario.build()
+        cells = scenario.length * scenario.lanes
+        blocks = []
+        with Collector(simulator=simulator, statistics=statistics) as collector, \
+                Tracker(simulator=simulator, buffer_size=None) as tracker:
+            for _ in range(steps // cls.BLOCK):
+                start = time.perf_counter()
+                for _ in range(cls.BLOCK):
+                    simulator.step()
+                seconds = (time.perf_counter() - start) / cls.BLOCK
+                blocks.append((cells, *cls._countVehicles(simulator), seconds))
+        # Gathering and saving the results takes time too, growing with the road.
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            result = RunResult.collect(collector, tracker)
+            result.output(output=directory, prefix='calibration', no_charts=True, quiet=True)
+            finish = time.perf_counter() - start
+            size = sum(entry.stat().st_size for entry in os.scandir(directory))
+        return blocks, finish, size
+
+    @classmethod
+    def _measureMemory(cls, scenario: Scenario, statistics: Statistics,
+                       steps: int) -> typing.List[typing.Tuple[int, int, int]]:
+        cells = scenario.length * scenario.lanes
+        samples = []
+        tracemalloc.start()
+        try:
+            simulator = scenario.build()
+            with Collector(simulator=simulator, statistics=statistics), \
+                    Tracker(simulator=simulator, buffer_size=None):
+                for step in range(1, steps + 1):
+                    simulator.step()
+                    if step % cls.BLOCK == 0:
+                        samples.append((cells, step, tracemalloc.get_traced_memory()[1]))
+        finally:
+            tracemalloc.stop()
+        return samples
+
+    @classmethod
+    def calibrate(cls, scenario: Scenario, statistics: Statistics,
+                  steps: int = 100) -> 'CostModel':
+        '''
+        Fits the cost model to calibration runs of a scenario.
+        :param scenario: planned scenario.
+        :param statistics: statistics gathered by the planned runs.
+        :param steps: number of steps of a calibration run.
+        :return: fitted cost model.
+        '''
+        steps = max(steps, 2 * cls.BLOCK)
+        lengths = sorted({min(length, scenario.length) for length in CALIBRATION_LENGTHS})
+        blocks, finishes, samples, sizes = [], [], [], []
+        for length in lengths:
+            cells = length * scenario.lanes
+            for penetration in (0., 1.):
+                run_blocks, finish, size = cls._timeRun(
+                    cls._calibrationScenario(scenario, length, penetration), statistics, steps)
+                blocks += run_blocks
+                finishes.append((cells, finish))
+                sizes.append((cells, size))
+            samples += cls._measureMemory(
+                cls._calibrationScenario(scenario, length, scenario.penetration), statistics,
+                steps)
+
+        def fit(rows: typing.List[typing.Tuple[float, ...]]) -> np.ndarray:
+            data = np.array(rows, dtype=float)
+            features = np.column_stack([np.ones(len(data)), data[:, :-1]])
+            return np.linalg.lstsq(features, data[:, -1], rcond=None)[0]
+
+        # The longest calibration road at the end of the runs is closest to the steady state.
+        cells = lengths[-1] * scenario.lanes
+        count = steps // cls.BLOCK
+        longest = [block for block in blocks if block[0] == cells]
+        density = tuple(sum(longest[end][1:3]) / cells for end in (count - 1, 2 * count - 1))
+        return cls(statistics=statistics, step_time=fit(blocks), finish_time=fit(finishes),
+                   memory=fit(samples), output=fit(sizes), vehicle_density=density)
+
+    def predict(self, scenario: Scenario, steps: int) -> RunEstimate:
+        '''
+        Predicts the cost of a run of a scenario.
+        :param scenario: simulation scenario.
+        :param steps: number of simulation steps.
+        :return: run estimate.
+        '''
+        cells = scenario.length * scenario.lanes
+        conventional, autonomous = self.vehicle_density
+        vehicles = cells * (conventional + (autonomous - conventional) * scenario.penetration)
+        step = np.dot(self.step_time, [
+            1, cells, vehicles * (1 - scenario.penetration), vehicles * scenario.penetration])
+        finish = np.dot(self.finish_time, [1, cells])
+        memory = np.dot(self.memory, [1, cells, steps])
+        output = np.dot(self.output, [1, cells])
+        return RunEstimate(seconds=steps * max(float(step), 0.) + max(float(finish), 0.),
+                           memory=max(float(memory), 0.), output=max(float(output), 0.))
@@ -0,0 +1,112 @@
+import typing
+
+import pandas as pd
+
+from interface.exp.runner import Runner, Task
+from interface.run import RunResult
+from simulator.statistics.confidence import ConfidenceInterval, confidenceInterval
+
+TaskFactory = typing.Callable[[float, int], Task]
+
+
+class AdaptiveReplication:
+    '''
+    Sequential replication procedure. Every penetration rate starts with a minimal number of
+    replications and gets more, in rounds, until the confidence intervals of all the chosen
+    average metrics are narrow enough or the maximal number of replications is reached.
+    The size of the next round is estimated from the current sample variance, but at most
+    doubles the number of replications to avoid overshooting on noisy early estimates.
+    '''
+    metrics: typing.List[str]
+    precision: float
+    confidence: float
+    min_num: int
+    max_num: int
+    averages: typing.Dict[float, typing.List[pd.DataFrame]]
+    launched: typing.Dict[float, int]
+
+    def __init__(self, metrics: typing.List[str], precision: float = .05, confidence: float = .95,
+                 min_num: int = 3, max_num: int = 30):
+        '''
+        :param metrics: names of the average statistics columns to estimate.
+        :param precision: target half width of the intervals relative to the mean.
+        :param confidence: confidence level of the intervals.
+        :param min_num: number of replications in the first round.
+        :param max_num: maximum number of replications of a penetration rate.
+        '''
+        if not 2 <= min_num <= max_num:
+            raise ValueError(f'expected 2 <= min_num <= max_num, got {min_num} and {max_num}')
+        self.metrics = metrics
+        self.precision = precision
+        self.confidence = confidence
+        self.min_num = min_num
+        self.max_num = max_num
+        self.averages = {}
+        self.launched = {}
+
+    def intervals(self, penetration: float) -> typing.Dict[str, ConfidenceInterval]:
+        return {
+            metric: confidenceInterval(
+                [average[metric][0] for average in self.averages[penetration]], self.confidence)
+            for metric in self.metrics
+        }
+
+    def isPrecise(self, penetration: float) -> bool:
+        intervals = self.intervals(penetration)
+        return all(interval.isPrecise(self.precision) for interval in intervals.values())
+
+    def nextRound(self, penetration: float) -> int:
+        '''
+        Returns the number of replications to add to a penetration rate.
+        :param penetration: penetration rate.
+        :return: number of new replications, 0 once the rate is done.
+        '''
+        launched = self.launched[penetration]
+        if launched == 0:
+            return self.min_num
+        if launched >= self.max_num or self.isPrecise(penetration):
+            return 0
+        required = launched + 1
+        for interval in self.intervals(penetration).values():
+            if not interval.isPrecise(self.precision):
+                count = interval.requiredCount(self.precision)
+                required = max(required, count if count is not None else self.max_num)
+        return min(required, launched * 2, self.max_num) - launched
+
+    def run(self, runner: Runner, make_task: TaskFactory,
+            penetrations: typing.Iterable[float]) -> typing.Iterator[typing.Tuple[Task, RunResult]]:
+        '''
+        Runs replications of all penetration rates until they are precise enough.
+        :param runner: simulation runner.
+        :param make_task: creates the task of a replication given penetration rate and index.
+        :param penetrations: penetration rates.
+        :return: tasks together with their results.
+        '''
+        for penetration in penetrations:
+            self.averages[penetration] = []
+            self.launched[penetration] = 0
+        while True:
+            tasks = []
+            for penetration, launched in self.launched.items():
+                count = self.nextRound(penetration)
+                tasks.extend(make_task(penetration, i) for i in range(launched, launched + count))
+                self.launched[penetration] += count
+            if not tasks:
+                return
+            for task, result in runner.run(tasks):
+                self.averages[task.scenario.penetration].append(result.average)
+                yield task, result
+
+    def summary(self) -> pd.DataFrame:
+        '''
+        Returns the number of replications and the final confidence intervals.
+        :return: one row for every penetration rate.
+        '''
+        rows = []
+        for penetration in self.averages:
+            row = dict(penetration=penetration, replications=len(self.averages[penetration]))
+            for metric, interval in self.intervals(penetration).items():
+                row[f'{metric}_mean'] = interval.mean
+                row[f'{metric}_half_width'] = interval.half_width
+            rows.append(row)
+        return pd.DataFrame(rows)
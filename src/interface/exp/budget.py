@@ -0,0 +1,167 @@
+import typing
+
+import numpy as np
+import pandas as pd
+
+from interface.exp.runner import Runner, Task
+from interface.run import RunResult
+from simulator.statistics.confidence import ConfidenceInterval, confidenceInterval
+from util.design import allocateReplications
+
+PointKey = typing.Hashable
+TaskFactory = typing.Callable[[PointKey, int], Task]
+
+# Replications of points which finish almost instantly still cost something.
+MIN_COST = 1e-3
+
+
+class BudgetReplication:
+    '''
+    Two stage replication procedure for a fixed budget of processor time. A pilot round of
+    every point estimates the variance of the chosen average metrics and the cost of a run,
+    the rest of the budget is then divided to minimize the sum of the confidence interval
+    widths. Noisy and cheap points get more replications, and so do points where the metrics
+    change steeply with the position of the point, as they shape the resulting curves most.
+    '''
+    metrics: typing.List[str]
+    budget: float
+    pilot: int
+    confidence: float
+    positions: typing.Optional[typing.Dict[PointKey, float]]
+    averages: typing.Dict[PointKey, typing.List[pd.DataFrame]]
+    durations: typing.Dict[PointKey, typing.List[float]]
+    planned: typing.Dict[PointKey, int]
+
+    def __init__(self, metrics: typing.List[str], budget: float, pilot: int = 3,
+                 confidence: float = .95,
+                 positions: typing.Optional[typing.Dict[PointKey, float]] = None):
+        '''
+        :param metrics: names of the average statistics columns to estimate.
+        :param budget: processor time of all the runs in seconds.
+        :param pilot: number of replications of every point in the pilot round.
+        :param confidence: confidence level of the intervals.
+        :param positions: numeric positions of the points, f.e. penetration rates, to weight
+            the points by the slopes of the metrics. Points are weighted equally without them.
+        '''
+        if pilot < 2:
+            raise ValueError(f'expected at least 2 pilot replications, got {pilot}')
+        if budget <= 0:
+            raise ValueError(f'expected positive budget, got {budget}')
+        self.metrics = metrics
+        self.budget = budget
+        self.pilot = pilot
+        self.confidence = confidence
+        self.positions = positions
+        self.averages = {}
+        self.durations = {}
+        self.planned = {}
+
+    @property
+    def spent(self) -> float:
+        return sum(sum(durations) for durations in self.durations.values())
+
+    def intervals(self, point: PointKey) -> typing.Dict[str, ConfidenceInterval]:
+        return {
+            metric: confidenceInterval(
+                [average[metric][0] for average in self.averages[point]], self.confidence)
+            for metric in self.metrics
+        }
+
+    def weights(self) -> typing.Dict[PointKey, float]:
+        '''
+        Weights points by the absolute slopes of the metrics relative to their average slope,
+        a point with an average slope gets twice the weight of a point on a plateau.
+        :return: weight of every point.
+        '''
+        points = list(self.averages)
+        weights = np.ones(len(points))
+        if self.positions is None or len(points) < 2:
+            return dict(zip(points, weights.tolist()))
+        order = sorted(range(len(points)), key=lambda i: self.positions[points[i]])
+        positions = np.array([self.positions[points[i]] for i in order], dtype=float)
+        if len(np.unique(positions)) < len(positions):
+            return dict(zip(points, weights.tolist()))
+        for metric in self.metrics:
+            means = np.array(
+                [np.nanmean([a[metric][0] for a in self.averages[points[i]]]) for i in order])
+            slopes = np.nan_to_num(np.abs(np.gradient(means, positions)))
+            if slopes.mean() > 0:
+                weights[order] += slopes / slopes.mean() / len(self.metrics)
+        return dict(zip(points, weights.tolist()))
+
+    def allocate(self) -> typing.Dict[PointKey, int]:
+        '''
+        Divides the budget between the points after the pilot round.
+        :return: total number of replications of every point, at least the pilot ones.
+        '''
+        points = list(self.averages)
+        # Deviations relative to the overall mean keep metrics of different scales comparable.
+        deviations = np.zeros(len(points))
+        for metric in self.metrics:
+            values = [[a[metric][0] for a in self.averages[point]] for point in points]
+            scale = np.nanmean([abs(np.nanmean(v)) for v in values]) or 1.
+            deviations += np.nan_to_num([np.nanstd(v, ddof=1) / scale for v in values])
+        weights = self.weights()
+        scores = [weights[point] * deviation for point, deviation in zip(points, deviations)]
+        costs = [max(float(np.mean(self.durations[point])), MIN_COST) for point in points]
+        counts = allocateReplications(scores, costs, self.budget, minimum=self.pilot)
+        return dict(zip(points, counts))
+
+    def run(self, runner: Runner, make_task: TaskFactory,
+            points: typing.Iterable[PointKey]) -> typing.Iterator[typing.Tuple[Task, RunResult]]:
+        '''
+        Runs the pilot round of all the points and the replications the budget allows.
+        :param runner: simulation runner.
+        :param make_task: creates the task of a replication given point and index.
+        :param points: keys of the points.
+        :return: tasks together with their results.
+        '''
+        for point in points:
+            self.averages[point] = []
+            self.durations[point] = []
+            self.planned[point] = self.pilot
+        yield from self._runRound(
+            runner, make_task, {point: (0, self.pilot) for point in self.averages})
+        self.planned = self.allocate()
+        yield from self._runRound(runner, make_task, {
+            point: (self.pilot, count) for point, count in self.planned.items()})
+
+    def _runRound(self, runner: Runner, make_task: TaskFactory,
+                  replicas: typing.Dict[PointKey, typing.Tuple[int, int]]
+                  ) -> typing.Iterator[typing.Tuple[Task, RunResult]]:
+        tasks = []
+        for point, (begin, end) in replicas.items():
+            for i in range(begin, end):
+                task = make_task(point, i)
+                task.point = point
+                tasks.append(task)
+        for task, result in runner.run(tasks):
+            point = task.point
+            self.averages[point].append(result.average)
+            self.durations[point].append(result.duration)
+            yield task, result
+
+    def precision(self) -> float:
+        '''
+        :return: average half width of the intervals relative to the mean.
+        '''
+        widths = [interval.relativeHalfWidth() for point in self.averages
+                  for interval in self.intervals(point).values()]
+        return float(np.mean(widths))
+
+    def summary(self, name: str = 'point') -> pd.DataFrame:
+        '''
+        Returns the number of replications, costs and the final confidence intervals.
+        :param name: name of the point column.
+        :return: one row for every point.
+        '''
+        weights = self.weights()
+        rows = []
+        for point in self.averages:
+            row = {name: point, 'replications': len(self.averages[point]),
+                   'cost': float(np.mean(self.durations[point])), 'weight': weights[point]}
+            for metric, interval in self.intervals(point).items():
+                row[f'{metric}_mean'] = interval.mean
+                row[f'{metric}_half_width'] = interval.half_width
+            rows.append(row)
+        return pd.DataFrame(rows)
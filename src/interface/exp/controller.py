@@ -1,8 +1,68 @@
+import copy
 import os
 import datetime
 import typing
 
-from charts.informer import informer
+import click
+import pandas as pd
+
+from charts.informer import informRuns, informer
+from interface.estimate import CostModel, Estimate
+from interface.exp.adaptive import AdaptiveReplication
+from interface.exp.budget import BudgetReplication
+from interface.exp.runner import Runner, Task, duplicateRuns, openResultCache
+from interface.run import makeTravelQuantiles
+from interface.scenario import Scenario
+from simulator.statistics.confidence import pairedInterval
+from simulator.statistics.traveltime import TravelTimes
+from util.rand import childSeed, newSeed
+
+def makeExperimentDir(suffix: str = '') -> str:
+    '''
+    Creates the output directory of an experiment, named after the current time.
+    :param suffix: directory name suffix.
+    :return: directory path.
+    '''
+    if not os.path.isdir('./out'):
+        os.mkdir('./out')
+
+    date = datetime.datetime.now()
+    name = str(date.date()) + '__' + str(datetime.time(date.hour, date.minute)).replace(':', '-')
+    dir_name = os.path.join('out/', name + suffix)
+    # Experiments started within the same minute get numbered directories.
+    count = 1
+    while os.path.exists('./' + dir_name):
+        count += 1
+        dir_name = os.path.join('out/', f'{name}{suffix}__{count}')
+    os.mkdir('./' + dir_name)
+    return dir_name
+
+
+def pairedDifferences(averages: typing.Dict[typing.Tuple[float, int], pd.DataFrame],
+                      metrics: typing.List[str], confidence: float) -> pd.DataFrame:
+    '''
+    Estimates the differences of average metrics to the lowest penetration rate, pairing the
+    runs of the same replica.
+    :param averages: average statistics of the runs by penetration rate and replica.
+    :param metrics: names of the average statistics columns to compare.
+    :param confidence: confidence level of the intervals.
+    :return: mean differences with the half widths of their confidence intervals.
+    '''
+    penetrations = sorted({p for p, _ in averages})
+    baseline = penetrations[0]
+    rows = []
+    for p in penetrations[1:]:
+        replicas = sorted(i for q, i in averages if q == p and (baseline, i) in averages)
+        for metric in metrics:
+            interval = pairedInterval(
+                [averages[p, i][metric][0] for i in replicas],
+                [averages[baseline, i][metric][0] for i in replicas], confidence)
+            rows.append(dict(penetration=p, baseline=baseline, metric=metric,
+                             difference=interval.mean, half_width=interval.half_width,
+                             count=interval.count))
+    return pd.DataFrame(
+        rows, columns=['penetration', 'baseline', 'metric', 'difference', 'half_width', 'count'])
+
 
 def experiment(sim_info, **kwargs):
 
@@ -10,52 +70,155 @@ def experiment(sim_info, **kwargs):
     num: int = kwargs['num']
     steps: int = kwargs['steps']
     skip: int = kwargs['skip']
+    warm_cache: str = kwargs['warm_cache']
+    jobs: int = kwargs['jobs']
+    cache = None
+    if not kwargs['no_cache']:
+        cache = openResultCache(kwargs['cache'], max_size=kwargs['cache_size'],
+                                max_age=kwargs['cache_age'])
+    adaptive: bool = kwargs['adaptive']
+    budget: typing.Optional[float] = kwargs['budget']
+    metrics: list = kwargs['metrics']
+    crn: bool = kwargs['crn']
+    run_length = dict(auto_skip=kwargs['auto_skip'], stop_precision=kwargs['stop_precision'])
+    if adaptive and not 2 <= kwargs['min_num'] <= kwargs['max_num']:
+        raise click.BadParameter('expected 2 <= --min-num <= --max-num', param_hint='--min-num')
+    if budget is not None:
+        if adaptive:
+            raise click.UsageError('--budget cannot be combined with --adaptive')
+        if budget <= 0 or kwargs['pilot'] < 2:
+            raise click.BadParameter('expected positive --budget and --pilot of at least 2',
+                                     param_hint='--budget')
 
+    scenario = Scenario(**sim_info)
+    emergency: int = scenario.emergency
+    # Every run gets its own seed derived from the master seed, recorded to repeat the experiment.
+    if scenario.seed is None:
+        # Fresh seeds never match the cached runs, which would only fill the cache.
+        if cache is not None:
+            click.secho('Result cache requires --seed, ignoring', fg='yellow')
+            cache = None
+        scenario = scenario.replace(seed=newSeed())
+        sim_info["seed"] = scenario.seed
+    scenario = scenario.replace(crn=crn)
     del sim_info["penetration"]
-    length: int = sim_info['length']
-    lanes: int = sim_info['lanes']
-    emergency_lane: int = sim_info["emergency_lane"]
-    max_speed: int = sim_info['max_speed']
-    density: float = sim_info['density']
-    dispatch: int = sim_info['dispatch']
-    car_length: int = sim_info['car_length']
-    emergency: int = sim_info['emergency']
-    pslow: float = sim_info['pslow']
-    pchange: float = sim_info['pchange']
-    symmetry: str = "" if not sim_info["symmetry"] else "--symmetry"
-    limit: int = sim_info['limit']
-
-    if not sim_info["obstacles"]:
-        obstacles: str = ""
+    sim_info["obstacles"] = [f'{lane}:{begin}-{end}' for lane, begin, end in sim_info["obstacles"]]
+
+    def makeTask(p: float, i: int) -> Task:
+        # Runs are keyed by the penetration rate in parts per million and the replica number,
+        # with common random numbers replicas of all the rates share their seed.
+        if crn:
+            seed = childSeed(scenario.seed, i)
+        else:
+            seed = childSeed(scenario.seed, round(p * 1_000_000), i)
+        return Task(scenario=scenario.replace(penetration=p, seed=seed), steps=steps, skip=skip,
+                    prefix=f'p{int(p * 100):02d}__{i:02d}', replica=i, **run_length)
+
+    replicas = kwargs['max_num'] if adaptive else kwargs['pilot'] if budget is not None else num
+    for group in duplicateRuns([makeTask(p, i) for p in penetration_list for i in range(replicas)]):
+        runs = ', '.join(f'{task.scenario.penetration}/{task.replica}' for task in group)
+        click.secho(f'Runs (penetration/replica) {runs} would give identical results', fg='yellow')
+
+    if kwargs['dry_run']:
+        click.secho('Calibrating the cost model', fg='blue')
+        model = CostModel.calibrate(scenario, Runner.DEFAULT_STATISTICS)
+        if budget is not None:
+            # The budget is spread evenly over the rates, at least the pilot runs.
+            cost = sum(model.predict(scenario.replace(penetration=p), steps).seconds
+                       for p in penetration_list)
+            replicas = max(kwargs['pilot'], int(budget / cost))
+        runs = [model.predict(scenario.replace(penetration=p), steps)
+                for p in penetration_list for _ in range(replicas)]
+        click.echo(Estimate(runs, jobs=jobs))
+        return
+
+    dir_name = makeExperimentDir()
+
+    if adaptive:
+        informer(dir_name, steps = steps, skip = skip, penetration = penetration_list,
+                 warm_cache = warm_cache, metrics = metrics, precision = kwargs['precision'],
+                 confidence = kwargs['confidence'], min_num = kwargs['min_num'],
+                 max_num = kwargs['max_num'], crn = crn, **run_length, **sim_info)
+    elif budget is not None:
+        informer(dir_name, steps = steps, skip = skip, penetration = penetration_list,
+                 warm_cache = warm_cache, metrics = metrics, budget = budget,
+                 pilot = kwargs['pilot'], confidence = kwargs['confidence'], crn = crn,
+                 **run_length, **sim_info)
     else:
-        sim_info["obstacles"] = [f'{lane}:{begin}-{end}' for lane, begin, end in sim_info["obstacles"]]
-        obstacles: str = f'--obstacles {", ".join(sim_info["obstacles"])}'
-    seed: typing.Optional[int] = sim_info['seed'] if sim_info['seed'] is not None else ""
+        informer(dir_name, steps = steps, skip = skip, num = num, penetration = penetration_list,
+                 warm_cache = warm_cache, crn = crn, **run_length, **sim_info)
 
+    seeds, averages = [], {}
+    # Travel time distributions of all the runs of every penetration rate.
+    travel_times: typing.Dict[float, typing.Dict[str, TravelTimes]] = {}
+    with Runner(jobs=jobs, warm_cache=warm_cache, cache=cache, queue=kwargs['queue']) as runner:
+        if adaptive:
+            replication = AdaptiveReplication(
+                metrics=metrics, precision=kwargs['precision'], confidence=kwargs['confidence'],
+                min_num=kwargs['min_num'], max_num=kwargs['max_num'])
+            # The number of runs is not known upfront, show at most the maximal number.
+            length = len(penetration_list) * kwargs['max_num']
+            results = replication.run(runner, makeTask, penetration_list)
+        elif budget is not None:
+            # Steep parts of the penetration curves get more replications.
+            replication = BudgetReplication(
+                metrics=metrics, budget=budget, pilot=kwargs['pilot'],
+                confidence=kwargs['confidence'], positions={p: p for p in penetration_list})
+            length = len(penetration_list) * kwargs['pilot']
+            results = replication.run(runner, makeTask, penetration_list)
+        else:
+            length = len(penetration_list) * num
+            results = runner.run([makeTask(p, i) for p in penetration_list for i in range(num)])
+        with click.progressbar(length=length, label='Running simulations') as bar:
+            for task, result in results:
+                result.output(output=dir_name, prefix=task.prefix, no_charts=True, quiet=True)
+                seeds.append(dict(prefix=task.prefix, penetration=task.scenario.penetration,
+                                  replica=task.replica, seed=task.scenario.seed))
+                averages[task.scenario.penetration, task.replica] = result.average
+                if result.travel_times is not None:
+                    merged = travel_times.setdefault(task.scenario.penetration, {})
+                    for name, distribution in result.travel_times.items():
+                        if name in merged:
+                            merged[name].merge(distribution)
+                        else:
+                            merged[name] = copy.deepcopy(distribution)
+                if budget is not None:
+                    # The number of runs is known once the pilot round is over.
+                    bar.length = max(bar.length, sum(replication.planned.values()))
+                bar.update(1)
 
-    if not os.path.isdir('./out'):
-        os.mkdir('./out')
+    seeds = pd.DataFrame(seeds, columns=['prefix', 'penetration', 'replica', 'seed'])
+    seeds.sort_values(['penetration', 'replica']).to_csv(
+        os.path.join(dir_name, 'seeds.csv'), index=False)
+    informRuns(dir_name, dict(zip(seeds['prefix'], seeds['seed'])))
 
-    date = datetime.datetime.now()
-    name = str(date.date()) + '__' + str(datetime.time(date.hour, date.minute)).replace(':', '-')
-    dir_name = os.path.join('out/', name)
-    os.mkdir('./' + dir_name)
+    if crn and len(penetration_list) > 1:
+        paired = pairedDifferences(averages, metrics, kwargs['confidence'])
+        paired.to_csv(os.path.join(dir_name, 'paired.csv'), index=False)
+        click.echo(paired.to_string(index=False))
 
-    informer(dir_name, steps = steps, skip = skip, num = num, penetration = penetration_list, **sim_info)
+    if adaptive:
+        summary = replication.summary()
+        summary.to_csv(os.path.join(dir_name, 'replications.csv'), index=False)
+        click.echo(summary.to_string(index=False))
 
+    if budget is not None:
+        summary = replication.summary(name='penetration')
+        summary.to_csv(os.path.join(dir_name, 'replications.csv'), index=False)
+        click.echo(summary.to_string(index=False))
+        click.secho(f'Used {replication.spent:.1f} of {budget:.1f} s of processor time, '
+                    f'average relative half width {replication.precision():.2%}', fg='blue')
+
+    # Aggregate the runs of every penetration rate.
     for p in penetration_list:
         penetration = int(p * 100)
         prefix = f'p{penetration:02d}'
-        for i in range(num):
-            os.system(f'python src/main.py --penetration {p} --length {length} --lanes {lanes} --emergency-lane {emergency_lane} '
-                      f'--max-speed {max_speed} {obstacles} --density {density} --dispatch {dispatch} '
-                      f'--car-length {car_length} --emergency {emergency} --pslow {pslow} --pchange {pchange} '
-                      f'{symmetry} --limit {limit} {seed} cli --steps {steps} --skip {skip} '
-                      f'-o {dir_name} --prefix="{prefix}__{i:02d}" --no-charts --travel --heatmap')
-
         os.system(f'python src/charts/heatmap.py -o {dir_name}  -p {prefix}.traffic -s 5 {dir_name}/{prefix}__*_traffic.csv')
         os.system(f'python src/charts/travel.py -o {dir_name} -p {prefix}.travel'
                   f' {dir_name}/{prefix}__*_travel.csv')
+        if p in travel_times:
+            makeTravelQuantiles(travel_times[p]).to_csv(
+                os.path.join(dir_name, f'{prefix}.travel_quantiles.csv'), index=False)
         os.system(f'python src/charts/average.py -o {dir_name} -p {prefix}.average'
                   f' -x {penetration} {dir_name}/{prefix}__*_average.csv')
 
@@ -0,0 +1,184 @@
+import concurrent.futures
+import multiprocessing
+import os
+import pickle
+import typing
+
+from interface.run import RunResult, run
+from interface.scenario import Scenario
+from simulator.statistics.collector import Statistics
+from simulator.version import codeVersion
+from util.diskcache import DiskCache, hashKey
+from util.workqueue import QueueExecutor, WorkQueue, work
+
+
+class Task:
+    '''
+    Single simulation run of an experiment.
+    '''
+    scenario: Scenario
+    steps: int
+    skip: int
+    prefix: str
+    replica: int
+    auto_skip: bool
+    stop_precision: typing.Optional[float]
+    # Point of an experiment design the run replicates, not part of the results key.
+    point: typing.Optional[typing.Hashable]
+
+    def __init__(self, scenario: Scenario, steps: int, skip: int, prefix: str, replica: int = 0,
+                 auto_skip: bool = False, stop_precision: typing.Optional[float] = None,
+                 point: typing.Optional[typing.Hashable] = None):
+        self.scenario = scenario
+        self.steps = steps
+        self.skip = skip
+        self.prefix = prefix
+        self.replica = replica
+        self.auto_skip = auto_skip
+        self.stop_precision = stop_precision
+        self.point = point
+
+    def runLength(self) -> typing.Dict[str, typing.Any]:
+        return dict(steps=self.steps, skip=self.skip, auto_skip=self.auto_skip,
+                    stop_precision=self.stop_precision)
+
+    def key(self, statistics: Statistics) -> str:
+        '''
+        Returns the key of the task results in the result cache.
+        :param statistics: statistics gathered by the run.
+        :return: cache key.
+        '''
+        return hashKey(dict(
+            scenario=self.scenario.toDict(), statistics=statistics.value, replica=self.replica,
+            version=codeVersion(), **self.runLength()))
+
+
+def openResultCache(directory: str, max_size: int = 1024, max_age: float = 30.) -> DiskCache:
+    '''
+    Opens the result cache.
+    :param directory: cache directory.
+    :param max_size: maximum cache size (MB).
+    :param max_age: evict entries unused for n days.
+    :return: result cache.
+    '''
+    return DiskCache(directory, max_size=max_size * 2 ** 20, max_age=max_age * 86400)
+
+
+def duplicateRuns(tasks: typing.Iterable[Task]) -> typing.List[typing.List[Task]]:
+    '''
+    Finds runs giving identical results, seeded runs of the same scenario.
+    :param tasks: simulation runs.
+    :return: groups of identical runs.
+    '''
+    groups: typing.Dict[str, typing.List[Task]] = {}
+    for task in tasks:
+        if task.scenario.seed is None:
+            continue
+        key = hashKey(dict(scenario=task.scenario.toDict(), **task.runLength()))
+        groups.setdefault(key, []).append(task)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def _runTask(task: Task, statistics: Statistics, warm_cache: typing.Optional[str]) -> RunResult:
+    # Replicas of a scenario are separate calls, the queue executor runs identical calls once.
+    return run(task.scenario, statistics=statistics, warm_cache=warm_cache, **task.runLength())
+
+
+class Runner:
+    '''
+    Runs simulations in a pool of worker processes, which are reused between runs and
+    batches of runs. Results of tasks found in the result cache are returned without
+    running them again. With a queue directory the simulations are distributed through
+    a shared work queue instead, to local workers and to workers started on other hosts.
+    '''
+    jobs: typing.Optional[int]
+    statistics: Statistics
+    warm_cache: typing.Optional[str]
+    cache: typing.Optional[DiskCache]
+    queue: typing.Optional[str]
+    _executor: typing.Optional[concurrent.futures.Executor]
+
+    DEFAULT_STATISTICS = Statistics.HEAT_MAP | Statistics.TRAVEL_TIME
+
+    def __init__(self, jobs: typing.Optional[int] = None,
+                 statistics: Statistics = DEFAULT_STATISTICS,
+                 warm_cache: typing.Optional[str] = None, cache: typing.Optional[DiskCache] = None,
+                 queue: typing.Optional[str] = None):
+        '''
+        :param jobs: number of local worker processes, defaults to the number of processors.
+        :param statistics: statistics to gather.
+        :param warm_cache: warm-up cache directory.
+        :param cache: result cache, new results are stored in it.
+        :param queue: shared work queue directory.
+        '''
+        self.jobs = jobs
+        self.statistics = statistics
+        self.warm_cache = warm_cache
+        self.cache = cache
+        self.queue = queue
+        self._executor = None
+
+    def __enter__(self) -> 'Runner':
+        return self
+
+    def __exit__(self, *args) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _makeExecutor(self) -> concurrent.futures.Executor:
+        if self.queue is None:
+            return concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs)
+        jobs = self.jobs if self.jobs is not None else os.cpu_count() or 1
+        # Results of older code in a reused queue directory are not shared.
+        return QueueExecutor(WorkQueue(self.queue), local_workers=jobs, namespace=codeVersion())
+
+    def run(self, tasks: typing.Iterable[Task]) -> typing.Iterator[typing.Tuple[Task, RunResult]]:
+        '''
+        Runs a batch of simulations.
+        :param tasks: simulation runs.
+        :return: tasks together with their results, cached ones first, then in order of completion.
+        '''
+        pending = []
+        for task in tasks:
+            data = self.cache.get(task.key(self.statistics)) if self.cache is not None else None
+            if data is not None:
+                yield task, pickle.loads(data)
+            else:
+                pending.append(task)
+        if not pending:
+            return
+
+        if self._executor is None:
+            self._executor = self._makeExecutor()
+        futures = {
+            self._executor.submit(
+                _runTask, task, statistics=self.statistics, warm_cache=self.warm_cache): task
+            for task in pending
+        }
+        for future in concurrent.futures.as_completed(futures):
+            task, result = futures[future], future.result()
+            if self.cache is not None:
+                data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+                self.cache.put(task.key(self.statistics), data)
+            yield task, result
+
+
+def runWorkers(queue: str, jobs: int, exit_when_idle: bool = False) -> None:
+    '''
+    Runs simulations submitted to a shared work queue by runners on any host.
+    :param queue: shared work queue directory.
+    :param jobs: number of worker processes.
+    :param exit_when_idle: stop once the queue has no tasks left.
+    :return: None.
+    '''
+    workers = [
+        multiprocessing.Process(
+            target=work, args=(WorkQueue(queue),),
+            kwargs=dict(exit_when_idle=exit_when_idle))
+        for _ in range(jobs)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
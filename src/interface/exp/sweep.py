@@ -0,0 +1,208 @@
+import os
+import random
+import typing
+
+import click
+import pandas as pd
+
+from charts.informer import informer
+from interface.exp.budget import BudgetReplication
+from interface.exp.controller import makeExperimentDir
+from interface.exp.runner import Runner, Task, duplicateRuns, openResultCache
+from interface.obstacle import ObstacleParamType
+from interface.scenario import Scenario
+from simulator.statistics.collector import Statistics
+from util.design import Point, gridDesign, latinHypercubeDesign, listDesign
+from util.rand import childSeed, newSeed
+
+SweepParamValue = typing.Tuple[str, str]
+
+# Types of the scenario parameters which can be swept.
+PARAM_TYPES = {name: type(value) for name, value in Scenario().toDict().items()}
+PARAM_TYPES['seed'] = int
+
+
+class SweepParamType(click.ParamType):
+    name = 'sweep_param'
+
+    def convert(self, value: typing.Union[str, tuple], param: click.Parameter,
+                ctx: click.Context) -> SweepParamValue:
+        if isinstance(value, tuple):
+            return value
+        tmp = value.split('=', 1)
+        if len(tmp) != 2:
+            self.fail(
+                f'expected parameter to be of format NAME=VALUES, got "{value}" instead',
+                param,
+                ctx,
+            )
+        name, levels = tmp
+        name = name.strip().lstrip('-').replace('-', '_')
+        if name not in PARAM_TYPES:
+            self.fail(
+                f'expected one of {", ".join(sorted(PARAM_TYPES))}, got unknown parameter "{name}"',
+                param,
+                ctx,
+            )
+        return name, levels
+
+
+def parseLevel(name: str, value: str) -> typing.Any:
+    '''
+    Converts a single level of a parameter, obstacle layouts are lists of obstacles
+    divided by a plus sign.
+    :param name: parameter name.
+    :param value: parameter level.
+    :return: converted level.
+    '''
+    param_type = PARAM_TYPES[name]
+    value = value.strip()
+    if param_type is list:
+        obstacle = ObstacleParamType()
+        return [obstacle.convert(item, None, None) for item in value.split('+') if item.strip()]
+    if param_type is bool:
+        return click.BOOL.convert(value, None, None)
+    try:
+        return param_type(value)
+    except ValueError:
+        raise click.BadParameter(
+            f'expected {param_type.__name__} levels of {name}, got "{value}"', param_hint='--param')
+
+
+def formatLevel(name: str, value: typing.Any) -> typing.Any:
+    if PARAM_TYPES[name] is list:
+        return '+'.join(f'{lane}:{begin}-{end}' for lane, begin, end in value)
+    return value
+
+
+def makeDesign(params: typing.Sequence[SweepParamValue], design: str, samples: int,
+               rng: random.Random) -> typing.List[Point]:
+    '''
+    Creates the points of a sweep.
+    :param params: swept parameters with their levels, divided by a comma, or LOW:HIGH ranges
+        for Latin hypercube designs.
+    :param design: grid, lhs or list.
+    :param samples: number of points of a Latin hypercube design.
+    :param rng: random number generator of a Latin hypercube design.
+    :return: design points.
+    '''
+    names = [name for name, _ in params]
+    if len(set(names)) != len(names):
+        raise click.BadParameter('expected every parameter at most once', param_hint='--param')
+    if design == 'lhs':
+        ranges = {}
+        for name, levels in params:
+            if PARAM_TYPES[name] not in (int, float):
+                raise click.BadParameter(
+                    f'{name} cannot be sampled from a range', param_hint='--param')
+            try:
+                low, high = map(float, levels.split(':'))
+            except ValueError:
+                raise click.BadParameter(
+                    f'expected LOW:HIGH range of {name}, got "{levels}"', param_hint='--param')
+            ranges[name] = (low, high)
+        points = latinHypercubeDesign(ranges, samples=samples, rng=rng)
+        for point in points:
+            for name in point:
+                if PARAM_TYPES[name] is int:
+                    point[name] = int(round(point[name]))
+        return points
+
+    levels = {name: [parseLevel(name, level) for level in values.split(',')]
+              for name, values in params}
+    if design == 'grid':
+        return gridDesign(levels)
+    try:
+        return listDesign(levels)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--param')
+
+
+def sweep(sim_info, **kwargs):
+    params: typing.List[SweepParamValue] = kwargs['param']
+    num: int = kwargs['num']
+    steps: int = kwargs['steps']
+    skip: int = kwargs['skip']
+    warm_cache: str = kwargs['warm_cache']
+    budget: typing.Optional[float] = kwargs['budget']
+    if budget is not None and (budget <= 0 or kwargs['pilot'] < 2):
+        raise click.BadParameter('expected positive --budget and --pilot of at least 2',
+                                 param_hint='--budget')
+    cache = None
+    if not kwargs['no_cache']:
+        cache = openResultCache(kwargs['cache'], max_size=kwargs['cache_size'],
+                                max_age=kwargs['cache_age'])
+
+    scenario = Scenario(**sim_info)
+    # Every run gets its own seed derived from the master seed, recorded to repeat the sweep.
+    if scenario.seed is None:
+        # Fresh seeds never match the cached runs, which would only fill the cache.
+        if cache is not None:
+            click.secho('Result cache requires --seed, ignoring', fg='yellow')
+            cache = None
+        scenario = scenario.replace(seed=newSeed())
+        sim_info['seed'] = scenario.seed
+    # Latin hypercube samples are reproducible for seeded simulations.
+    points = makeDesign(params, kwargs['design'], kwargs['samples'], random.Random(scenario.seed))
+    sim_info['obstacles'] = formatLevel('obstacles', sim_info['obstacles'])
+
+    dir_name = makeExperimentDir('__sweep')
+    replication = dict(num=num) if budget is None else dict(
+        budget=budget, pilot=kwargs['pilot'], metrics=kwargs['metrics'],
+        confidence=kwargs['confidence'])
+    informer(dir_name, steps=steps, skip=skip, design=kwargs['design'],
+             sweep=' '.join(f'{name}={levels}' for name, levels in params),
+             points=len(points), warm_cache=warm_cache, **replication, **sim_info)
+
+    def makeTask(j: int, i: int) -> Task:
+        # Runs are keyed by the point and the replica number.
+        point = scenario.replace(**points[j])
+        return Task(scenario=point.replace(seed=childSeed(point.seed, j, i)), steps=steps,
+                    skip=skip, prefix=f'{j:03d}__{i:02d}', replica=i, point=j)
+
+    replicas = kwargs['pilot'] if budget is not None else num
+    for group in duplicateRuns([makeTask(j, i) for j in range(len(points))
+                                for i in range(replicas)]):
+        runs = ', '.join(f'{task.point}/{task.replica}' for task in group)
+        click.secho(f'Runs (point/replica) {runs} would give identical results', fg='yellow')
+
+    rows = []
+    runner = Runner(
+        jobs=kwargs['jobs'], statistics=Statistics.NONE, warm_cache=warm_cache, cache=cache,
+        queue=kwargs['queue'])
+    with runner:
+        if budget is not None:
+            # Slopes are only defined along a single numeric parameter.
+            names = [name for name, _ in params]
+            positions = None
+            if len(names) == 1 and PARAM_TYPES[names[0]] in (int, float):
+                positions = {j: point[names[0]] for j, point in enumerate(points)}
+            budgeted = BudgetReplication(
+                metrics=kwargs['metrics'], budget=budget, pilot=kwargs['pilot'],
+                confidence=kwargs['confidence'], positions=positions)
+            length = len(points) * kwargs['pilot']
+            results = budgeted.run(runner, makeTask, range(len(points)))
+        else:
+            length = len(points) * num
+            results = runner.run([makeTask(j, i) for j in range(len(points)) for i in range(num)])
+        with click.progressbar(length=length, label='Running simulations') as bar:
+            for task, result in results:
+                j = task.point
+                row = dict(point=j, replica=task.replica)
+                row.update({name: formatLevel(name, value) for name, value in points[j].items()})
+                row.update(result.average.iloc[0].to_dict())
+                rows.append(row)
+                if budget is not None:
+                    # The number of runs is known once the pilot round is over.
+                    bar.length = max(bar.length, sum(budgeted.planned.values()))
+                bar.update(1)
+
+    data = pd.DataFrame(rows).sort_values(['point', 'replica'])
+    data.to_csv(os.path.join(dir_name, 'sweep.csv'), index=False)
+    click.secho(f'Saved results of {len(points)} points to {dir_name}/sweep.csv', fg='blue')
+    if budget is not None:
+        summary = budgeted.summary()
+        summary.to_csv(os.path.join(dir_name, 'replications.csv'), index=False)
+        click.echo(summary.to_string(index=False))
+        click.secho(f'Used {budgeted.spent:.1f} of {budget:.1f} s of processor time, '
+                    f'average relative half width {budgeted.precision():.2%}', fg='blue')
@@ -1,6 +1,8 @@
 import click
 import typing
 
+from simulator.statistics.tracker import AVERAGE_DATA_ORDER
+
 PenetrationListValue = typing.List[list]
 
 
@@ -37,4 +39,26 @@ class PenListParamType(click.ParamType):
             f'Try: typing without any blank spaces',
             param,
             ctx,
-        )
\ No newline at end of file
+        )
+
+
+MetricListValue = typing.List[str]
+
+
+class MetricListParamType(click.ParamType):
+    name = 'metric_list'
+
+    def convert(self, value: typing.Union[str, list], param: click.Parameter,
+                ctx: click.Context) -> MetricListValue:
+        if isinstance(value, list):
+            return value
+        metrics = [metric.strip() for metric in value.split(',') if metric.strip()]
+        for metric in metrics:
+            if metric not in AVERAGE_DATA_ORDER:
+                self.fail(
+                    f'expected average statistics names divided by a comma, f.e. '
+                    f'velocity_all,throughput_all, got unknown "{metric}"',
+                    param,
+                    ctx,
+                )
+        return metrics
@@ -0,0 +1,262 @@
+import contextlib
+import os
+import time
+import typing
+
+import click
+import numpy as np
+import pandas as pd
+
+from charts.heatmap import HeatMap, HeatMapData
+from charts.timeseries import TimeSeriesChart
+from charts.travel import TravelHistogram
+from charts.velocity import VelocityChart, VelocityData
+from interface.scenario import Scenario
+from simulator.statistics.collector import Collector, Statistics
+from simulator.statistics.steadystate import SteadyStateMonitor
+from simulator.statistics.timeseries import TimeSeries
+from simulator.statistics.tracker import Tracker
+from simulator.statistics.traveltime import TravelTimes
+from simulator.version import codeVersion
+from simulator.warmup import runUntilSettled, warmUp
+from util.diskcache import DiskCache, hashKey
+
+
+# Names of the travel time distributions of the collector in the histograms.
+TRAVEL_TYPES = ('All', 'Autonomous', 'Conventional', 'Emergency')
+
+
+class RunResult:
+    '''
+    Statistics gathered by a single simulation run.
+    '''
+    statistics: Statistics
+    average: pd.DataFrame
+    throughput: typing.Optional[HeatMapData]
+    heat_map: typing.Optional[HeatMapData]
+    velocity: typing.Optional[typing.Dict[str, VelocityData]]
+    travel: typing.Optional[pd.DataFrame]
+    travel_times: typing.Optional[typing.Dict[str, TravelTimes]]
+    # Processor time of the run in seconds.
+    duration: float = 0.
+    # Number of cells in a bin of the cell statistics.
+    bin_width: int = 1
+    # Periods of the per-step metrics, when recorded.
+    timeseries: typing.Optional[pd.DataFrame] = None
+
+    def __init__(self, statistics: Statistics, average: pd.DataFrame,
+                 throughput: typing.Optional[HeatMapData] = None,
+                 heat_map: typing.Optional[HeatMapData] = None,
+                 velocity: typing.Optional[typing.Dict[str, VelocityData]] = None,
+                 travel: typing.Optional[pd.DataFrame] = None,
+                 travel_times: typing.Optional[typing.Dict[str, TravelTimes]] = None):
+        self.statistics = statistics
+        self.average = average
+        self.throughput = throughput
+        self.heat_map = heat_map
+        self.velocity = velocity
+        self.travel = travel
+        self.travel_times = travel_times
+
+    @classmethod
+    def collect(cls, collector: Collector, tracker: Tracker,
+                timeseries: typing.Optional[TimeSeries] = None) -> 'RunResult':
+        '''
+        Gathers the results from the statistics hooks after a run.
+        :param collector: collector used in the run.
+        :param tracker: tracker used in the run.
+        :param timeseries: time series recorded in the run, if any.
+        :return: run results.
+        '''
+        statistics = collector.statistics
+        result = cls(statistics=statistics, average=tracker.getAverageData())
+        result.bin_width = collector.bin_width
+        if statistics & Statistics.THROUGHPUT:
+            result.throughput = collector.getThrougput()
+        if statistics & Statistics.HEAT_MAP:
+            result.heat_map = collector.getHeatMap()
+        if statistics & Statistics.VELOCITY:
+            result.velocity = collector.getVelocity()
+        if statistics & Statistics.TRAVEL_TIME:
+            result.travel_times = dict(zip(TRAVEL_TYPES, collector.getTravelTimes()))
+            result.travel = makeTravelData(result.travel_times)
+        if timeseries is not None:
+            result.timeseries = timeseries.getData()
+        return result
+
+    def addRunLength(self, warmup: int, steps: int) -> None:
+        '''
+        Reports the length of a run skipping the steps until the traffic settled or with a
+        precision stop.
+        :param warmup: number of steps before gathering statistics.
+        :param steps: number of steps statistics were gathered for.
+        :return: None.
+        '''
+        self.average['warmup'] = warmup
+        self.average['steps'] = steps
+
+    def output(self, output: typing.Optional[str], prefix: str, no_charts: bool,
+               quiet: bool = False) -> None:
+        '''
+        Saves the results to a directory or shows them if no directory is given.
+        :param output: output directory.
+        :param prefix: output files name prefix.
+        :param no_charts: do not generate charts.
+        :param quiet: do not report progress.
+        :return: None.
+        '''
+        def report(message: str) -> None:
+            if not quiet:
+                click.secho(message, fg='blue')
+
+        if self.statistics & Statistics.THROUGHPUT:
+            report('Generating throughput charts')
+            throughput = HeatMap(data=self.throughput, title='Throughput', max_value=3,
+                                 bin_width=self.bin_width)
+            if output is not None:
+                throughput.save(path=output, prefix=f'{prefix}_throughput', only_data=no_charts)
+            else:
+                throughput.show(only_data=no_charts)
+
+        if self.statistics & Statistics.HEAT_MAP:
+            report('Generating traffic density charts')
+            heat_map = HeatMap(data=self.heat_map, title='Traffic density', max_value=1,
+                               bin_width=self.bin_width)
+            if output is not None:
+                heat_map.save(path=output, prefix=f'{prefix}_traffic', only_data=no_charts)
+            else:
+                heat_map.show(only_data=no_charts)
+
+        if self.statistics & Statistics.VELOCITY:
+            report('Generating speed charts')
+            velocity = VelocityChart(**self.velocity, bin_width=self.bin_width)
+            if output is not None:
+                velocity.save(path=output, prefix=f'{prefix}_speed', only_data=no_charts)
+            else:
+                velocity.show(only_data=no_charts)
+
+        if self.statistics & Statistics.TRAVEL_TIME:
+            report('Generating travel time histogram')
+            travel = TravelHistogram(data=self.travel)
+            quantiles = makeTravelQuantiles(self.travel_times)
+            if output is not None:
+                travel.save(path=output, prefix=prefix, only_data=no_charts)
+                quantiles.to_csv(
+                    os.path.join(output, f'{prefix}_travel_quantiles.csv'), index=False)
+            else:
+                travel.show(only_data=no_charts)
+                click.echo(quantiles.to_csv(index=False))
+
+        if self.timeseries is not None:
+            report('Generating time series charts')
+            timeseries = TimeSeriesChart(data=self.timeseries)
+            if output is not None:
+                timeseries.save(path=output, prefix=f'{prefix}_timeseries', only_data=no_charts)
+            else:
+                timeseries.show(only_data=no_charts)
+
+        report('Generating average statistics')
+        if output is not None:
+            self.average.to_csv(os.path.join(output, f'{prefix}_average.csv'), index=False)
+        else:
+            click.echo(self.average.to_csv(index=False))
+
+
+def makeTravelData(travel: typing.Dict[str, TravelTimes]) -> pd.DataFrame:
+    '''
+    Creates the travel time histogram, in percents of vehicles of each type.
+    :param travel: travel time distributions by the vehicle type names.
+    :return: histogram data.
+    '''
+    frames = []
+    for name, distribution in travel.items():
+        histogram = distribution.histogram()
+        count = histogram.sum()
+        # Runs without emergency vehicles leave them out of the chart.
+        if count == 0 and name == 'Emergency':
+            continue
+        frames.append(pd.DataFrame({
+            'x': np.arange(len(histogram)),
+            'y': histogram / count * 100 if count > 0 else np.zeros(len(histogram)),
+            'type': name,
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    # Rows of the types alternate for every travel time.
+    return df.sort_values('x', kind='mergesort', ignore_index=True)
+
+
+def makeTravelQuantiles(travel: typing.Dict[str, TravelTimes]) -> pd.DataFrame:
+    '''
+    Creates the table of the travel time quantiles.
+    :param travel: travel time distributions by the vehicle type names.
+    :return: number of vehicles and the quantiles of each type.
+    '''
+    return pd.DataFrame([dict(type=name, vehicles=len(distribution), **distribution.quantiles())
+                         for name, distribution in travel.items()])
+
+
+def warmCacheKey(scenario: Scenario, skip: int) -> str:
+    '''
+    Returns the key of a post warm-up simulator state in the warm-up cache.
+    :param scenario: simulation scenario.
+    :param skip: number of warm-up steps.
+    :return: cache key.
+    '''
+    return hashKey(dict(scenario.toDict(), skip=skip, version=codeVersion()))
+
+
+def openWarmCache(directory: str, max_size: int = 1024, max_age: float = 7.) -> DiskCache:
+    '''
+    Opens the warm-up cache.
+    :param directory: cache directory.
+    :param max_size: maximum cache size (MB).
+    :param max_age: evict entries unused for n days.
+    :return: warm-up cache.
+    '''
+    return DiskCache(directory, max_size=max_size * 2 ** 20, max_age=max_age * 86400)
+
+
+def run(scenario: Scenario, steps: int, skip: int,
+        statistics: Statistics = Statistics.HEAT_MAP | Statistics.TRAVEL_TIME,
+        warm_cache: typing.Optional[str] = None, auto_skip: bool = False,
+        stop_precision: typing.Optional[float] = None, timeseries: bool = False) -> RunResult:
+    '''
+    Runs a single simulation of a scenario.
+    :param scenario: simulation scenario.
+    :param steps: number of simulation steps to run.
+    :param skip: skip first n steps when gathering statistics.
+    :param statistics: statistics to gather.
+    :param warm_cache: warm-up cache directory, only used for scenarios with a seed.
+    :param auto_skip: skip the steps until the traffic settled instead, at most half of the steps.
+    :param stop_precision: stop once the confidence interval of the average velocity is
+        narrower than the given fraction of the mean.
+    :param timeseries: record the per-step metrics too.
+    :return: gathered statistics, with the warm-up and measured steps in the averages when
+        either auto_skip or stop_precision is used.
+    '''
+    start = time.process_time()
+    simulator = scenario.build()
+    warmup = skip
+    if auto_skip:
+        warmup = runUntilSettled(simulator, max_steps=steps // 2)
+        steps, skip = steps - warmup, 0
+    elif warm_cache is not None and scenario.seed is not None:
+        cache = openWarmCache(warm_cache)
+        simulator = warmUp(simulator, steps=skip, cache=cache, key=warmCacheKey(scenario, skip))
+        steps, skip = steps - skip, 0
+    monitor = SteadyStateMonitor(simulator=simulator) if stop_precision is not None \
+        else contextlib.nullcontext()
+    series = TimeSeries(simulator=simulator) if timeseries else None
+    with Collector(simulator=simulator, statistics=statistics, skip=skip) as collector, \
+            Tracker(simulator=simulator, buffer_size=None, skip=skip) as tracker, monitor, \
+            series if series is not None else contextlib.nullcontext():
+        for _ in range(steps):
+            simulator.step()
+            if stop_precision is not None and monitor.isCheckStep() and \
+                    monitor.isPrecise(stop_precision, start=skip):
+                break
+    result = RunResult.collect(collector, tracker, series)
+    if auto_skip or stop_precision is not None:
+        result.addRunLength(warmup, collector.steps - skip)
+    result.duration = time.process_time() - start
+    return result
@@ -0,0 +1,31 @@
+import click
+import typing
+
+from simulator.statistics.sampling import PeriodicSampling, RandomSampling, SamplingPolicy, \
+    VehicleSampling
+
+
+class SamplingParamType(click.ParamType):
+    name = 'sampling'
+
+    def convert(self, value: typing.Union[str, SamplingPolicy], param: click.Parameter,
+                ctx: click.Context) -> SamplingPolicy:
+        if isinstance(value, SamplingPolicy):
+            return value
+        kind, _, amount = value.partition(':')
+        # Random choices follow the seed of the simulation.
+        seed = ctx.parent.params.get('seed') if ctx is not None and ctx.parent else None
+        try:
+            if kind == 'every':
+                return PeriodicSampling(int(amount))
+            if kind == 'random':
+                return RandomSampling(float(amount), seed=seed)
+            if kind == 'vehicles':
+                return VehicleSampling(int(amount), seed=seed)
+        except ValueError as error:
+            self.fail(f'invalid sampling "{value}": {error}', param, ctx)
+        self.fail(
+            f'expected sampling of format every:K, random:FRACTION or vehicles:N, got "{value}"',
+            param,
+            ctx,
+        )
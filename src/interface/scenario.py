@@ -0,0 +1,105 @@
+import typing
+
+from interface.obstacle import addObstacle
+from simulator.dispatcher.emergency import EmergencyDispatcher
+from simulator.road.dense import DenseRoad
+from simulator.road.speedcontroller import SpeedController
+from simulator.simulator import Simulator
+from simulator.vehicle.autonomous import AutonomousCar
+from simulator.vehicle.conventional import Driver
+from util.rand import RandomStreams
+
+
+class Scenario:
+    '''
+    Parameters of a single simulation, mirroring the road, dispatcher and driver options
+    of the command line interface.
+    '''
+    length: int
+    lanes: int
+    emergency_lane: int
+    max_speed: int
+    obstacles: typing.List[typing.Tuple[int, int, int]]
+    density: float
+    dispatch: int
+    penetration: float
+    car_length: int
+    emergency: int
+    pslow: float
+    pchange: float
+    symmetry: bool
+    limit: int
+    seed: typing.Optional[int]
+    # Reseed the random streams at every step, for common random numbers across scenarios.
+    crn: bool
+
+    def __init__(self, length: int = 100, lanes: int = 8, emergency_lane: int = 0,
+                 max_speed: int = 5, obstacles: typing.Iterable[typing.Tuple[int, int, int]] = (),
+                 density: float = .1, dispatch: int = 6, penetration: float = .5,
+                 car_length: int = 2, emergency: int = 0, pslow: float = .2, pchange: float = .5,
+                 symmetry: bool = False, limit: int = 0, seed: typing.Optional[int] = None,
+                 crn: bool = False):
+        self.length = length
+        self.lanes = lanes
+        self.emergency_lane = emergency_lane
+        self.max_speed = max_speed
+        self.obstacles = [tuple(obstacle) for obstacle in obstacles]
+        self.density = density
+        self.dispatch = dispatch
+        self.penetration = penetration
+        self.car_length = car_length
+        self.emergency = emergency
+        self.pslow = pslow
+        self.pchange = pchange
+        self.symmetry = symmetry
+        self.limit = limit
+        self.seed = seed
+        self.crn = crn
+
+    def __eq__(self, other: 'Scenario') -> bool:
+        return self.toDict() == other.toDict()
+
+    def __repr__(self) -> str:
+        params = ', '.join(f'{key}={value!r}' for key, value in self.toDict().items())
+        return f'Scenario({params})'
+
+    def toDict(self) -> typing.Dict[str, typing.Any]:
+        return dict(self.__dict__)
+
+    def replace(self, **changes: typing.Any) -> 'Scenario':
+        '''
+        Creates a copy of the scenario with some of the parameters changed.
+        :param changes: parameters to change.
+        :return: new scenario.
+        '''
+        return Scenario(**dict(self.toDict(), **changes))
+
+    def build(self) -> Simulator:
+        '''
+        Creates a simulator for the scenario with vehicles scattered on the road.
+        Streams of random numbers of the simulator are derived from the seed of the scenario,
+        unseeded scenarios get fresh ones.
+        :return: new simulator.
+        '''
+        # Forget lanes marked by vehicles of a previous simulation run in this process.
+        AutonomousCar.updateBlockedLane(None)
+        AutonomousCar.updateEmergencyLane(None)
+        # Create a road.
+        speed_controller = SpeedController(max_speed=self.max_speed)
+        road = DenseRoad(
+            length=self.length, lanes_count=self.lanes, lane_width=1,
+            emergency_lane=self.emergency_lane, controller=speed_controller,
+            rng=RandomStreams(self.seed, synchronized=self.crn))
+        # Add obstacles.
+        for obstacle in self.obstacles:
+            addObstacle(road=road, obstacle=obstacle)
+        # Create the dispatcher.
+        driver = Driver(slow=self.pslow, change=self.pchange, symmetry=self.symmetry)
+        dispatcher = EmergencyDispatcher(
+            count=self.dispatch, road=road, penetration=self.penetration,
+            driver=driver, length=self.car_length, limit=self.limit,
+            emergency_rate=self.emergency)
+        # Create the simulator and scatter vehicles.
+        simulator = Simulator(road=road, dispatcher=dispatcher)
+        simulator.scatterVehicles(density=self.density)
+        return simulator
@@ -0,0 +1,72 @@
+import threading
+import time
+import typing
+import zlib
+
+from simulator.simulator import Hook, Simulator
+from simulator.snapshot import Snapshot
+
+
+class Checkpointer(Hook):
+    '''
+    Periodically saves the simulator state together with the given objects (e.g. statistics
+    hooks) every n steps and/or every t seconds. The state is serialized between the steps,
+    while compressing and atomically writing it to the disk happens in the background.
+    Register it after the statistics hooks, so that a checkpoint includes the whole step.
+    '''
+    path: str
+    every_steps: typing.Optional[int]
+    every_seconds: typing.Optional[float]
+    objects: typing.Dict[str, typing.Any]
+    last_steps: int
+    last_time: float
+    writer: typing.Optional[threading.Thread]
+
+    def __init__(self, simulator: Simulator, path: str, every_steps: typing.Optional[int] = None,
+                 every_seconds: typing.Optional[float] = None, **objects: typing.Any):
+        super().__init__(simulator=simulator)
+        self.path = path
+        self.every_steps = every_steps
+        self.every_seconds = every_seconds
+        self.objects = objects
+        self.last_steps = simulator.steps
+        self.last_time = time.monotonic()
+        self.writer = None
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        super().__exit__(exc_type, exc_value, exc_traceback)
+        self.wait()
+
+    def run(self) -> None:
+        steps_due = self.every_steps is not None \
+            and self.simulator.steps - self.last_steps >= self.every_steps
+        time_due = self.every_seconds is not None \
+            and time.monotonic() - self.last_time >= self.every_seconds
+        if steps_due or time_due:
+            self.save()
+
+    def save(self) -> None:
+        '''
+        Saves a checkpoint of the current state, waiting for the previous one to be written.
+        :return: None.
+        '''
+        # Pipelined hooks finish the saved steps first.
+        self.simulator.flush()
+        data = Snapshot.capture(self.simulator, **self.objects)
+        self.wait()
+        self.writer = threading.Thread(target=self._write, args=(data,), daemon=True)
+        self.writer.start()
+        self.last_steps = self.simulator.steps
+        self.last_time = time.monotonic()
+
+    def wait(self) -> None:
+        '''
+        Waits until the pending checkpoint gets written.
+        :return: None.
+        '''
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
+
+    def _write(self, data: bytes) -> None:
+        Snapshot(zlib.compress(data)).save(self.path)
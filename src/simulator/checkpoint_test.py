@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from simulator.checkpoint import Checkpointer
+from simulator.snapshot import Snapshot
+from simulator.snapshot_test import makeSimulator, trace
+
+
+class CheckpointerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'run.checkpoint')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_everySteps(self):
+        simulator = makeSimulator()
+        with Checkpointer(simulator=simulator, path=self.path, every_steps=5, extra=42):
+            trace(simulator, 4)
+            self.assertFalse(os.path.exists(self.path))
+            trace(simulator, 8)
+        self.assertNotIn('run.checkpoint.tmp', os.listdir(self.directory.name))
+        restored, objects = Snapshot.load(self.path).restoreObjects()
+        self.assertEqual(restored.steps, 10)
+        self.assertDictEqual(objects, {'extra': 42})
+        self.assertListEqual(restored.hooks, [])
+
+    @patch('time.monotonic')
+    def test_everySeconds(self, patched_time):
+        patched_time.return_value = 0.
+        simulator = makeSimulator()
+        with Checkpointer(simulator=simulator, path=self.path, every_seconds=10):
+            trace(simulator, 3)
+            self.assertFalse(os.path.exists(self.path))
+            patched_time.return_value = 10.
+            trace(simulator, 2)
+            patched_time.return_value = 15.
+            trace(simulator, 2)
+        self.assertEqual(Snapshot.load(self.path).restore().steps, 4)
+
+    def test_resume(self):
+        simulator = makeSimulator()
+        with Checkpointer(simulator=simulator, path=self.path, every_steps=10):
+            trace(simulator, 15)
+            expected = trace(simulator, 4)
+        restored = Snapshot.load(self.path).restore()
+        self.assertEqual(restored.steps, 10)
+        trace(restored, 5)
+        self.assertEqual(trace(restored, 4), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,3 @@
-import random
-
 from simulator.position import Position
 from simulator.road.road import Road
 from simulator.vehicle.vehicle import Vehicle
@@ -23,8 +21,8 @@ class Dispatcher:
         Adds vehicles to the road.
         :return: None.
         '''
-        self.remaining += random.randint(0, self.count)
-        for lane in shuffled(range(self.road.lanes_count)):
+        self.remaining += self.road.rng.arrival.randint(0, self.count)
+        for lane in shuffled(range(self.road.lanes_count), self.road.rng.arrival):
             if self.remaining <= 0:
                 return
             # Check if position is not occupied.
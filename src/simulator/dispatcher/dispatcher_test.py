@@ -1,9 +1,10 @@
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 
 from simulator.dispatcher.dispatcher import Dispatcher
 from simulator.position import Position
 from simulator.vehicle.vehicle import Vehicle
+from util.rand import RandomStreams
 
 
 def implementsDispatcher(cls):
@@ -25,9 +26,9 @@ class DispatcherTestCase(unittest.TestCase):
         with self.assertRaises(NotImplementedError, msg='expected _newVehicle to be virtual'):
             dispatcher._newVehicle(position=(0, 0))
 
-    @patch('random.randint')
-    def test_dispatch__count(self, mocked_random):
-        road = Mock(lanes_count=1, lane_width=1)
+    def test_dispatch__count(self):
+        road = Mock(lanes_count=1, lane_width=1, rng=RandomStreams())
+        mocked_random = road.rng.arrival.randint = Mock()
         road.lanes_count = 1
         road.sublanesCount = lambda _: 1
         road.canPlaceVehicle = Mock(return_value=False)
@@ -70,14 +71,14 @@ class DispatcherTestCase(unittest.TestCase):
         self.assertEqual(dispatcher.remaining, 0)
         vehicle.setStatistics.assert_called_once_with(start=42)
 
-    @patch('random.randint')
-    def test_dispatch__width(self, mocked_random):
+    def test_dispatch__width(self):
         '''
         Warning! Potentially flaky test, due to testing a random function.
         The probability the test will pass despite an error in the function is
         (2/6)**N where N is the number of times the test is repeated.
         '''
-        road = Mock(lanes_count=2, lane_width=2)
+        road = Mock(lanes_count=2, lane_width=2, rng=RandomStreams())
+        mocked_random = road.rng.arrival.randint = Mock()
         road.sublanesCount = property(lambda _: 6)
         road.canPlaceVehicle = Mock(return_value=True)
 
@@ -105,9 +106,9 @@ class DispatcherTestCase(unittest.TestCase):
             self.assertIn(lane, [1, 3], msg='vehicle dispatched between lanes')
             self.assertEqual(x, 0)
 
-    @patch('random.randint')
-    def test_dispatch__length(self, mocked_random):
-        road = Mock(lanes_count=1, lane_width=1)
+    def test_dispatch__length(self):
+        road = Mock(lanes_count=1, lane_width=1, rng=RandomStreams())
+        mocked_random = road.rng.arrival.randint = Mock()
         road.canPlaceVehicle = Mock(return_value=True)
         road.getRelativePosition = lambda position: position
         mocked_random.return_value = 1
@@ -1,5 +1,3 @@
-import random
-
 from simulator.dispatcher.dispatcher import Dispatcher
 from simulator.position import Position
 from simulator.road.road import Road
@@ -21,12 +19,13 @@ class MixedDispatcher(Dispatcher):
         self.limit = limit
 
     def _newVehicle(self, position: Position) -> Vehicle:
-        limit = random.randint(-self.limit, self.limit)
+        vehicle_rng, driver_rng = self.road.rng.vehicleStreams(position)
+        limit = vehicle_rng.randint(-self.limit, self.limit)
         speed = self.road.controller.getMaxSpeed(position, width=self.road.lane_width) + limit
         params = dict(
             position=position, velocity=speed, road=self.road,
             length=self.length, width=self.road.lane_width, limit=limit)
-        if random.random() < self.penetration:
+        if vehicle_rng.random() < self.penetration:
             return AutonomousCar(**params)
         else:
-            return ConventionalCar(**params, driver=self.driver)
+            return ConventionalCar(**params, driver=self.driver, rng=driver_rng)
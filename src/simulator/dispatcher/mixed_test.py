@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 
 from simulator.dispatcher.dispatcher import Dispatcher
 from simulator.dispatcher.dispatcher_test import implementsDispatcher
@@ -14,11 +14,16 @@ class MixedDispatcherTestCase(unittest.TestCase):
         road = Mock()
         road.controller = Mock()
         road.controller.getMaxSpeed.return_value = 5
+        road.rng.vehicleStreams.return_value = road.rng.vehicle, road.rng.driver
+        road.rng.vehicle.randint.return_value = 0
+        road.rng.vehicle.random.return_value = 0
         return MixedDispatcher(road=road, count=1, penetration=.5, driver=Driver())
 
-    @patch('random.random')
-    def test_penetrationRate(self, mocked_random):
+    def test_penetrationRate(self):
         road = Mock()
+        road.rng.vehicleStreams.return_value = road.rng.vehicle, road.rng.driver
+        road.rng.vehicle.randint.return_value = 0
+        mocked_random = road.rng.vehicle.random
         road.controller = Mock()
         road.controller.getMaxSpeed.return_value = 5
         # Penetration rate 50%.
@@ -0,0 +1,114 @@
+import typing
+
+import numpy as np
+
+from simulator.road.road import Road
+from simulator.vehicle.autonomous import isAutonomous
+from simulator.vehicle.car import isCar
+from simulator.vehicle.conventional import isConventional
+from simulator.vehicle.emergency import isEmergency
+from simulator.vehicle.vehicle import Vehicle
+
+
+# Kinds of vehicles, their codes in a frame. Obstacles and other vehicles which are not cars
+# are of the OTHER kind.
+OTHER, CAR, AUTONOMOUS, CONVENTIONAL, EMERGENCY = range(5)
+KINDS = 5
+
+# Kind codes by vehicle classes, the kind is computed once for every class.
+_kinds: typing.Dict[type, int] = {}
+
+
+def getVehicleKind(vehicle: Vehicle) -> int:
+    '''
+    :param vehicle: any vehicle.
+    :return: code of the kind of the vehicle.
+    '''
+    vehicle_class = vehicle.__class__
+    if vehicle_class not in _kinds:
+        if isAutonomous(vehicle):
+            _kinds[vehicle_class] = AUTONOMOUS
+        elif isConventional(vehicle):
+            _kinds[vehicle_class] = CONVENTIONAL
+        elif isEmergency(vehicle):
+            _kinds[vehicle_class] = EMERGENCY
+        elif isCar(vehicle):
+            _kinds[vehicle_class] = CAR
+        else:
+            _kinds[vehicle_class] = OTHER
+    return _kinds[vehicle_class]
+
+
+class Frame:
+    '''
+    Columns of the vehicles on the road after a step, read from the vehicles once and shared
+    by all the hooks of the step. The active vehicles come first, followed by the vehicles
+    removed from the road in the step. Positions are relative, as the positions of vehicles.
+    The columns are read-only, the vehicles themselves keep changing in the next steps.
+    '''
+    step: int
+    # Number of active vehicles, the leading rows.
+    active: int
+    vehicles: typing.List[Vehicle]
+    id: np.ndarray
+    kind: np.ndarray
+    x: np.ndarray
+    lane: np.ndarray
+    last_x: np.ndarray
+    last_lane: np.ndarray
+    velocity: np.ndarray
+    # Velocity before the step, the current velocity of vehicles which are not cars.
+    last_velocity: np.ndarray
+    # Step the vehicle entered the road at, -1 for vehicles which were not dispatched.
+    start: np.ndarray
+
+    def __init__(self, step: int, vehicles: typing.List[Vehicle], active: int):
+        '''
+        :param step: number of the step.
+        :param vehicles: active vehicles followed by the removed ones.
+        :param active: number of active vehicles.
+        '''
+        self.step = step
+        self.active = active
+        self.vehicles = vehicles
+        rows = []
+        for vehicle in vehicles:
+            kind = getVehicleKind(vehicle)
+            x, lane = vehicle.position
+            last_x, last_lane = vehicle.last_position
+            last_velocity = vehicle.path[-1][1] if kind != OTHER and vehicle.path \
+                else vehicle.velocity
+            rows.append((vehicle.id, kind, x, lane, last_x, last_lane, vehicle.velocity,
+                         last_velocity, getattr(vehicle, 'start', -1)))
+        columns = np.array(rows, dtype=np.int64).reshape(len(rows), 9).T
+        # Frames may be read on other threads while the simulation goes on.
+        columns.setflags(write=False)
+        self.id, self.kind, self.x, self.lane, self.last_x, self.last_lane, self.velocity, \
+            self.last_velocity, self.start = columns
+
+    @classmethod
+    def capture(cls, road: Road, step: int) -> 'Frame':
+        '''
+        Reads the vehicles of a road after a step.
+        :param road: road after the step.
+        :param step: number of the step.
+        :return: frame of the step.
+        '''
+        active = list(road.getAllActiveVehicles())
+        return cls(step=step, vehicles=active + list(road.removed), active=len(active))
+
+    def __len__(self) -> int:
+        '''
+        :return: number of rows, active and removed vehicles.
+        '''
+        return len(self.vehicles)
+
+    def sumByKind(self, values: np.ndarray, rows: typing.Union[slice, np.ndarray]) -> np.ndarray:
+        '''
+        Sums columns over the vehicles of every kind.
+        :param values: columns to sum, by the selected rows.
+        :param rows: selected rows.
+        :return: sums of the columns by the kinds.
+        '''
+        kinds = self.kind[rows]
+        return np.asarray(values) @ (kinds[:, np.newaxis] == np.arange(KINDS))
@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from simulator.frame import AUTONOMOUS, CONVENTIONAL, EMERGENCY, KINDS, OTHER, Frame, \
+    getVehicleKind
+from simulator.vehicle.autonomous import AutonomousCar
+from simulator.vehicle.conventional import ConventionalCar
+from simulator.vehicle.emergency import EmergencyCar
+from simulator.vehicle.obstacle import Obstacle
+
+
+def makeVehicle(spec: type, id: int, position=(0, 0), last_position=(0, 0), velocity=0,
+                last_velocity=0) -> Mock:
+    return Mock(spec=spec, id=id, position=position, last_position=last_position,
+                velocity=velocity, path=[(last_position, last_velocity)])
+
+
+class FrameTestCase(unittest.TestCase):
+    def test_getVehicleKind(self):
+        self.assertEqual(getVehicleKind(Mock(spec=AutonomousCar)), AUTONOMOUS)
+        self.assertEqual(getVehicleKind(Mock(spec=ConventionalCar)), CONVENTIONAL)
+        self.assertEqual(getVehicleKind(Mock(spec=EmergencyCar)), EMERGENCY)
+        self.assertEqual(getVehicleKind(Mock(spec=Obstacle)), OTHER)
+
+    def test_capture(self):
+        road = Mock()
+        road.getAllActiveVehicles = lambda: iter([
+            makeVehicle(AutonomousCar, 3, position=(5, 1), last_position=(2, 0), velocity=3,
+                        last_velocity=2),
+            makeVehicle(Obstacle, 0, position=(9, 0), last_position=(9, 0)),
+        ])
+        road.removed = [makeVehicle(ConventionalCar, 1, position=(12, 0), last_position=(8, 0),
+                                    velocity=4, last_velocity=4)]
+        frame = Frame.capture(road, step=7)
+        self.assertEqual(frame.step, 7)
+        self.assertEqual(frame.active, 2)
+        self.assertEqual(len(frame), 3)
+        np.testing.assert_array_equal(frame.id, [3, 0, 1])
+        np.testing.assert_array_equal(frame.kind, [AUTONOMOUS, OTHER, CONVENTIONAL])
+        np.testing.assert_array_equal(frame.x, [5, 9, 12])
+        np.testing.assert_array_equal(frame.lane, [1, 0, 0])
+        np.testing.assert_array_equal(frame.last_x, [2, 9, 8])
+        np.testing.assert_array_equal(frame.last_lane, [0, 0, 0])
+        np.testing.assert_array_equal(frame.velocity, [3, 0, 4])
+        np.testing.assert_array_equal(frame.last_velocity, [2, 0, 4])
+        # Vehicles which were not dispatched have no start.
+        np.testing.assert_array_equal(frame.start, [-1, -1, -1])
+        sums = frame.sumByKind([frame.velocity, np.ones(3)], slice(None))
+        self.assertEqual(sums.shape, (2, KINDS))
+        self.assertEqual(sums[0, AUTONOMOUS], 3)
+        self.assertEqual(sums[0, CONVENTIONAL], 4)
+        self.assertEqual(sums[1, OTHER], 1)
+
+    def test_capture__empty(self):
+        road = Mock(removed=[])
+        road.getAllActiveVehicles = lambda: iter([])
+        frame = Frame.capture(road, step=1)
+        self.assertEqual(len(frame), 0)
+        self.assertEqual(frame.sumByKind([frame.velocity], slice(None)).tolist(), [[0] * KINDS])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ from simulator.position import Position
 from simulator.road.road import Road, CollisionError
 from simulator.road.speedcontroller import SpeedController
 from simulator.vehicle.vehicle import Vehicle
+from util.rand import RandomStreams
 
 Lane = typing.List[typing.Optional[Vehicle]]
 
@@ -16,8 +17,10 @@ class DenseRoad(Road):
     pending_lanes: typing.List[Lane]
 
     def __init__(self, length: int, lanes_count: int, lane_width: int, emergency_lane: int,
-                 controller: typing.Optional[SpeedController] = None):
-        super().__init__(length, lanes_count, lane_width=1, emergency_lane=emergency_lane,  controller=controller)
+                 controller: typing.Optional[SpeedController] = None,
+                 rng: typing.Optional[RandomStreams] = None):
+        super().__init__(length, lanes_count, lane_width=1, emergency_lane=emergency_lane,  controller=controller,
+                         rng=rng)
         self.lanes = [self._emptyLane() for _ in range(self.sublanesCount)]
         self.pending_lanes = [self._emptyLane() for _ in range(self.sublanesCount)]
 
@@ -33,6 +36,7 @@ class DenseRoad(Road):
         for w in range(vehicle.width):
             for i in range(vehicle.length):
                 self.lanes[lane + w][x - i] = vehicle
+        self._assignId(vehicle)
 
     def getVehicle(self, position: Position) -> typing.Optional[Vehicle]:
         x, lane = position
@@ -4,10 +4,12 @@ import typing
 from simulator.position import Position, inBounds
 from simulator.road.speedcontroller import SpeedController
 from simulator.vehicle.vehicle import Vehicle, VehicleFlags
+from util.rand import RandomStreams
 
 
 class Road:
     controller: SpeedController
+    rng: RandomStreams
 
     # Road options.
     length: int
@@ -15,16 +17,21 @@ class Road:
 
     removed: typing.List[Vehicle]
     emergency: typing.Set[Vehicle]
+    # Number of vehicles added to the road, the id of the next one.
+    added: int
 
     def __init__(self, length: int, lanes_count: int, lane_width: int, emergency_lane: int,
-                 controller: typing.Optional[SpeedController] = None):
+                 controller: typing.Optional[SpeedController] = None,
+                 rng: typing.Optional[RandomStreams] = None):
         self.length = length
         self.lanes_count = lanes_count
         self.lane_width = 1
         self.emergency_lane = emergency_lane
         self.controller = controller if controller is not None else SpeedController()
+        self.rng = rng if rng is not None else RandomStreams()
         self.removed = list()
         self.emergency = set()
+        self.added = 0
 
     @property
     def sublanesCount(self) -> int:
@@ -74,6 +81,15 @@ class Road:
         return start == end
 
 
+    def _assignId(self, vehicle: Vehicle) -> None:
+        '''
+        Numbers a vehicle added to the road.
+        :param vehicle: added vehicle.
+        :return: None.
+        '''
+        vehicle.id = self.added
+        self.added += 1
+
     def addEmergencyVehicle(self, vehicle: Vehicle) -> None:
         '''
         Adds a new emergency vehicle to the  road.
@@ -42,6 +42,9 @@ def implementsRoad(cls):
         another.position = position
         with self.assertRaises(CollisionError):
             road.addVehicle(another)
+        # Vehicles are numbered in the order they are added, failed additions do not count.
+        self.assertEqual(vehicle.id, 0)
+        self.assertEqual(road.added, 1)
 
     def test_addVehicle__length(self: cls):
         road: Road = self.getRoad(length=100, lanes=1, width=1)
@@ -1,7 +1,10 @@
+import contextlib
+import queue
+import threading
 import typing
-import random
 
 from simulator.dispatcher.dispatcher import Dispatcher
+from simulator.frame import Frame
 from simulator.road.road import Road
 
 
@@ -22,11 +25,115 @@ class Hook:
         raise NotImplementedError()
 
 
+class FrameHook(Hook):
+    '''
+    Hook reading the vehicles from the frame of a step, which the simulator builds once for
+    all the frame hooks.
+    '''
+
+    def run(self) -> None:
+        self.runFrame(Frame.capture(self.simulator.road, self.simulator.steps))
+
+    def runFrame(self, frame: Frame) -> None:
+        raise NotImplementedError()
+
+
+class HookPipeline:
+    '''
+    Runs the frame hooks of a simulator on a worker thread, while the simulator computes the
+    next steps. Frames of at most max_pending steps wait for the worker, a simulator further
+    ahead blocks until the worker catches up. Hooks run in the order of the steps and of their
+    registration, a hook run in the pipeline reads only the columns of the frame, as the
+    vehicles keep moving. Other hooks run synchronously, before the frame hooks of the step
+    finished. Errors of the hooks are raised by the next step or flush of the simulator.
+    The worker holds the lock while it runs the hooks of a step.
+    '''
+    simulator: 'Simulator'
+    max_pending: int
+    queue: queue.Queue
+    lock: threading.Lock
+    worker: typing.Optional[threading.Thread]
+    error: typing.Optional[BaseException]
+
+    def __init__(self, simulator: 'Simulator', max_pending: int = 8):
+        '''
+        :param simulator: simulator running the hooks.
+        :param max_pending: maximum number of steps waiting for the worker.
+        '''
+        if max_pending < 1:
+            raise ValueError(f'expected positive number of pending steps, got {max_pending}')
+        self.simulator = simulator
+        self.max_pending = max_pending
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.lock = threading.Lock()
+        self.worker = None
+        self.error = None
+
+    def __enter__(self) -> 'HookPipeline':
+        self.worker = threading.Thread(target=self._work, daemon=True)
+        self.worker.start()
+        self.simulator.pipeline = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.simulator.pipeline = None
+        try:
+            # The pending steps are finished unless the run failed.
+            if exc_type is None:
+                self.flush()
+        finally:
+            self.queue.put(None)
+            self.worker.join()
+            self.worker = None
+
+    def _work(self) -> None:
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                hooks, frame = item
+                # Steps after a failed one are dropped.
+                if self.error is None:
+                    with self.lock:
+                        for hook in hooks:
+                            hook.runFrame(frame)
+            except BaseException as error:
+                self.error = error
+            finally:
+                self.queue.task_done()
+
+    def _raiseError(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def submit(self, hooks: typing.Sequence[FrameHook], frame: Frame) -> None:
+        '''
+        Queues the frame of a step for the hooks, waiting while max_pending steps are queued.
+        :param hooks: frame hooks of the step.
+        :param frame: frame of the step.
+        :return: None.
+        '''
+        self._raiseError()
+        self.queue.put((tuple(hooks), frame))
+
+    def flush(self) -> None:
+        '''
+        Waits until the hooks finished all the queued steps.
+        :return: None.
+        '''
+        self.queue.join()
+        self._raiseError()
+
+
 class Simulator:
     road: Road
     dispatcher: Dispatcher
     steps: int
     hooks: typing.List[Hook]
+    # Pipeline running the frame hooks in the background, if any.
+    pipeline: typing.Optional[HookPipeline] = None
 
     def __init__(self, road: Road, dispatcher: Dispatcher):
         self.road = road
@@ -34,6 +141,13 @@ class Simulator:
         self.steps = 0
         self.hooks = list()
 
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        # Hooks are bound to a running simulation and are not part of its state.
+        state = self.__dict__.copy()
+        state['hooks'] = list()
+        state.pop('pipeline', None)
+        return state
+
     def scatterVehicles(self, density: float) -> None:
         '''
         Randomly scatters vehicles on the road with a desired density.
@@ -46,7 +160,8 @@ class Simulator:
                 vehicle = self.dispatcher._newVehicle(position=position)
                 # Set start to negative value to indicate a vehicle was scattered.
                 vehicle.setStatistics(start=-1)
-                if self.road.canPlaceVehicle(vehicle=vehicle) and random.random() < density:
+                if self.road.canPlaceVehicle(vehicle=vehicle) and \
+                        self.road.rng.arrival.random() < density:
                     self.road.addVehicle(vehicle=vehicle)
 
     def step(self) -> None:
@@ -54,14 +169,55 @@ class Simulator:
         Performs a single step of the simulation.
         :return: None.
         '''
+        self.road.rng.synchronize(self.steps)
         self.dispatcher.dispatch(step=self.steps)
         self.road.step()
         self.steps += 1
+        if self.pipeline is not None:
+            self._runPipelined()
+            return
+        # The frame is only built when a hook reads it.
+        frame = None
         for hook in self.hooks:
-            hook.run()
+            if isinstance(hook, FrameHook):
+                if frame is None:
+                    frame = Frame.capture(self.road, self.steps)
+                hook.runFrame(frame)
+            else:
+                hook.run()
+
+    def _runPipelined(self) -> None:
+        frame_hooks = [hook for hook in self.hooks if isinstance(hook, FrameHook)]
+        # The frame hooks start on the worker before the other hooks run.
+        if frame_hooks:
+            self.pipeline.submit(frame_hooks, Frame.capture(self.road, self.steps))
+        for hook in self.hooks:
+            if not isinstance(hook, FrameHook):
+                hook.run()
+
+    def flush(self) -> None:
+        '''
+        Waits until the hooks finished all the steps, only pipelined hooks may fall behind.
+        :return: None.
+        '''
+        if self.pipeline is not None:
+            self.pipeline.flush()
+
+    def synchronized(self) -> typing.ContextManager:
+        '''
+        Returns a context in which the pipelined hooks do not run, their state can be read in
+        it between two steps, which may be behind the simulator. Use flush to read the state of
+        the current step.
+        :return: context manager.
+        '''
+        if self.pipeline is not None:
+            return self.pipeline.lock
+        return contextlib.nullcontext()
 
     def addHook(self, hook: Hook) -> None:
         self.hooks.append(hook)
 
     def removeHook(self, hook: Hook) -> None:
+        # A removed hook finishes the steps it was registered for.
+        self.flush()
         self.hooks.remove(hook)
@@ -1,15 +1,16 @@
+import threading
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock
 
 from simulator.position import Position
-from simulator.simulator import Simulator, Hook
+from simulator.simulator import FrameHook, HookPipeline, Simulator, Hook
 from simulator.vehicle.vehicle import Vehicle
 
 
 class SimulatorTestCase(unittest.TestCase):
-    @patch('random.random')
-    def test_scatterVehicles(self, patched_random):
+    def test_scatterVehicles(self):
         road = Mock(length=10, lanes_count=1)
+        patched_random = road.rng.arrival.random
 
         def mock_getRelativePosition(position: Position) -> Position:
             return position
@@ -59,6 +60,22 @@ class SimulatorTestCase(unittest.TestCase):
         self.assertEqual(simulator.steps, 3)
         hook.run.assert_not_called()
 
+    def test_step__frame(self):
+        road = Mock(removed=[])
+        road.getAllActiveVehicles = lambda: iter([])
+        simulator = Simulator(road=road, dispatcher=Mock())
+        hooks = [FrameHook(simulator=simulator), FrameHook(simulator=simulator), Mock()]
+        for hook in hooks:
+            hook.runFrame = Mock()
+            simulator.addHook(hook)
+        simulator.step()
+        # Frame hooks share a single frame of the step.
+        frame = hooks[0].runFrame.call_args[0][0]
+        self.assertEqual(frame.step, 1)
+        hooks[1].runFrame.assert_called_once_with(frame)
+        hooks[2].run.assert_called_once()
+        hooks[2].runFrame.assert_not_called()
+
     def test_addHook(self):
         simulator = Simulator(road=Mock(), dispatcher=Mock())
         hook = Mock()
@@ -74,6 +91,13 @@ class HookTestCase(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             hook.run()
 
+    def test_interface__frame(self):
+        road = Mock(removed=[])
+        road.getAllActiveVehicles = lambda: iter([])
+        hook = FrameHook(simulator=Mock(road=road))
+        with self.assertRaises(NotImplementedError):
+            hook.run()
+
     def test_context(self):
         simulator = Mock()
         hook = Hook(simulator=simulator)
@@ -83,5 +107,91 @@ class HookTestCase(unittest.TestCase):
         simulator.removeHook.assert_called_once_with(hook)
 
 
+class HookPipelineTestCase(unittest.TestCase):
+    def makeSimulator(self) -> Simulator:
+        road = Mock(removed=[])
+        road.getAllActiveVehicles = lambda: iter([])
+        return Simulator(road=road, dispatcher=Mock())
+
+    def test_step(self):
+        simulator = self.makeSimulator()
+        runs = []
+        hooks = [FrameHook(simulator=simulator), FrameHook(simulator=simulator)]
+        for name, hook in enumerate(hooks):
+            hook.runFrame = lambda frame, name=name: runs.append(
+                (frame.step, name, threading.current_thread()))
+            simulator.addHook(hook)
+        other = Mock()
+        simulator.addHook(other)
+        with HookPipeline(simulator, max_pending=2) as pipeline:
+            self.assertIs(simulator.pipeline, pipeline)
+            for _ in range(5):
+                simulator.step()
+            simulator.flush()
+            # Frame hooks run on the worker in the order of steps and hooks.
+            self.assertEqual([(step, name) for step, name, _ in runs],
+                             [(step, name) for step in range(1, 6) for name in range(2)])
+            self.assertNotIn(threading.current_thread(), [thread for _, _, thread in runs])
+            self.assertEqual(other.run.call_count, 5)
+        self.assertIsNone(simulator.pipeline)
+
+    def test_step__blocked(self):
+        simulator = self.makeSimulator()
+        hook = FrameHook(simulator=simulator)
+        released = threading.Event()
+        hook.runFrame = Mock(side_effect=lambda frame: released.wait())
+        simulator.addHook(hook)
+        with HookPipeline(simulator, max_pending=2):
+            # The simulator goes on while the hook waits.
+            simulator.step()
+            simulator.step()
+            self.assertEqual(simulator.steps, 2)
+            released.set()
+        self.assertEqual(hook.runFrame.call_count, 2)
+
+    def test_error(self):
+        simulator = self.makeSimulator()
+        hook = FrameHook(simulator=simulator)
+        hook.runFrame = Mock(side_effect=[ValueError('failed'), None])
+        simulator.addHook(hook)
+        with HookPipeline(simulator, max_pending=1):
+            simulator.step()
+            with self.assertRaises(ValueError):
+                simulator.flush()
+            # The error is raised once.
+            simulator.step()
+            simulator.flush()
+        self.assertEqual(hook.runFrame.call_count, 2)
+        with self.assertRaises(ValueError):
+            HookPipeline(simulator, max_pending=0)
+
+    def test_synchronized(self):
+        simulator = self.makeSimulator()
+        hook = FrameHook(simulator=simulator)
+        hook.runFrame = Mock()
+        simulator.addHook(hook)
+        with simulator.synchronized():
+            simulator.step()
+        with HookPipeline(simulator, max_pending=2):
+            with simulator.synchronized():
+                # The worker waits until the state is read.
+                simulator.step()
+                self.assertEqual(hook.runFrame.call_count, 1)
+            simulator.flush()
+            self.assertEqual(hook.runFrame.call_count, 2)
+
+    def test_removeHook(self):
+        simulator = self.makeSimulator()
+        hook = FrameHook(simulator=simulator)
+        hook.runFrame = Mock()
+        simulator.addHook(hook)
+        with HookPipeline(simulator, max_pending=4):
+            for _ in range(3):
+                simulator.step()
+            # A removed hook finishes its steps.
+            simulator.removeHook(hook)
+            self.assertEqual(hook.runFrame.call_count, 3)
+
+
 if __name__ == '__main__':
     unittest.main()
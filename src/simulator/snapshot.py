@@ -0,0 +1,173 @@
+import os
+import pickle
+import sys
+import typing
+import zlib
+
+from simulator.simulator import Simulator
+from simulator.vehicle.autonomous import AutonomousCar
+
+T = typing.TypeVar('T')
+
+Branch = typing.Callable[[Simulator], T]
+
+
+class Snapshot:
+    '''
+    Compact serialized state of a simulator, including the road occupancy, vehicles,
+    dispatcher backlog, speed controller and the random number generator streams of the road.
+    Hooks are not part of the snapshot.
+    '''
+    # Bump whenever the layout of the pickled state changes.
+    VERSION = 8
+
+    data: bytes
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    @classmethod
+    def take(cls, simulator: Simulator, **objects: typing.Any) -> 'Snapshot':
+        '''
+        Captures the current state of a simulator.
+        :param simulator: simulator to capture.
+        :param objects: additional objects to capture together with the simulator, for
+            instance hooks referencing it.
+        :return: snapshot of the simulator.
+        '''
+        return cls(zlib.compress(cls.capture(simulator, **objects)))
+
+    @classmethod
+    def capture(cls, simulator: Simulator, **objects: typing.Any) -> bytes:
+        '''
+        Serializes the current state of a simulator without compressing it, which is
+        the only part of taking a snapshot that has to happen between simulation steps.
+        :param simulator: simulator to capture.
+        :param objects: additional objects to capture together with the simulator.
+        :return: uncompressed snapshot data.
+        '''
+        state = dict(
+            version=cls.VERSION, simulator=simulator, objects=objects,
+            blocked_lane=AutonomousCar.BlockedLane, emergency_lane=AutonomousCar.EmergencyLane)
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def restore(self) -> Simulator:
+        '''
+        Creates a new simulator from the snapshot and restores the global simulation state.
+        :return: restored simulator.
+        '''
+        simulator, _ = self.restoreObjects()
+        return simulator
+
+    def restoreObjects(self) -> typing.Tuple[Simulator, typing.Dict[str, typing.Any]]:
+        '''
+        Creates a new simulator together with the additional captured objects.
+        :return: restored simulator and objects.
+        '''
+        state = pickle.loads(zlib.decompress(self.data))
+        if state['version'] != self.VERSION:
+            raise ValueError(f'unsupported snapshot version {state["version"]}')
+        AutonomousCar.updateBlockedLane(state['blocked_lane'])
+        AutonomousCar.updateEmergencyLane(state['emergency_lane'])
+        return state['simulator'], state['objects']
+
+    def save(self, path: str) -> None:
+        '''
+        Atomically writes the snapshot to a file.
+        :param path: destination file path.
+        :return: None.
+        '''
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(self.data)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'Snapshot':
+        '''
+        Reads a snapshot from a file.
+        :param path: snapshot file path.
+        :return: loaded snapshot.
+        '''
+        with open(path, 'rb') as file:
+            return cls(file.read())
+
+
+def fork(simulator: Simulator, branches: typing.Sequence[Branch],
+         jobs: typing.Optional[int] = None) -> typing.List[T]:
+    '''
+    Runs every branch on its own copy of the simulator state, so that a single warmed up
+    simulator can be reused for many what-if runs. Uses copy-on-write process forking where
+    available and falls back to restoring a snapshot in-process otherwise. Branches start with
+    no hooks attached and the state of the given simulator is left untouched.
+    :param simulator: simulator to branch from.
+    :param branches: functions receiving the simulator copy, their results must be picklable.
+    :param jobs: maximum number of branches running at the same time.
+    :return: results of the branches in order.
+    '''
+    if not hasattr(os, 'fork'):
+        return _forkSnapshot(simulator, branches)
+
+    jobs = jobs if jobs is not None else os.cpu_count() or 1
+    results: typing.List[T] = []
+    running: typing.List[typing.Tuple[int, int]] = []
+    for branch in branches:
+        if len(running) >= jobs:
+            results.append(_joinBranch(*running.pop(0)))
+        running.append(_startBranch(simulator, branch))
+    for pid, read_fd in running:
+        results.append(_joinBranch(pid, read_fd))
+    return results
+
+
+def _forkSnapshot(simulator: Simulator, branches: typing.Sequence[Branch]) -> typing.List[T]:
+    snapshot = Snapshot.take(simulator)
+    # Restoring the snapshot overwrites the global state, keep it to bring it back afterwards.
+    parent = AutonomousCar.BlockedLane, AutonomousCar.EmergencyLane
+    try:
+        return [branch(snapshot.restore()) for branch in branches]
+    finally:
+        AutonomousCar.updateBlockedLane(parent[0])
+        AutonomousCar.updateEmergencyLane(parent[1])
+
+
+def _startBranch(simulator: Simulator, branch: Branch) -> typing.Tuple[int, int]:
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid != 0:
+        os.close(write_fd)
+        return pid, read_fd
+
+    # Child process, never returns.
+    os.close(read_fd)
+    status = 0
+    try:
+        simulator.hooks = []
+        result = (True, branch(simulator))
+    except BaseException as e:
+        result = (False, e)
+    try:
+        with os.fdopen(write_fd, 'wb') as pipe:
+            try:
+                data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                data = pickle.dumps((False, RuntimeError(f'unpicklable branch result: {e}')))
+            pipe.write(data)
+    except BaseException:
+        status = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(status)
+
+
+def _joinBranch(pid: int, read_fd: int) -> T:
+    with os.fdopen(read_fd, 'rb') as pipe:
+        data = pipe.read()
+    os.waitpid(pid, 0)
+    if not data:
+        raise RuntimeError(f'branch process {pid} exited without a result')
+    ok, value = pickle.loads(data)
+    if not ok:
+        raise value
+    return value
@@ -0,0 +1,146 @@
+import os
+import tempfile
+import typing
+import unittest
+from unittest.mock import Mock, patch
+
+from simulator.dispatcher.emergency import EmergencyDispatcher
+from simulator.road.dense import DenseRoad
+from simulator.simulator import Simulator
+from simulator.snapshot import Snapshot, fork
+from simulator.vehicle.autonomous import AutonomousCar
+from simulator.vehicle.car import Car
+from simulator.vehicle.conventional import Driver
+from simulator.vehicle.obstacle import Obstacle
+from util.rand import RandomStreams
+
+
+def makeSimulator(seed: int = 42) -> Simulator:
+    road = DenseRoad(length=50, lanes_count=3, lane_width=1, emergency_lane=0,
+                     rng=RandomStreams(seed))
+    road.addVehicle(Obstacle(position=(30, 1), length=2, width=1))
+    dispatcher = EmergencyDispatcher(
+        road=road, count=3, penetration=.5, driver=Driver(), emergency_rate=20, length=2)
+    simulator = Simulator(road=road, dispatcher=dispatcher)
+    simulator.scatterVehicles(density=.2)
+    return simulator
+
+
+def trace(simulator: Simulator, steps: int) -> typing.List[typing.Any]:
+    result = []
+    for _ in range(steps):
+        simulator.step()
+        result.append([(type(vehicle).__name__, vehicle.position, vehicle.velocity)
+                       for vehicle in simulator.road.getAllActiveVehicles()])
+    return result
+
+
+class SnapshotTestCase(unittest.TestCase):
+    def tearDown(self):
+        AutonomousCar.updateBlockedLane(None)
+        AutonomousCar.updateEmergencyLane(None)
+
+    def test_restore(self):
+        simulator = makeSimulator()
+        trace(simulator, 20)
+        snapshot = Snapshot.take(simulator)
+        expected = trace(simulator, 30)
+        restored = snapshot.restore()
+        self.assertIsNot(restored, simulator)
+        self.assertEqual(restored.steps, 20)
+        self.assertEqual(trace(restored, 30), expected)
+
+    def test_restore__hooks(self):
+        simulator = makeSimulator()
+        hook = Mock()
+        simulator.addHook(hook)
+        restored = Snapshot.take(simulator).restore()
+        self.assertListEqual(restored.hooks, [])
+        self.assertListEqual(simulator.hooks, [hook])
+
+    def test_restore__autonomousFlags(self):
+        simulator = makeSimulator()
+        AutonomousCar.updateBlockedLane(1)
+        AutonomousCar.updateEmergencyLane(0)
+        snapshot = Snapshot.take(simulator)
+        AutonomousCar.updateBlockedLane(None)
+        AutonomousCar.updateEmergencyLane(None)
+        snapshot.restore()
+        self.assertEqual(AutonomousCar.BlockedLane, 1)
+        self.assertEqual(AutonomousCar.EmergencyLane, 0)
+
+    def test_restore__compactPath(self):
+        simulator = makeSimulator()
+        trace(simulator, 10)
+        restored = Snapshot.take(simulator).restore()
+        for vehicle in restored.road.getAllActiveVehicles():
+            if isinstance(vehicle, Car):
+                self.assertLessEqual(len(vehicle.path), 1)
+
+    def test_restore__version(self):
+        snapshot = Snapshot.take(makeSimulator())
+        with patch.object(Snapshot, 'VERSION', Snapshot.VERSION + 1):
+            with self.assertRaises(ValueError):
+                snapshot.restore()
+
+    def test_saveLoad(self):
+        simulator = makeSimulator()
+        trace(simulator, 10)
+        snapshot = Snapshot.take(simulator)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state.snapshot')
+            snapshot.save(path)
+            self.assertListEqual(os.listdir(directory), ['state.snapshot'])
+            self.assertEqual(Snapshot.load(path).data, snapshot.data)
+
+
+def runSteps(simulator: Simulator) -> typing.Tuple[int, int]:
+    simulator.step()
+    return simulator.steps, len(simulator.hooks)
+
+
+def countObstacles(simulator: Simulator) -> int:
+    return sum(1 for vehicle in simulator.road.getAllActiveVehicles()
+               if isinstance(vehicle, Obstacle))
+
+
+def addObstacle(simulator: Simulator) -> int:
+    simulator.road.lanes[2][10] = None
+    simulator.road.addVehicle(Obstacle(position=(10, 2), length=1, width=1))
+    return countObstacles(simulator)
+
+
+def failBranch(_: Simulator) -> None:
+    raise KeyError('branch failed')
+
+
+class ForkTestCase(unittest.TestCase):
+    def test_fork(self):
+        simulator = makeSimulator()
+        simulator.addHook(Mock())
+        results = fork(simulator, [runSteps, addObstacle, runSteps], jobs=2)
+        self.assertListEqual(results, [(1, 0), 2, (1, 0)])
+        # Parent simulator is not affected by the branches.
+        self.assertEqual(simulator.steps, 0)
+        self.assertEqual(len(simulator.hooks), 1)
+        self.assertEqual(countObstacles(simulator), 1)
+
+    def test_fork__error(self):
+        with self.assertRaises(KeyError):
+            fork(makeSimulator(), [runSteps, failBranch])
+
+    @patch('simulator.snapshot.hasattr', create=True, return_value=False)
+    def test_fork__fallback(self, _):
+        simulator = makeSimulator()
+        simulator.addHook(Mock())
+        state = simulator.road.rng.driver.getstate()
+        results = fork(simulator, [runSteps, addObstacle])
+        self.assertListEqual(results, [(1, 0), 2])
+        self.assertEqual(simulator.steps, 0)
+        self.assertEqual(simulator.road.rng.driver.getstate(), state)
+        with self.assertRaises(KeyError):
+            fork(simulator, [failBranch])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,15 @@
 import enum
+import math
 import typing
 
+import numpy as np
+
+from simulator.frame import Frame
 from simulator.road.road import Road
-from simulator.simulator import Hook, Simulator
-from simulator.statistics.averageresult import AverageResult
-from simulator.vehicle.autonomous import isAutonomous
-from simulator.vehicle.car import isCar
-from simulator.vehicle.conventional import isConventional
-from simulator.vehicle.emergency import isEmergency
+from simulator.simulator import FrameHook, Simulator
+from simulator.statistics.sampling import SamplingPolicy
+from simulator.statistics.traveltime import TravelTimes
+from simulator.statistics.vehicletype import VehicleType, makeKindMatrix
 from util.enum import withLimits
 
 @withLimits
@@ -18,37 +20,72 @@ class Statistics(enum.Flag):
     TRAVEL_TIME = enum.auto()
 
 
-class Collector(Hook):
+# Vehicle types of the velocity and travel time statistics, in the order of the velocity grids.
+VELOCITY_TYPES = (
+    ('car', VehicleType.ANY),
+    ('autonomous', VehicleType.AUTONOMOUS),
+    ('conventional', VehicleType.CONVENTIONAL),
+    ('emergency', VehicleType.EMERGENCY),
+)
+# Velocity grids of the kinds of vehicles, ones where a kind, the row, belongs to a grid.
+KIND_GRIDS = makeKindMatrix([vehicle_type for _, vehicle_type in VELOCITY_TYPES]).T
+
+
+class Collector(FrameHook):
+    '''
+    Gathers statistics of every cell of the road from the columns of the frames. Every vehicle
+    adds to the cells it passed
+    in a step, which are recorded in difference arrays: a value added to the segment
+    [begin, end) of a lane is added at begin and subtracted at end, and the cumulative sums
+    along the lanes give the totals of the cells. Arrays have an extra column for segments
+    ending past the road. Long roads can be gathered in bins of several cells, the end points
+    of the segments then add their overlap with the bins, and the rest of the bin width to
+    the next bin, so the cumulative sums give the totals of the bins. With a sampling policy
+    the cells are gathered only in the sampled steps and the averages are taken over them,
+    sampled vehicles add to the cells with their weights. Travel times are cheap to gather and
+    are always complete.
+    '''
     statistics: Statistics
     skip: int
     steps: int
+    # Number of measured steps the cells were gathered in.
+    sampled: int
+    sampling: SamplingPolicy
     emergency_lane: int
-    # Velocity statistics buffers.
-    velocity: typing.List[typing.List[AverageResult]]
-    velocity_autonomous: typing.List[typing.List[AverageResult]]
-    velocity_conventional: typing.List[typing.List[AverageResult]]
-    velocity_emergency: typing.List[typing.List[AverageResult]]
+    # Number of cells in a bin of the cell statistics.
+    bin_width: int
+    # Velocity statistics buffers, sums of velocities and counts of vehicles of every type.
+    velocity: np.ndarray
+    velocity_count: np.ndarray
 
     # Throughput statistics buffers.
-    throughput: typing.List[typing.List[int]]
+    throughput: np.ndarray
 
-    # Heat map statistics buffers.
-    heat_map: typing.List[typing.List[float]]
+    # Heat map statistics buffers, the shares of the cells are kept exactly as multiples of
+    # 1 / heat_map_scale.
+    heat_map: np.ndarray
+    heat_map_scale: int
 
-    # Travel time buffers.
-    travel: typing.List[int]
-    travel_autonomous: typing.List[int]
-    travel_conventional: typing.List[int]
-    travel_emergency: typing.List[int]
+    # Travel time distributions, exact up to twice the length of the road.
+    travel: TravelTimes
+    travel_autonomous: TravelTimes
+    travel_conventional: TravelTimes
+    travel_emergency: TravelTimes
 
     def __init__(self, simulator: Simulator, statistics: Statistics = Statistics.ALL,
-                 skip: int = 0, emergency_lane: int = 0):
+                 skip: int = 0, emergency_lane: int = 0,
+                 sampling: typing.Optional[SamplingPolicy] = None, bin_width: int = 1):
         super().__init__(simulator=simulator)
+        if bin_width < 1:
+            raise ValueError(f'expected positive bin width, got {bin_width}')
+        self.bin_width = bin_width
         self.statistics = statistics
         self.skip = skip
         self.steps = 0
+        self.sampled = 0
+        self.sampling = sampling if sampling is not None else SamplingPolicy()
         self.emergency_lane = emergency_lane
-        
+
         if self.statistics & Statistics.VELOCITY:
             self._initVelocity()
         if self.statistics & Statistics.THROUGHPUT:
@@ -58,19 +95,18 @@ class Collector(Hook):
         if self.statistics & Statistics.TRAVEL_TIME:
             self._initTravelTime()
 
-    def run(self) -> None:
+    def runFrame(self, frame: Frame) -> None:
         self.steps += 1
         if self.steps <= self.skip:
             return
 
-        if self.statistics & Statistics.VELOCITY:
-            self._collectVelocity()
-        if self.statistics & Statistics.THROUGHPUT:
-            self._collectThroughput()
-        if self.statistics & Statistics.HEAT_MAP:
-            self._collectHeatMap()
+        if self.sampling.sampleStep(self.steps):
+            self.sampled += 1
+            if self.statistics & \
+                    (Statistics.VELOCITY | Statistics.THROUGHPUT | Statistics.HEAT_MAP):
+                self._collectSegments(frame)
         if self.statistics & Statistics.TRAVEL_TIME:
-            self._collectTravelTime()
+            self._collectTravelTime(frame)
 
     @property
     def _road(self) -> Road:
@@ -80,101 +116,162 @@ class Collector(Hook):
     def _travelLimit(self) -> int:
         return self._road.length * 2
 
+    @property
+    def _bins(self) -> int:
+        return -(-self._road.length // self.bin_width)
+
+    def _binSizes(self) -> np.ndarray:
+        '''
+        :return: number of cells in every bin, the last one may be shorter.
+        '''
+        starts = np.arange(self._bins) * self.bin_width
+        return np.minimum(starts + self.bin_width, self._road.length) - starts
+
+    def _makeGrid(self, *shape: int) -> np.ndarray:
+        return np.zeros((*shape, self._road.lanes_count, self._bins + 1),
+                        dtype=float if self.sampling.weighted else np.int64)
+
+    def _collectSegments(self, frame: Frame) -> None:
+        '''
+        Adds the cells passed by the vehicles in the last step to all the enabled statistics.
+        Velocity counts only vehicles still on the road.
+        :param frame: frame of the step.
+        '''
+        length = self._road.length
+        lane_width = self._road.lane_width
+        velocity = self.statistics & Statistics.VELOCITY
+        throughput = self.statistics & Statistics.THROUGHPUT
+        heat_map = self.statistics & Statistics.HEAT_MAP
+        rows, weight = self.sampling.sampleVehicles(range(frame.active), self.steps)
+        rows = np.fromiter(rows, dtype=np.int64)
+        sampled = len(rows)
+        # Removed vehicles are all gathered, they follow the sampled active ones.
+        rows = np.concatenate([rows, np.arange(frame.active, len(frame))])
+        if len(rows) == 0:
+            return
+        lanes = (frame.lane[rows] - lane_width // 2) // lane_width
+        begins = np.minimum(frame.last_x[rows], length)
+        ends = frame.x[rows]
+        # Weights of the segments, plain counts keep the grids of unweighted samples exact.
+        weights, velocity_weight = 1, 1
+        if self.sampling.weighted:
+            weights, velocity_weight = np.ones(len(rows)), weight
+            weights[:sampled] = weight
+
+        if throughput:
+            self._addSegments(
+                self.throughput, (lanes,), begins, np.minimum(ends, length), weights)
+        if heat_map:
+            # A vehicle shares a step evenly between the cells it passed and the one it
+            # stopped at, a standing vehicle stays in its cell.
+            shares = ends - frame.last_x[rows] + 1
+            scale = self.heat_map_scale
+            for share in np.unique(shares):
+                scale = scale * int(share) // math.gcd(scale, int(share))
+            if scale != self.heat_map_scale:
+                self.heat_map *= scale // self.heat_map_scale
+                self.heat_map_scale = scale
+            self._addSegments(
+                self.heat_map, (lanes,), begins, np.minimum(np.maximum(ends, begins + 1), length),
+                scale // shares * weights)
+        if velocity:
+            # Moving active vehicles add to every grid of their kind, in the order of the rows.
+            moving = np.flatnonzero(frame.x[rows[:sampled]] > frame.last_x[rows[:sampled]])
+            vehicles, grids = np.nonzero(KIND_GRIDS[frame.kind[rows[moving]]])
+            if len(grids) > 0:
+                vehicles = moving[vehicles]
+                index = (grids, lanes[vehicles])
+                self._addSegments(
+                    self.velocity, index, begins[vehicles], np.minimum(ends[vehicles], length),
+                    frame.velocity[rows[vehicles]] * velocity_weight)
+                self._addSegments(self.velocity_count, index, begins[vehicles],
+                                  np.minimum(ends[vehicles], length), velocity_weight)
+
+    def _addSegments(self, grid: np.ndarray, index: typing.Tuple[np.ndarray, ...],
+                     begins: np.ndarray, ends: np.ndarray,
+                     values: typing.Union[np.ndarray, int]) -> None:
+        self._addPoints(grid, index, begins, values)
+        self._addPoints(grid, index, ends, -values)
+
+    def _addPoints(self, grid: np.ndarray, index: typing.Tuple[np.ndarray, ...],
+                   positions: np.ndarray, values: typing.Union[np.ndarray, int]) -> None:
+        '''
+        Adds values to the cells from the positions on in the difference arrays.
+        :param grid: difference arrays of the bins.
+        :param index: leading indices of the arrays.
+        :param positions: first cells of the values.
+        :param values: values added to every cell.
+        '''
+        if self.bin_width == 1:
+            np.add.at(grid, (*index, positions), values)
+            return
+        bins = positions // self.bin_width
+        overlap = (bins + 1) * self.bin_width - positions
+        np.add.at(grid, (*index, bins), values * overlap)
+        # Points past the road only matter up to its end.
+        np.add.at(grid, (*index, np.minimum(bins + 1, self._bins)),
+                  values * (self.bin_width - overlap))
+
+    @staticmethod
+    def _totals(grid: np.ndarray) -> np.ndarray:
+        return np.cumsum(grid[..., :-1], axis=-1)
+
     def _initVelocity(self):
-        self.velocity = \
-            [[AverageResult(0, 0) for _ in range(self._road.length)]
-             for _ in range(self._road.lanes_count)]
-        self.velocity_autonomous = \
-            [[AverageResult(0, 0) for _ in range(self._road.length)]
-             for _ in range(self._road.lanes_count)]
-        self.velocity_conventional = \
-            [[AverageResult(0, 0) for _ in range(self._road.length)]
-             for _ in range(self._road.lanes_count)]
-        self.velocity_emergency = \
-            [[AverageResult(0, 0) for _ in range(self._road.length)]
-             for _ in range(self._road.lanes_count)]
-
-    def _collectVelocity(self) -> None:
-        for vehicle in self._road.getAllActiveVehicles():
-            last_x, _ = self._road.getAbsolutePosition(vehicle.last_position)
-            cur_x, lane = self._road.getAbsolutePosition(vehicle.position)
-            for x in range(last_x, cur_x):
-                if x >= self._road.length:
-                    continue
-                value = AverageResult(value=vehicle.velocity, count=1)
-                if isCar(vehicle):
-                    self.velocity[lane][x] += value
-                if isAutonomous(vehicle):
-                    self.velocity_autonomous[lane][x] += value
-                if isConventional(vehicle):
-                    self.velocity_conventional[lane][x] += value
-                if isEmergency(vehicle):
-                    self.velocity_emergency[lane][x] += value
+        self.velocity = self._makeGrid(len(VELOCITY_TYPES))
+        self.velocity_count = self._makeGrid(len(VELOCITY_TYPES))
 
-    def _initThroughput(self) -> None:
-        self.throughput = [[0] * self._road.length for _ in range(self._road.lanes_count)]
+    def getVelocity(self) -> typing.Dict[str, np.ndarray]:
+        '''
+        Returns the average velocity in every bin, 0 in bins no vehicle of a type passed.
+        :return: lanes by bins arrays of cars and of autonomous, conventional and emergency
+            vehicles.
+        '''
+        values = self._totals(self.velocity).astype(float)
+        counts = self._totals(self.velocity_count)
+        averages = np.divide(values, counts, out=np.zeros_like(values), where=counts > 0)
+        return {name: averages[i] for i, (name, _) in enumerate(VELOCITY_TYPES)}
 
-    def _collectThroughput(self) -> None:
-        for vehicle in self._road.getAllVehicles():
-            last_x, _ = self._road.getAbsolutePosition(vehicle.last_position)
-            cur_x, lane = self._road.getAbsolutePosition(vehicle.position)
-            for x in range(last_x, cur_x):
-                if x < self._road.length:
-                    self.throughput[lane][x] += 1
+    def _initThroughput(self) -> None:
+        self.throughput = self._makeGrid()
 
-    def getThrougput(self) -> typing.List[typing.List[float]]:
+    def getThrougput(self) -> np.ndarray:
         '''
-        Returns a normalized throughput, representing average throughput in a single step.
-        :return: normalized throughput.
+        Returns a normalized throughput, representing average throughput of a cell in a single
+        step.
+        :return: normalized throughput, lanes by bins.
         '''
-        N = float(self.steps - self.skip)
-        throughput = [[.0] * self._road.length for _ in range(self._road.lanes_count)]
-        for lane in range(self._road.lanes_count):
-            for x in range(self._road.length):
-                throughput[lane][x] = self.throughput[lane][x] / N
-        return throughput
+        return self._totals(self.throughput) / (float(self.sampled) * self._binSizes())
 
     def _initHeatMap(self) -> None:
-        self.heat_map = [[.0] * self._road.length for _ in range(self._road.lanes_count)]
-
-    def _collectHeatMap(self) -> None:
-        for vehicle in self._road.getAllVehicles():
-            last_x, _ = self._road.getAbsolutePosition(vehicle.last_position)
-            cur_x, lane = self._road.getAbsolutePosition(vehicle.position)
-            value = 1. / (cur_x - last_x + 1)
-            if cur_x == last_x:
-                self.heat_map[lane][cur_x] += 1.
-            for x in range(last_x, cur_x):
-                if x < self._road.length:
-                    self.heat_map[lane][x] += value
-
-    def getHeatMap(self) -> typing.List[typing.List[float]]:
+        self.heat_map = self._makeGrid()
+        self.heat_map_scale = 1
+
+    def getHeatMap(self) -> np.ndarray:
         '''
-        Returns a normalized heat map, representing average traffic in a single step.
-        :return: normalized heat map.
+        Returns a normalized heat map, representing average traffic of a cell in a single step.
+        :return: normalized heat map, lanes by bins.
         '''
-        N = self.steps - self.skip
-        heat_map = [[.0] * self._road.length for _ in range(self._road.lanes_count)]
-        for lane in range(self._road.lanes_count):
-            for x in range(self._road.length):
-                heat_map[lane][x] = self.heat_map[lane][x] / N
-        return heat_map
+        return self._totals(self.heat_map) / (
+            float(self.heat_map_scale * self.sampled) * self._binSizes())
 
     def _initTravelTime(self) -> None:
-        self.travel = [0] * self._travelLimit
-        self.travel_autonomous = [0] * self._travelLimit
-        self.travel_conventional = [0] * self._travelLimit
-       
-        self.travel_emergency = [0] * self._travelLimit
-
-    def _collectTravelTime(self) -> None:
-        for vehicle in self._road.removed:
-            time = min(self.simulator.steps - vehicle.start, self._travelLimit - 1)
-            if isCar(vehicle):
-                self.travel[time] += 1
-            if isAutonomous(vehicle):
-                self.travel_autonomous[time] += 1
-            if isConventional(vehicle):
-                self.travel_conventional[time] += 1
-            if isEmergency(vehicle):
-                 self.travel_emergency[time] += 1
+        self.travel = TravelTimes(self._travelLimit)
+        self.travel_autonomous = TravelTimes(self._travelLimit)
+        self.travel_conventional = TravelTimes(self._travelLimit)
+        self.travel_emergency = TravelTimes(self._travelLimit)
+
+    def _collectTravelTime(self, frame: Frame) -> None:
+        travel = self.getTravelTimes()
+        removed = slice(frame.active, None)
+        times = (frame.step - frame.start[removed]).tolist()
+        vehicles, grids = np.nonzero(KIND_GRIDS[frame.kind[removed]])
+        for vehicle, grid in zip(vehicles.tolist(), grids.tolist()):
+            travel[grid].add(times[vehicle])
+
+    def getTravelTimes(self) -> typing.Tuple[TravelTimes, ...]:
+        '''
+        Returns the travel time distributions, which can be queried during a run too.
+        :return: distributions of cars and of autonomous, conventional and emergency vehicles.
+        '''
+        return self.travel, self.travel_autonomous, self.travel_conventional, \
+            self.travel_emergency
@@ -1,7 +1,13 @@
 import unittest
 from unittest.mock import Mock
 
+import numpy as np
+
+from simulator.frame_test import makeVehicle
 from simulator.statistics.collector import Collector, Statistics
+from simulator.statistics.sampling import PeriodicSampling, VehicleSampling
+from simulator.vehicle.autonomous import AutonomousCar
+from simulator.vehicle.conventional import ConventionalCar
 
 
 class CollectorTestCase(unittest.TestCase):
@@ -10,19 +16,17 @@ class CollectorTestCase(unittest.TestCase):
         simulator.road = Mock(length=100, lanes_count=1)
         collector = Collector(simulator=simulator)
         self.assertEqual(collector.statistics, Statistics.ALL)
-        self.assertIsNotNone(collector.velocity)
-        self.assertIsNotNone(collector.velocity_autonomous)
-        self.assertIsNotNone(collector.velocity_conventional)
-        self.assertIsNotNone(collector.throughput)
-        self.assertIsNotNone(collector.heat_map)
+        self.assertEqual(collector.velocity.shape, (4, 1, 101))
+        self.assertEqual(collector.velocity_count.shape, (4, 1, 101))
+        self.assertEqual(collector.throughput.shape, (1, 101))
+        self.assertEqual(collector.heat_map.shape, (1, 101))
         self.assertIsNotNone(collector.travel)
         self.assertIsNotNone(collector.travel_autonomous)
         self.assertIsNotNone(collector.travel_conventional)
         collector = Collector(simulator=simulator, statistics=Statistics.VELOCITY)
         self.assertEqual(collector.statistics, Statistics.VELOCITY)
         self.assertIsNotNone(collector.velocity)
-        self.assertIsNotNone(collector.velocity_autonomous)
-        self.assertIsNotNone(collector.velocity_conventional)
+        self.assertIsNotNone(collector.velocity_count)
         self.assertFalse(hasattr(collector, 'throughput'))
         self.assertFalse(hasattr(collector, 'heat_map'))
         self.assertFalse(hasattr(collector, 'travel'))
@@ -32,9 +36,7 @@ class CollectorTestCase(unittest.TestCase):
         collector = Collector(simulator=simulator, statistics=Statistics.THROUGHPUT)
         self.assertEqual(collector.statistics, Statistics.THROUGHPUT)
         self.assertFalse(hasattr(collector, 'velocity'))
-        self.assertFalse(hasattr(collector, 'velocity_autonomous'))
-        self.assertFalse(hasattr(collector, 'velocity_conventional'))
-        self.assertFalse(hasattr(collector, 'velocity_emergency'))
+        self.assertFalse(hasattr(collector, 'velocity_count'))
         self.assertIsNotNone(collector.throughput)
         self.assertFalse(hasattr(collector, 'heat_map'))
         self.assertFalse(hasattr(collector, 'travel'))
@@ -44,9 +46,7 @@ class CollectorTestCase(unittest.TestCase):
         collector = Collector(simulator=simulator, statistics=Statistics.HEAT_MAP)
         self.assertEqual(collector.statistics, Statistics.HEAT_MAP)
         self.assertFalse(hasattr(collector, 'velocity'))
-        self.assertFalse(hasattr(collector, 'velocity_autonomous'))
-        self.assertFalse(hasattr(collector, 'velocity_conventional'))
-        self.assertFalse(hasattr(collector, 'velocity_emergency'))
+        self.assertFalse(hasattr(collector, 'velocity_count'))
         self.assertFalse(hasattr(collector, 'throughput'))
         self.assertIsNotNone(collector.heat_map)
         self.assertFalse(hasattr(collector, 'travel'))
@@ -56,9 +56,7 @@ class CollectorTestCase(unittest.TestCase):
         collector = Collector(simulator=simulator, statistics=Statistics.TRAVEL_TIME)
         self.assertEqual(collector.statistics, Statistics.TRAVEL_TIME)
         self.assertFalse(hasattr(collector, 'velocity'))
-        self.assertFalse(hasattr(collector, 'velocity_autonomous'))
-        self.assertFalse(hasattr(collector, 'velocity_conventional'))
-        self.assertFalse(hasattr(collector, 'velocity_emergency'))
+        self.assertFalse(hasattr(collector, 'velocity_count'))
         self.assertFalse(hasattr(collector, 'throughput'))
         self.assertFalse(hasattr(collector, 'heat_map'))
         self.assertIsNotNone(collector.travel)
@@ -72,85 +70,139 @@ class CollectorTestCase(unittest.TestCase):
         simulator.road = Mock(length=100, lanes_count=1)
 
         def mock_collect(collector: Collector) -> Collector:
-            collector._collectVelocity = Mock()
-            collector._collectThroughput = Mock()
-            collector._collectHeatMap = Mock()
+            collector._collectSegments = Mock()
             collector._collectTravelTime = Mock()
             return collector
 
         def collect_mock_reset(collector: Collector) -> None:
-            collector._collectThroughput.reset_mock()
-            collector._collectVelocity.reset_mock()
-            collector._collectHeatMap.reset_mock()
+            collector._collectSegments.reset_mock()
             collector._collectTravelTime.reset_mock()
 
         # Test all statistics.
         collector = mock_collect(Collector(simulator=simulator))
         for i in range(1, 100):
             collect_mock_reset(collector)
-            collector.run()
+            collector.runFrame(Mock())
             self.assertEqual(i, collector.steps)
-            collector._collectVelocity.assert_called_once()
-            collector._collectThroughput.assert_called_once()
-            collector._collectHeatMap.assert_called_once()
+            collector._collectSegments.assert_called_once()
             collector._collectTravelTime.assert_called_once()
         # Test skip.
         collector = mock_collect(Collector(simulator=simulator, skip=10))
         for i in range(1, 11):
             collect_mock_reset(collector)
-            collector.run()
+            collector.runFrame(Mock())
             self.assertEqual(i, collector.steps)
-            collector._collectVelocity.assert_not_called()
-            collector._collectThroughput.assert_not_called()
-            collector._collectHeatMap.assert_not_called()
+            collector._collectSegments.assert_not_called()
             collector._collectTravelTime.assert_not_called()
         for i in range(11, 100):
             collect_mock_reset(collector)
-            collector.run()
+            collector.runFrame(Mock())
             self.assertEqual(i, collector.steps)
-            collector._collectVelocity.assert_called_once()
-            collector._collectThroughput.assert_called_once()
-            collector._collectHeatMap.assert_called_once()
+            collector._collectSegments.assert_called_once()
             collector._collectTravelTime.assert_called_once()
         # Test individual statisrics not gathered.
-        collector = mock_collect(Collector(simulator=simulator, statistics=Statistics.VELOCITY))
-        for i in range(1, 100):
-            collect_mock_reset(collector)
-            collector.run()
-            self.assertEqual(i, collector.steps)
-            collector._collectVelocity.assert_called_once()
-            collector._collectThroughput.assert_not_called()
-            collector._collectHeatMap.assert_not_called()
-            collector._collectTravelTime.assert_not_called()
-        collector = mock_collect(Collector(simulator=simulator, statistics=Statistics.THROUGHPUT))
-        for i in range(1, 100):
-            collect_mock_reset(collector)
-            collector.run()
-            self.assertEqual(i, collector.steps)
-            collector._collectVelocity.assert_not_called()
-            collector._collectThroughput.assert_called_once()
-            collector._collectHeatMap.assert_not_called()
+        for statistics in (Statistics.VELOCITY, Statistics.THROUGHPUT, Statistics.HEAT_MAP):
+            collector = mock_collect(Collector(simulator=simulator, statistics=statistics))
+            collector.runFrame(Mock())
+            collector._collectSegments.assert_called_once()
             collector._collectTravelTime.assert_not_called()
-        collector = mock_collect(Collector(simulator=simulator, statistics=Statistics.HEAT_MAP))
-        for i in range(1, 100):
-            collect_mock_reset(collector)
-            collector.run()
-            self.assertEqual(i, collector.steps)
-            collector._collectVelocity.assert_not_called()
-            collector._collectThroughput.assert_not_called()
-            collector._collectHeatMap.assert_called_once()
-            collector._collectTravelTime.assert_not_called()
-
         collector = mock_collect(Collector(simulator=simulator, statistics=Statistics.TRAVEL_TIME))
         for i in range(1, 100):
             collect_mock_reset(collector)
-            collector.run()
+            collector.runFrame(Mock())
             self.assertEqual(i, collector.steps)
-            collector._collectVelocity.assert_not_called()
-            collector._collectThroughput.assert_not_called()
-            collector._collectHeatMap.assert_not_called()
+            collector._collectSegments.assert_not_called()
             collector._collectTravelTime.assert_called_once()
 
+    def test_collectSegments(self):
+        road = Mock(length=10, lanes_count=2, lane_width=1, removed=[])
+        simulator = Mock(road=road)
+        autonomous = makeVehicle(AutonomousCar, 0, last_position=(2, 0), position=(5, 0),
+                                 velocity=3)
+        conventional = makeVehicle(ConventionalCar, 1, last_position=(4, 1), position=(4, 1))
+        leaving = makeVehicle(ConventionalCar, 2, last_position=(8, 1), position=(12, 1),
+                              velocity=4)
+        road.getAllActiveVehicles = lambda: iter([autonomous, conventional])
+        road.removed = [leaving]
+        statistics = Statistics.ALL ^ Statistics.TRAVEL_TIME
+        collector = Collector(simulator=simulator, statistics=statistics)
+        collector.run()
+        collector.run()
+
+        throughput = np.zeros((2, 10))
+        throughput[0, 2:5] = 1
+        throughput[1, 8:10] = 1
+        np.testing.assert_array_equal(collector.getThrougput(), throughput)
+        heat_map = np.zeros((2, 10))
+        heat_map[0, 2:5] = .25
+        heat_map[1, 4] = 1
+        heat_map[1, 8:10] = .2
+        np.testing.assert_allclose(collector.getHeatMap(), heat_map)
+        # Removed and standing vehicles do not count in the velocity.
+        velocity = collector.getVelocity()
+        expected = np.zeros((2, 10))
+        expected[0, 2:5] = 3
+        np.testing.assert_array_equal(velocity['car'], expected)
+        np.testing.assert_array_equal(velocity['autonomous'], expected)
+        np.testing.assert_array_equal(velocity['conventional'], np.zeros((2, 10)))
+        np.testing.assert_array_equal(velocity['emergency'], np.zeros((2, 10)))
+
+    def test_binWidth(self):
+        road = Mock(length=10, lanes_count=1, lane_width=1)
+        # Vehicles passing the cells 1 to 5 and 3 to 9, one leaving the road.
+        road.getAllActiveVehicles = lambda: iter([
+            makeVehicle(AutonomousCar, 0, last_position=(1, 0), position=(6, 0), velocity=5)])
+        road.removed = [
+            makeVehicle(ConventionalCar, 1, last_position=(3, 0), position=(12, 0), velocity=9)]
+        statistics = Statistics.ALL ^ Statistics.TRAVEL_TIME
+        collector = Collector(simulator=Mock(road=road), statistics=statistics, bin_width=4)
+        collector.run()
+        self.assertEqual(collector.throughput.shape, (1, 4))
+        np.testing.assert_array_equal(collector._binSizes(), [4, 4, 2])
+        # Averages of the cells in the bins.
+        np.testing.assert_allclose(collector.getThrougput(), [[4 / 4, 6 / 4, 2 / 2]])
+        np.testing.assert_allclose(collector.getHeatMap(),
+                                   [[(3 / 6 + 1 / 10) / 4, (2 / 6 + 4 / 10) / 4, 2 / 10 / 2]])
+        np.testing.assert_allclose(collector.getVelocity()['car'], [[5, 5, 0]])
+        with self.assertRaises(ValueError):
+            Collector(simulator=Mock(road=road), bin_width=0)
+
+    def test_sampling(self):
+        road = Mock(length=10, lanes_count=1, lane_width=1, removed=[])
+        vehicles = [makeVehicle(ConventionalCar, x, last_position=(x, 0), position=(x, 0))
+                    for x in range(8)]
+        road.getAllActiveVehicles = lambda: iter(vehicles)
+        statistics = Statistics.HEAT_MAP | Statistics.THROUGHPUT
+        collector = Collector(simulator=Mock(road=road), statistics=statistics,
+                              sampling=PeriodicSampling(3))
+        for _ in range(7):
+            collector.run()
+        self.assertEqual(collector.sampled, 2)
+        np.testing.assert_array_equal(collector.getHeatMap()[0], [1] * 8 + [0] * 2)
+        # Every sampled vehicle stands for two of them.
+        collector = Collector(simulator=Mock(road=road), statistics=statistics,
+                              sampling=VehicleSampling(4, seed=1))
+        collector.run()
+        self.assertEqual(collector.getHeatMap().sum(), 8)
+        self.assertEqual(set(collector.getHeatMap()[0]) - {0}, {2})
+
+    def test_collectTravelTime(self):
+        road = Mock(length=10, lanes_count=1, lane_width=1)
+        road.getAllActiveVehicles = lambda: iter([])
+        simulator = Mock(road=road, steps=30)
+        road.removed = [makeVehicle(AutonomousCar, 0), makeVehicle(ConventionalCar, 1),
+                        makeVehicle(ConventionalCar, 2)]
+        for vehicle, start in zip(road.removed, (25, 22, 0)):
+            vehicle.start = start
+        collector = Collector(simulator=simulator, statistics=Statistics.TRAVEL_TIME)
+        collector.run()
+        self.assertEqual(len(collector.travel), 3)
+        self.assertEqual(collector.travel_autonomous.quantile(.5), 5)
+        self.assertEqual(collector.travel_conventional.quantile(.5), 8)
+        # Trips longer than twice the road are not clamped.
+        self.assertEqual(collector.travel_conventional.quantile(1), 30)
+        self.assertEqual(len(collector.travel_emergency), 0)
+
     def test_road(self):
         road = Mock()
         simulator = Mock(road=road)
@@ -0,0 +1,91 @@
+import math
+import statistics
+import typing
+
+import scipy.stats
+
+
+class ConfidenceInterval:
+    '''
+    Student's t confidence interval of the mean of independent replications.
+    '''
+    mean: float
+    half_width: float
+    count: int
+
+    def __init__(self, mean: float, half_width: float, count: int):
+        self.mean = mean
+        self.half_width = half_width
+        self.count = count
+
+    def __str__(self) -> str:
+        return '{:.4f} ± {:.4f} (n={})'.format(self.mean, self.half_width, self.count)
+
+    def relativeHalfWidth(self) -> float:
+        if self.half_width == 0:
+            return 0.
+        if math.isnan(self.mean) or self.mean == 0:
+            return math.inf
+        return self.half_width / abs(self.mean)
+
+    def isPrecise(self, precision: float) -> bool:
+        '''
+        Checks if the half width of the interval is within a fraction of the mean.
+        :param precision: maximum relative half width.
+        :return: True if the interval is narrow enough.
+        '''
+        return self.relativeHalfWidth() <= precision
+
+    def requiredCount(self, precision: float) -> typing.Optional[int]:
+        '''
+        Estimates the number of replications needed to reach a relative precision,
+        assuming the sample variance stays the same.
+        :param precision: target relative half width.
+        :return: estimated number of replications or None if it cannot be estimated yet.
+        '''
+        relative = self.relativeHalfWidth()
+        if math.isinf(relative):
+            return None
+        return max(self.count, math.ceil(self.count * (relative / precision) ** 2))
+
+
+def confidenceInterval(values: typing.Iterable[typing.Optional[float]],
+                       confidence: float = .95) -> ConfidenceInterval:
+    '''
+    Computes the confidence interval of the mean of replication results. Missing results,
+    for instance averages of vehicle types that never appeared, are ignored.
+    :param values: results of the replications.
+    :param confidence: confidence level.
+    :return: confidence interval, with infinite half width for less than two results.
+    '''
+    values = [value for value in values if value is not None and not math.isnan(value)]
+    count = len(values)
+    if count == 0:
+        return ConfidenceInterval(mean=math.nan, half_width=math.inf, count=0)
+    mean = statistics.fmean(values)
+    if count < 2:
+        return ConfidenceInterval(mean=mean, half_width=math.inf, count=count)
+    quantile = scipy.stats.t.ppf((1 + confidence) / 2, count - 1)
+    half_width = quantile * statistics.stdev(values) / math.sqrt(count)
+    return ConfidenceInterval(mean=mean, half_width=half_width, count=count)
+
+
+def pairedInterval(values: typing.Sequence[typing.Optional[float]],
+                   baseline: typing.Sequence[typing.Optional[float]],
+                   confidence: float = .95) -> ConfidenceInterval:
+    '''
+    Computes the confidence interval of the mean difference of paired replication results,
+    e.g. of runs using common random numbers. Positive correlation of the pairs makes the
+    interval narrower than the one of the difference of independent means.
+    :param values: results of the replications.
+    :param baseline: results of the paired baseline replications.
+    :param confidence: confidence level.
+    :return: confidence interval of the difference, pairs with a missing result are ignored.
+    '''
+    if len(values) != len(baseline):
+        raise ValueError(f'expected paired results, got {len(values)} and {len(baseline)}')
+    differences = [
+        value - base if value is not None and base is not None else None
+        for value, base in zip(values, baseline)
+    ]
+    return confidenceInterval(differences, confidence)
@@ -0,0 +1,58 @@
+import math
+import unittest
+
+from simulator.statistics.confidence import ConfidenceInterval, confidenceInterval, pairedInterval
+
+
+class ConfidenceIntervalTestCase(unittest.TestCase):
+    def test_confidenceInterval(self):
+        interval = confidenceInterval([1., 2., 3., 4., 5.], confidence=.95)
+        self.assertEqual(interval.count, 5)
+        self.assertAlmostEqual(interval.mean, 3.)
+        # t(0.975, 4) * stdev / sqrt(n) = 2.7764 * 1.5811 / 2.2361
+        self.assertAlmostEqual(interval.half_width, 1.9632, places=4)
+        wider = confidenceInterval([1., 2., 3., 4., 5.], confidence=.99)
+        self.assertGreater(wider.half_width, interval.half_width)
+
+    def test_confidenceInterval__missing(self):
+        interval = confidenceInterval([None, 2., math.nan, 4.])
+        self.assertEqual(interval.count, 2)
+        self.assertAlmostEqual(interval.mean, 3.)
+        interval = confidenceInterval([2.])
+        self.assertEqual(interval.count, 1)
+        self.assertTrue(math.isinf(interval.half_width))
+        interval = confidenceInterval([None])
+        self.assertEqual(interval.count, 0)
+        self.assertTrue(math.isnan(interval.mean))
+        self.assertFalse(interval.isPrecise(.1))
+
+    def test_pairedInterval(self):
+        baseline = [1., 5., 2., 8., 3.]
+        values = [value + 1. + noise for value, noise in zip(baseline, [.1, -.1, 0., .1, -.1])]
+        interval = pairedInterval(values, baseline)
+        self.assertEqual(interval.count, 5)
+        self.assertAlmostEqual(interval.mean, 1.)
+        # Pairing removes the common variation of the runs.
+        self.assertLess(interval.half_width, confidenceInterval(values).half_width / 10)
+        interval = pairedInterval([1., None, 3.], [0., 1., math.nan])
+        self.assertEqual(interval.count, 1)
+        with self.assertRaises(ValueError):
+            pairedInterval([1.], [1., 2.])
+
+    def test_isPrecise(self):
+        self.assertTrue(ConfidenceInterval(mean=10., half_width=.5, count=5).isPrecise(.05))
+        self.assertFalse(ConfidenceInterval(mean=-10., half_width=.6, count=5).isPrecise(.05))
+        self.assertTrue(ConfidenceInterval(mean=0., half_width=0., count=5).isPrecise(.05))
+        self.assertFalse(ConfidenceInterval(mean=0., half_width=.1, count=5).isPrecise(.05))
+
+    def test_requiredCount(self):
+        interval = ConfidenceInterval(mean=10., half_width=1., count=4)
+        # Halving the half width requires four times more replications.
+        self.assertEqual(interval.requiredCount(.05), 16)
+        self.assertEqual(interval.requiredCount(.5), 4)
+        interval = ConfidenceInterval(mean=1., half_width=math.inf, count=1)
+        self.assertIsNone(interval.requiredCount(.1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import random
+import typing
+
+T = typing.TypeVar('T')
+
+
+class SamplingPolicy:
+    '''
+    Chooses the steps and the vehicles statistics are gathered from. The base policy gathers
+    statistics of all the vehicles in every step. Choices depend only on the seed and the step,
+    so hooks sharing a policy sample the same steps.
+    '''
+    # Expected fraction of the steps sampled.
+    fraction: float = 1.
+    # Whether vehicles carry weights other than 1.
+    weighted: bool = False
+
+    @property
+    def full(self) -> bool:
+        return self.fraction == 1. and not self.weighted
+
+    def sampleStep(self, step: int) -> bool:
+        '''
+        :param step: number of the step, starting from 1.
+        :return: whether statistics are gathered in the step.
+        '''
+        return True
+
+    def sampleVehicles(self, vehicles: typing.Iterable[T],
+                       step: int) -> typing.Tuple[typing.Iterable[T], float]:
+        '''
+        :param vehicles: active vehicles on the road or their rows in a frame.
+        :param step: number of the step.
+        :return: sampled vehicles and the number of vehicles each of them stands for.
+        '''
+        return vehicles, 1.
+
+    def __str__(self) -> str:
+        return 'all'
+
+
+class PeriodicSampling(SamplingPolicy):
+    '''
+    Samples every k-th step.
+    '''
+    period: int
+
+    def __init__(self, period: int):
+        if period < 1:
+            raise ValueError(f'expected positive period, got {period}')
+        self.period = period
+        self.fraction = 1 / period
+
+    def sampleStep(self, step: int) -> bool:
+        return step % self.period == 0
+
+    def __str__(self) -> str:
+        return f'every:{self.period}'
+
+
+class RandomSampling(SamplingPolicy):
+    '''
+    Samples every step independently with a given probability.
+    '''
+    seed: int
+
+    def __init__(self, fraction: float, seed: typing.Optional[int] = None):
+        if not 0 < fraction <= 1:
+            raise ValueError(f'expected fraction in (0, 1], got {fraction}')
+        self.fraction = fraction
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+
+    def sampleStep(self, step: int) -> bool:
+        return random.Random(f'{self.seed}:{step}').random() < self.fraction
+
+    def __str__(self) -> str:
+        return f'random:{self.fraction}'
+
+
+class VehicleSampling(SamplingPolicy):
+    '''
+    Samples a fixed number of the active vehicles in every step uniformly without replacement,
+    every sampled vehicle stands for the vehicles left out in proportion.
+    '''
+    weighted = True
+    size: int
+    seed: int
+
+    def __init__(self, size: int, seed: typing.Optional[int] = None):
+        if size < 1:
+            raise ValueError(f'expected positive sample size, got {size}')
+        self.size = size
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+
+    def sampleVehicles(self, vehicles: typing.Iterable[T],
+                       step: int) -> typing.Tuple[typing.Iterable[T], float]:
+        vehicles = list(vehicles)
+        if len(vehicles) <= self.size:
+            return vehicles, 1.
+        sample = random.Random(f'{self.seed}:{step}').sample(vehicles, self.size)
+        return sample, len(vehicles) / self.size
+
+    def __str__(self) -> str:
+        return f'vehicles:{self.size}'
@@ -0,0 +1,50 @@
+import unittest
+
+from simulator.statistics.sampling import PeriodicSampling, RandomSampling, SamplingPolicy, \
+    VehicleSampling
+
+
+class SamplingTestCase(unittest.TestCase):
+    def test_samplingPolicy(self):
+        policy = SamplingPolicy()
+        self.assertTrue(policy.full)
+        self.assertTrue(all(policy.sampleStep(step) for step in range(1, 10)))
+        vehicles = [object() for _ in range(5)]
+        self.assertEqual(policy.sampleVehicles(vehicles, 1), (vehicles, 1.))
+
+    def test_periodicSampling(self):
+        policy = PeriodicSampling(3)
+        self.assertFalse(policy.full)
+        self.assertEqual([step for step in range(1, 10) if policy.sampleStep(step)], [3, 6, 9])
+        self.assertEqual(str(policy), 'every:3')
+        with self.assertRaises(ValueError):
+            PeriodicSampling(0)
+
+    def test_randomSampling(self):
+        policy = RandomSampling(.25, seed=1)
+        sampled = [step for step in range(1, 4001) if policy.sampleStep(step)]
+        self.assertAlmostEqual(len(sampled) / 4000, .25, delta=.03)
+        # The choice of a step does not depend on the order of the calls.
+        self.assertTrue(all(policy.sampleStep(step) for step in reversed(sampled)))
+        self.assertNotEqual(sampled, [
+            step for step in range(1, 4001) if RandomSampling(.25, seed=2).sampleStep(step)])
+        with self.assertRaises(ValueError):
+            RandomSampling(0)
+
+    def test_vehicleSampling(self):
+        policy = VehicleSampling(4, seed=1)
+        self.assertTrue(policy.weighted)
+        vehicles = list(range(10))
+        sample, weight = policy.sampleVehicles(iter(vehicles), 1)
+        self.assertEqual(len(set(sample)), 4)
+        self.assertTrue(set(sample) <= set(vehicles))
+        self.assertEqual(weight, 2.5)
+        self.assertEqual(policy.sampleVehicles(iter(vehicles), 1)[0], sample)
+        # Small steps are gathered whole.
+        self.assertEqual(policy.sampleVehicles(iter(vehicles[:3]), 2), ([0, 1, 2], 1.))
+        with self.assertRaises(ValueError):
+            VehicleSampling(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
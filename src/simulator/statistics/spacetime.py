@@ -0,0 +1,187 @@
+import glob
+import os
+import typing
+
+import numpy as np
+
+from simulator.frame import OTHER, Frame
+from simulator.road.road import Road
+from simulator.simulator import FrameHook, Simulator
+
+
+# Names of the chunk files, numbered from 0.
+CHUNK_PATTERN = 'chunk_{:06d}.npz'
+
+
+class SpaceTimeDiagram(FrameHook):
+    '''
+    Records the occupancy and the mean velocity of the cars in every lane over time, binned in
+    periods of steps and bins of cells. Each step adds the cars of the frame at their
+    positions, which takes time linear in the number of vehicles. Finished periods are rows of
+    a raster kept in a chunk of a fixed number of rows, full chunks are compressed and written
+    to a directory, so the memory does not grow with the length of the run.
+    '''
+    path: str
+    period: int
+    bin_width: int
+    chunk_rows: int
+    steps: int
+    skip: int
+    chunks: int
+    # Sums of the current period and the finished rows of the current chunk.
+    occupancy: np.ndarray
+    velocity: np.ndarray
+    rows: typing.List[typing.Tuple[int, int, np.ndarray, np.ndarray]]
+
+    def __init__(self, simulator: Simulator, path: str, period: int = 10, bin_width: int = 1,
+                 chunk_rows: int = 256, skip: int = 0):
+        '''
+        :param simulator: recorded simulator.
+        :param path: directory of the chunk files, created if missing. Chunk files already in
+            the directory are deleted.
+        :param period: number of steps in a row of the raster.
+        :param bin_width: number of cells in a column of the raster.
+        :param chunk_rows: number of rows in a chunk file.
+        :param skip: number of leading steps left out.
+        '''
+        if period < 1:
+            raise ValueError(f'expected positive period, got {period}')
+        if bin_width < 1:
+            raise ValueError(f'expected positive bin width, got {bin_width}')
+        if chunk_rows < 1:
+            raise ValueError(f'expected positive chunk size, got {chunk_rows}')
+        super().__init__(simulator=simulator)
+        self.path = path
+        self.period = period
+        self.bin_width = bin_width
+        self.chunk_rows = chunk_rows
+        self.steps = 0
+        self.skip = skip
+        self.chunks = 0
+        shape = (self._road.lanes_count, -(-self._road.length // bin_width))
+        self.occupancy = np.zeros(shape, dtype=np.int64)
+        self.velocity = np.zeros(shape, dtype=np.int64)
+        self.rows = []
+        os.makedirs(path, exist_ok=True)
+        # Chunks of an earlier diagram in the directory would mix with the new ones.
+        for file in glob.glob(os.path.join(path, 'chunk_*.npz')):
+            os.remove(file)
+
+    @property
+    def _road(self) -> Road:
+        return self.simulator.road
+
+    def _binSizes(self) -> np.ndarray:
+        '''
+        :return: number of cells in every column, the last one may be narrower.
+        '''
+        starts = np.arange(self.occupancy.shape[1]) * self.bin_width
+        return np.minimum(self.bin_width, self._road.length - starts)
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        super().__exit__(exc_type, exc_value, exc_traceback)
+        self.flush()
+
+    def runFrame(self, frame: Frame) -> None:
+        self.steps += 1
+        if self.steps <= self.skip:
+            return
+        cars = np.flatnonzero(frame.kind[:frame.active] != OTHER)
+        lane_width = self._road.lane_width
+        lanes = (frame.lane[cars] - lane_width // 2) // lane_width
+        bins = frame.x[cars] // self.bin_width
+        np.add.at(self.occupancy, (lanes, bins), 1)
+        np.add.at(self.velocity, (lanes, bins), frame.velocity[cars])
+        if (self.steps - self.skip) % self.period == 0:
+            self._finishRow(frame.step, self.period)
+
+    def _finishRow(self, last: int, steps: int) -> None:
+        first = last - steps + 1
+        self.rows.append((first, steps, self.occupancy, self.velocity))
+        self.occupancy = np.zeros_like(self.occupancy)
+        self.velocity = np.zeros_like(self.velocity)
+        if len(self.rows) == self.chunk_rows:
+            self._writeChunk()
+
+    def _writeChunk(self) -> None:
+        firsts, steps, occupancy, velocity = zip(*self.rows)
+        steps, occupancy, velocity = np.array(steps), np.stack(occupancy), np.stack(velocity)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_velocity = velocity / occupancy
+        path = os.path.join(self.path, CHUNK_PATTERN.format(self.chunks))
+        # Written under a temporary name first, a chunk is either complete or missing.
+        tmp_path = f'{path}.tmp.npz'
+        np.savez_compressed(
+            tmp_path, first=np.array(firsts), steps=steps, bin_width=self.bin_width,
+            occupancy=(occupancy / steps[:, np.newaxis, np.newaxis] / self._binSizes())
+            .astype(np.float32),
+            velocity=mean_velocity.astype(np.float32))
+        os.replace(tmp_path, path)
+        self.chunks += 1
+        self.rows = []
+
+    def flush(self) -> None:
+        '''
+        Writes the recorded rows, including an unfinished period, to a last chunk.
+        :return: None.
+        '''
+        remaining = (self.steps - self.skip) % self.period
+        if self.steps > self.skip and remaining > 0:
+            self._finishRow(self.simulator.steps, remaining)
+        if self.rows:
+            self._writeChunk()
+
+
+class SpaceTimeData:
+    '''
+    Rows of a space-time diagram read from the disk.
+    '''
+    # First step and number of steps of the rows.
+    first: np.ndarray
+    steps: np.ndarray
+    # Number of cells in a column.
+    bin_width: int
+    # Rows by lanes by columns, cars per cell and step and their mean velocity.
+    occupancy: np.ndarray
+    velocity: np.ndarray
+
+    def __init__(self, first: np.ndarray, steps: np.ndarray, bin_width: int,
+                 occupancy: np.ndarray, velocity: np.ndarray):
+        self.first = first
+        self.steps = steps
+        self.bin_width = bin_width
+        self.occupancy = occupancy
+        self.velocity = velocity
+
+
+def loadSpaceTime(path: str, begin: typing.Optional[int] = None,
+                  end: typing.Optional[int] = None) -> SpaceTimeData:
+    '''
+    Reads the rows of a space-time diagram written by SpaceTimeDiagram, chunk by chunk.
+    :param path: directory of the chunk files.
+    :param begin: first step of the rows read, from the first row by default.
+    :param end: last step of the rows read, to the last row by default.
+    :return: rows starting between begin and end.
+    '''
+    files = sorted(glob.glob(os.path.join(path, 'chunk_*[0-9].npz')))
+    if not files:
+        raise ValueError(f'no space-time chunks in {path}')
+    parts = []
+    bin_width = 1
+    for file in files:
+        with np.load(file) as chunk:
+            first = chunk['first']
+            selected = np.ones(len(first), dtype=bool)
+            if begin is not None:
+                selected &= first >= begin
+            if end is not None:
+                selected &= first <= end
+            if selected.any():
+                parts.append(tuple(chunk[key][selected]
+                                   for key in ('first', 'steps', 'occupancy', 'velocity')))
+            bin_width = int(chunk['bin_width'])
+    if not parts:
+        raise ValueError(f'no space-time rows between steps {begin} and {end}')
+    first, steps, occupancy, velocity = (np.concatenate(arrays) for arrays in zip(*parts))
+    return SpaceTimeData(first=first, steps=steps, bin_width=bin_width, occupancy=occupancy,
+                         velocity=velocity)
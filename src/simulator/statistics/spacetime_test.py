@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from simulator.statistics.spacetime import SpaceTimeDiagram, loadSpaceTime
+from simulator.vehicle.autonomous import AutonomousCar
+from simulator.vehicle.vehicle import Vehicle
+
+
+class SpaceTimeDiagramTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'spacetime')
+        self.car = Mock(spec=AutonomousCar, id=0, position=(0, 0), last_position=(0, 0),
+                        velocity=2, path=[])
+        obstacle = Mock(spec=Vehicle, id=1, position=(9, 1), last_position=(9, 1), velocity=0)
+        self.road = Mock(length=10, lanes_count=2, lane_width=1, removed=[])
+        self.road.getAllActiveVehicles = lambda: iter([self.car, obstacle])
+        self.simulator = Mock(road=self.road, steps=0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def runSteps(self, diagram: SpaceTimeDiagram, steps: int) -> None:
+        with diagram:
+            for _ in range(steps):
+                self.simulator.steps += 1
+                x, _ = self.car.position
+                self.car.position = (x + 1, self.simulator.steps % 2)
+                diagram.run()
+
+    def test_run(self):
+        diagram = SpaceTimeDiagram(simulator=self.simulator, path=self.path, period=2,
+                                   bin_width=4, chunk_rows=2, skip=1)
+        self.runSteps(diagram, 8)
+        # Two full chunks and the last, unfinished period.
+        self.assertEqual(len(os.listdir(self.path)), 2)
+        data = loadSpaceTime(self.path)
+        np.testing.assert_array_equal(data.first, [2, 4, 6, 8])
+        np.testing.assert_array_equal(data.steps, [2, 2, 2, 1])
+        self.assertEqual(data.bin_width, 4)
+        self.assertEqual(data.occupancy.shape, (4, 2, 3))
+        # The car visits cells 2 to 8, changing the lane every step.
+        occupancy = np.zeros((4, 2, 3))
+        occupancy[0, 0, 0] = occupancy[0, 1, 0] = 1 / 8
+        occupancy[1, 0, 1] = occupancy[1, 1, 1] = 1 / 8
+        occupancy[2, 0, 1] = occupancy[2, 1, 1] = 1 / 8
+        occupancy[3, 0, 2] = 1 / 2
+        np.testing.assert_allclose(data.occupancy, occupancy)
+        np.testing.assert_array_equal(data.velocity[occupancy > 0], 2)
+        self.assertTrue(np.isnan(data.velocity[occupancy == 0]).all())
+
+    def test_loadSpaceTime(self):
+        diagram = SpaceTimeDiagram(simulator=self.simulator, path=self.path, period=1,
+                                   chunk_rows=3)
+        self.runSteps(diagram, 9)
+        np.testing.assert_array_equal(loadSpaceTime(self.path, begin=3, end=7).first,
+                                      [3, 4, 5, 6, 7])
+        with self.assertRaises(ValueError):
+            loadSpaceTime(self.path, begin=20)
+        # A new diagram replaces the chunks of the old one.
+        SpaceTimeDiagram(simulator=self.simulator, path=self.path)
+        with self.assertRaises(ValueError):
+            loadSpaceTime(self.path)
+
+    def test_init(self):
+        for params in (dict(period=0), dict(bin_width=0), dict(chunk_rows=0)):
+            with self.assertRaises(ValueError):
+                SpaceTimeDiagram(simulator=self.simulator, path=self.path, **params)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import typing
+
+import numpy as np
+
+from simulator.frame import Frame
+from simulator.simulator import FrameHook, Simulator
+from simulator.statistics.confidence import ConfidenceInterval, confidenceInterval
+
+
+def mserTruncation(values: typing.Sequence[float], batch_size: int = 5) -> typing.Optional[int]:
+    '''
+    Finds the warm-up period of a series with the MSER-m rule. The series is split into batches
+    of m values and the truncation point minimizing the variance of the mean of the remaining
+    batches, divided by their count, is chosen.
+    :param values: series of a single simulation run.
+    :param batch_size: number of values in a batch, MSER-5 by default.
+    :return: number of leading values to discard, None if the series has not settled yet, that
+        is the best truncation point lies in the second half of the series.
+    '''
+    count = len(values) // batch_size
+    if count < 4:
+        return None
+    batches = np.asarray(values[:count * batch_size], dtype=float)
+    batches = batches.reshape(count, batch_size).mean(axis=1)
+    # Statistics of the batches left after truncating the first d of them, for every d.
+    remaining = np.arange(count, 0, -1)
+    sums = np.cumsum(batches[::-1])[::-1]
+    squares = np.cumsum(batches[::-1] ** 2)[::-1]
+    errors = (squares - sums ** 2 / remaining) / remaining ** 2
+    # At least two batches have to remain.
+    truncation = int(np.argmin(errors[:-1]))
+    if truncation > count // 2:
+        return None
+    return truncation * batch_size
+
+
+def batchMeans(values: typing.Sequence[float], batches: int = 20) -> np.ndarray:
+    '''
+    Splits a series into consecutive batches of equal size, leading values which do not fill
+    a batch are left out.
+    :param values: series of a single simulation run.
+    :param batches: number of batches.
+    :return: means of the batches, empty for series shorter than batches.
+    '''
+    size = len(values) // batches
+    if size == 0:
+        return np.empty(0)
+    data = np.asarray(values[len(values) - size * batches:], dtype=float)
+    return data.reshape(batches, size).mean(axis=1)
+
+
+def lagCorrelation(values: np.ndarray) -> float:
+    '''
+    :param values: series.
+    :return: lag 1 autocorrelation of the series, 0 for constant series.
+    '''
+    deviations = values - values.mean()
+    variance = np.dot(deviations, deviations)
+    if variance == 0:
+        return 0.
+    return float(np.dot(deviations[:-1], deviations[1:]) / variance)
+
+
+def batchMeansInterval(values: typing.Sequence[float], batches: int = 20,
+                       confidence: float = .95) -> ConfidenceInterval:
+    '''
+    Computes the confidence interval of the mean of an autocorrelated steady-state series
+    from the means of consecutive batches, which are close to independent when the batches
+    are long enough.
+    :param values: series of a single simulation run.
+    :param batches: number of batches.
+    :param confidence: confidence level.
+    :return: confidence interval, with infinite half width for series shorter than batches.
+    '''
+    return confidenceInterval(batchMeans(values, batches).tolist(), confidence)
+
+
+class SteadyStateMonitor(FrameHook):
+    '''
+    Records the average velocity and the number of vehicles on the road at every step, to
+    detect the end of the warm-up period and to estimate the precision of steady-state
+    averages of a run.
+    '''
+    # Number of batches of the batch means intervals.
+    BATCHES = 20
+    # Batch means correlated more than this need longer batches.
+    MAX_CORRELATION = .2
+
+    velocity: typing.List[float]
+    vehicles: typing.List[int]
+    batch_size: int
+    check_interval: int
+    min_batch_steps: int
+
+    def __init__(self, simulator: Simulator, batch_size: int = 5, check_interval: int = 50,
+                 min_batch_steps: int = 25):
+        '''
+        :param simulator: monitored simulator.
+        :param batch_size: batch size of the MSER rule.
+        :param check_interval: number of steps between checks of the series.
+        :param min_batch_steps: minimal number of steps in a batch of the batch means intervals.
+        '''
+        super().__init__(simulator=simulator)
+        self.velocity = []
+        self.vehicles = []
+        self.batch_size = batch_size
+        self.check_interval = check_interval
+        self.min_batch_steps = min_batch_steps
+
+    def runFrame(self, frame: Frame) -> None:
+        count = frame.active
+        self.velocity.append(frame.velocity[:count].sum().item() / count if count > 0 else 0.)
+        self.vehicles.append(count)
+
+    def isCheckStep(self) -> bool:
+        return len(self.velocity) > 0 and len(self.velocity) % self.check_interval == 0
+
+    def warmUp(self) -> typing.Optional[int]:
+        '''
+        Returns the warm-up period of both the velocity and the number of vehicles.
+        :return: number of warm-up steps, None if the traffic has not settled yet.
+        '''
+        truncations = [
+            mserTruncation(series, self.batch_size) for series in (self.velocity, self.vehicles)]
+        if None in truncations:
+            return None
+        return max(truncations)
+
+    def interval(self, start: int = 0, confidence: float = .95) -> ConfidenceInterval:
+        '''
+        :param start: number of leading steps to leave out.
+        :param confidence: confidence level.
+        :return: batch means confidence interval of the average velocity.
+        '''
+        return batchMeansInterval(self.velocity[start:], self.BATCHES, confidence)
+
+    def isPrecise(self, precision: float, start: int = 0, confidence: float = .95) -> bool:
+        '''
+        Checks whether the average velocity is known precisely enough to stop the run. Only
+        long enough batches with nearly uncorrelated means are trusted.
+        :param precision: maximum half width of the interval relative to the mean.
+        :param start: number of leading steps to leave out.
+        :param confidence: confidence level.
+        :return: True if the run can stop.
+        '''
+        values = self.velocity[start:]
+        if len(values) < self.BATCHES * self.min_batch_steps:
+            return False
+        if lagCorrelation(batchMeans(values, self.BATCHES)) > self.MAX_CORRELATION:
+            return False
+        return self.interval(start, confidence).isPrecise(precision)
@@ -0,0 +1,80 @@
+import math
+import random
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from simulator.frame import Frame
+from simulator.frame_test import makeVehicle
+from simulator.statistics.steadystate import SteadyStateMonitor, batchMeansInterval, \
+    lagCorrelation, mserTruncation
+from simulator.vehicle.car import Car
+
+
+def transientSeries(warm_up: int, length: int, seed: int = 1) -> list:
+    # Linear ramp from 0 to 5 followed by noise around 5.
+    rng = random.Random(seed)
+    return [5. * min(i / warm_up, 1.) + rng.gauss(0, .2) for i in range(length)]
+
+
+class SteadyStateTestCase(unittest.TestCase):
+    def test_mserTruncation(self):
+        truncation = mserTruncation(transientSeries(warm_up=100, length=1000))
+        self.assertIsNotNone(truncation)
+        self.assertEqual(truncation % 5, 0)
+        self.assertGreaterEqual(truncation, 60)
+        self.assertLessEqual(truncation, 150)
+        # Stationary series need no warm-up.
+        rng = random.Random(1)
+        self.assertLessEqual(mserTruncation([rng.gauss(0, 1) for _ in range(1000)]), 50)
+        # Series still in the transient phase.
+        self.assertIsNone(mserTruncation(transientSeries(warm_up=1000, length=500)))
+        self.assertIsNone(mserTruncation([1., 2., 3.]))
+
+    def test_batchMeansInterval(self):
+        rng = random.Random(1)
+        values = [10 + rng.gauss(0, 1) for _ in range(2000)]
+        interval = batchMeansInterval(values, batches=20)
+        self.assertEqual(interval.count, 20)
+        self.assertAlmostEqual(interval.mean, 10, delta=.2)
+        self.assertTrue(interval.isPrecise(.01))
+        self.assertTrue(math.isinf(batchMeansInterval(values[:10], batches=20).half_width))
+
+    def test_lagCorrelation(self):
+        self.assertEqual(lagCorrelation(np.ones(10)), 0.)
+        self.assertGreater(lagCorrelation(np.arange(20.)), .8)
+        self.assertLess(lagCorrelation(np.array([1., -1.] * 10)), -.8)
+
+    def test_monitor__isPrecise(self):
+        monitor = SteadyStateMonitor(simulator=Mock(), min_batch_steps=5)
+        rng = random.Random(1)
+        monitor.velocity = [10 + rng.gauss(0, 1) for _ in range(99)]
+        # Too few steps for 20 batches of 5 steps.
+        self.assertFalse(monitor.isPrecise(.1))
+        monitor.velocity.append(10.)
+        self.assertTrue(monitor.isPrecise(.1))
+        self.assertFalse(monitor.isPrecise(.001))
+        self.assertFalse(monitor.isPrecise(.1, start=1))
+        # Slowly changing series have correlated batch means.
+        monitor.velocity = [10 + i / 100 for i in range(100)]
+        self.assertFalse(monitor.isPrecise(.1))
+
+    def test_monitor(self):
+        vehicles = [makeVehicle(Car, 0, velocity=2), makeVehicle(Car, 1, velocity=4)]
+        monitor = SteadyStateMonitor(simulator=Mock(), check_interval=2)
+        self.assertFalse(monitor.isCheckStep())
+        monitor.runFrame(Frame(step=1, vehicles=vehicles, active=2))
+        # Removed vehicles are not on the road.
+        monitor.runFrame(Frame(step=2, vehicles=vehicles, active=1))
+        self.assertListEqual(monitor.velocity, [3., 2.])
+        self.assertListEqual(monitor.vehicles, [2, 1])
+        self.assertTrue(monitor.isCheckStep())
+        monitor.runFrame(Frame(step=3, vehicles=[], active=0))
+        self.assertEqual(monitor.velocity[-1], 0.)
+        self.assertFalse(monitor.isCheckStep())
+        self.assertIsNone(monitor.warmUp())
+
+
+if __name__ == '__main__':
+    unittest.main()
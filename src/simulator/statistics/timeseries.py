@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from simulator.frame import KINDS, Frame
+from simulator.simulator import FrameHook, Simulator
+from simulator.statistics.vehicletype import VehicleType, getVehicleTypeName, makeKindMatrix
+from util.multiresolution import MultiResolutionSeries
+
+
+# Vehicle types by their integer codes.
+VEHICLE_TYPES = tuple(VehicleType)
+KIND_MATRIX = makeKindMatrix(VEHICLE_TYPES)
+
+# Counters of a step, rows of the series.
+VELOCITY, VEHICLES, THROUGHPUT, WAITING = range(4)
+COUNTERS = 4
+
+# Metrics of the time series, averages of the steps of a bucket.
+TIME_SERIES_KEYS = ['velocity', 'vehicles', 'throughput', 'waiting']
+
+
+class TimeSeries(FrameHook):
+    '''
+    Records the velocity, number of vehicles, throughput and waiting vehicles of the vehicle
+    types in every step. The steps are kept in a multi-resolution series, so long runs keep
+    the recent steps in full detail and older ones averaged over growing periods, within a
+    fixed amount of memory.
+    '''
+    series: MultiResolutionSeries
+
+    def __init__(self, simulator: Simulator, capacity: int = 512, max_levels: int = 16):
+        '''
+        :param simulator: recorded simulator.
+        :param capacity: number of periods of every length kept.
+        :param max_levels: number of period lengths, the longest periods keep growing.
+        '''
+        super().__init__(simulator=simulator)
+        self.series = MultiResolutionSeries(capacity=capacity, max_levels=max_levels,
+                                            start=simulator.steps + 1)
+
+    def runFrame(self, frame: Frame) -> None:
+        active = slice(None, frame.active)
+        counters = np.zeros((COUNTERS, KINDS), dtype=np.int64)
+        counters[[VELOCITY, VEHICLES, WAITING]] = frame.sumByKind([
+            frame.velocity[active],
+            np.ones(frame.active, dtype=np.int64),
+            (frame.last_x[active] == frame.x[active])
+            & (frame.last_lane[active] == frame.lane[active]),
+        ], active)
+        counters[THROUGHPUT] = frame.sumByKind([np.ones(len(frame) - frame.active, dtype=np.int64)],
+                                               slice(frame.active, None))
+        self.series.append(counters @ KIND_MATRIX.T)
+
+    def getData(self) -> pd.DataFrame:
+        '''
+        Returns the recorded periods, the velocity averaged over the vehicles and the other
+        metrics over the steps of a period.
+        :return: first step and number of steps of the periods and the metrics of the types.
+        '''
+        firsts, steps, sums = self.series.buckets()
+        sums = sums.reshape(len(steps), COUNTERS, len(VEHICLE_TYPES)).astype(float)
+        per_step = sums / steps[:, np.newaxis, np.newaxis]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            velocity = np.where(sums[:, VEHICLES] > 0,
+                                sums[:, VELOCITY] / sums[:, VEHICLES], np.nan)
+        metrics = dict(velocity=velocity, vehicles=per_step[:, VEHICLES],
+                       throughput=per_step[:, THROUGHPUT], waiting=per_step[:, WAITING])
+        data = {'step': firsts, 'steps': steps}
+        for key in TIME_SERIES_KEYS:
+            for code, vehicle_type in enumerate(VEHICLE_TYPES):
+                data[f'{key}_{getVehicleTypeName(vehicle_type)}'] = metrics[key][:, code]
+        return pd.DataFrame(data)
@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import Mock
+
+import numpy as np
+
+from simulator.statistics.timeseries import TimeSeries
+from simulator.statistics.tracker_test import makeVehicle
+from simulator.vehicle.autonomous import AutonomousCar
+from simulator.vehicle.conventional import ConventionalCar
+
+
+class TimeSeriesTestCase(unittest.TestCase):
+    def test_run(self):
+        moving = makeVehicle(AutonomousCar, last_position=(0, 0), position=(3, 0), velocity=3)
+        waiting = makeVehicle(ConventionalCar, last_position=(5, 0), position=(5, 0))
+        road = Mock(removed=[makeVehicle(ConventionalCar, position=(12, 0))])
+        road.getAllActiveVehicles = lambda: iter([moving, waiting])
+        timeseries = TimeSeries(simulator=Mock(road=road, steps=10))
+        timeseries.run()
+        road.removed = []
+        timeseries.run()
+        data = timeseries.getData()
+        np.testing.assert_array_equal(data['step'], [11, 12])
+        np.testing.assert_array_equal(data['steps'], [1, 1])
+        np.testing.assert_array_equal(data['velocity_all'], [1.5, 1.5])
+        np.testing.assert_array_equal(data['velocity_autonomous'], [3, 3])
+        np.testing.assert_array_equal(data['vehicles_conventional'], [1, 1])
+        np.testing.assert_array_equal(data['throughput_conventional'], [1, 0])
+        np.testing.assert_array_equal(data['waiting_all'], [1, 1])
+        self.assertTrue(data['velocity_emergency'].isna().all())
+
+    def test_getData__periods(self):
+        vehicle = makeVehicle(AutonomousCar, position=(1, 0))
+        road = Mock(removed=[])
+        road.getAllActiveVehicles = lambda: iter([vehicle])
+        timeseries = TimeSeries(simulator=Mock(road=road, steps=0), capacity=4, max_levels=3)
+        for velocity in range(100):
+            vehicle.velocity = velocity
+            timeseries.run()
+        data = timeseries.getData()
+        self.assertLessEqual(len(data), 12)
+        self.assertEqual(data['steps'].sum(), 100)
+        # Velocities of the periods are averages of their steps.
+        np.testing.assert_allclose(data['velocity_all'], data['step'] - 1 + (data['steps'] - 1) / 2)
+        np.testing.assert_array_equal(data['vehicles_all'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,118 +1,187 @@
+import math
 import typing
 
+import numpy as np
 import pandas as pd
-from more_itertools import ilen
 
-from simulator.road.road import Road
-from simulator.simulator import Hook, Simulator
+from simulator.frame import KINDS, OTHER, Frame
+from simulator.simulator import FrameHook, Simulator
 from simulator.statistics.averageresult import AverageResult
-from simulator.statistics.filters import Filter, combine
-from simulator.statistics.vehicletype import VehicleType, getVehicleTypeFilter, getVehicleTypeName
-from simulator.vehicle.car import Car, isCar
-from simulator.vehicle.vehicle import Vehicle
-from util.cumulativelist import CumulativeList
+from simulator.statistics.sampling import SamplingPolicy
+from simulator.statistics.vehicletype import VehicleType, getVehicleTypeName, makeKindMatrix
 from util.dict import makeOrderedDict
-
-
-class Tracker(Hook):
+from util.rollingwindow import RollingWindow
+
+
+# Vehicle types by their integer codes.
+VEHICLE_TYPES = tuple(VehicleType)
+# Sums the counters of the kinds of vehicles into the counters of the types.
+KIND_MATRIX = makeKindMatrix(VEHICLE_TYPES)
+
+# Counters of a step, rows of the tracked arrays.
+VELOCITY, VEHICLES, CARS, THROUGHPUT, DECELERATIONS, LANE_CHANGES, WAITING = range(7)
+COUNTERS = 7
+# Counters of the active vehicles, weighted when the vehicles are sampled.
+ACTIVE_COUNTERS = [VELOCITY, VEHICLES, CARS, DECELERATIONS, LANE_CHANGES, WAITING]
+# Products of the counters tracked after them to estimate the sampling errors, the squares and
+# the products of the numerators and the denominators of the averages.
+PRODUCTS = ((VELOCITY, VELOCITY), (VEHICLES, VEHICLES), (VELOCITY, VEHICLES), (CARS, CARS),
+            (THROUGHPUT, THROUGHPUT), (DECELERATIONS, DECELERATIONS), (DECELERATIONS, CARS),
+            (LANE_CHANGES, LANE_CHANGES), (LANE_CHANGES, VEHICLES), (WAITING, WAITING),
+            (WAITING, VEHICLES))
+_LEFT, _RIGHT = (list(factors) for factors in zip(*PRODUCTS))
+
+
+class Tracker(FrameHook):
+    '''
+    Tracks the average statistics of the vehicle types over a window of the last steps. Every
+    sampled step adds a row of counters of all the types, summed from the columns of the
+    frame, to a rolling window, the averages are ratios of the sums of the counters in the
+    window. Sampled vehicles are weighted by the number of vehicles they stand for and totals
+    of sampled steps are divided by the sampled fraction, which makes them unbiased estimates.
+    The sampling errors treat the sampled steps as independent, consecutive steps are
+    correlated, so sparse samples fit better.
+    '''
     steps: int
-    velocity: typing.Dict[VehicleType, CumulativeList[AverageResult]]
-    throughput: typing.Dict[VehicleType, CumulativeList[int]]
-    decelerations: typing.Dict[VehicleType, CumulativeList[AverageResult]]
-    lane_changes: typing.Dict[VehicleType, CumulativeList[AverageResult]]
-    waiting: typing.Dict[VehicleType, CumulativeList[AverageResult]]
-
-    def __init__(self, simulator: Simulator, buffer_size: int = 1):
+    skip: int
+    sampling: SamplingPolicy
+    window: RollingWindow
+
+    def __init__(self, simulator: Simulator, buffer_size: typing.Optional[int] = 1,
+                 skip: int = 0, sampling: typing.Optional[SamplingPolicy] = None):
+        '''
+        :param simulator: tracked simulator.
+        :param buffer_size: number of last sampled steps averaged, None for all the steps.
+        :param skip: number of leading steps left out.
+        :param sampling: steps and vehicles to track, all of them by default.
+        '''
         super().__init__(simulator=simulator)
         self.steps = 0
-        self.velocity = {}
-        self.throughput = {}
-        self.decelerations = {}
-        self.lane_changes = {}
-        self.waiting = {}
-        for vehicle_type in VehicleType:
-            self.velocity[vehicle_type] = CumulativeList(buffer_size, AverageResult(0, 0))
-            self.throughput[vehicle_type] = CumulativeList(buffer_size, 0)
-            self.decelerations[vehicle_type] = CumulativeList(buffer_size, AverageResult(0, 0))
-            self.lane_changes[vehicle_type] = CumulativeList(buffer_size, AverageResult(0, 0))
-            self.waiting[vehicle_type] = CumulativeList(buffer_size, AverageResult(0, 0))
-
-    @property
-    def _road(self) -> Road:
-        return self.simulator.road
-
-    def run(self) -> None:
+        self.skip = skip
+        self.sampling = sampling if sampling is not None else SamplingPolicy()
+        self.window = RollingWindow(
+            buffer_size, shape=(COUNTERS + len(PRODUCTS), len(VEHICLE_TYPES)),
+            dtype=float if self.sampling.weighted else np.int64)
+
+    def runFrame(self, frame: Frame) -> None:
+        '''
+        Updates the counters of all the vehicle types from the columns of the frame.
+        '''
         self.steps += 1
-        for vehicle_type in VehicleType:
-            predicate = getVehicleTypeFilter(vehicle_type)
-            self.velocity[vehicle_type].append(self._trackVelocity(predicate))
-            self.throughput[vehicle_type].append(self._trackThroughput(predicate))
-            self.decelerations[vehicle_type].append(self._trackDecelerations(predicate))
-            self.lane_changes[vehicle_type].append(self._trackLaneChanges(predicate))
-            self.waiting[vehicle_type].append(self._trackWaiting(predicate))
-
-    def _trackVelocity(self, predicate: Filter) -> AverageResult:
-        velocity, count = 0, 0
-        for vehicle in filter(predicate, self._road.getAllActiveVehicles()):
-            velocity += vehicle.velocity
-            count += 1
-        return AverageResult(value=velocity, count=count)
+        if self.steps <= self.skip or not self.sampling.sampleStep(self.steps):
+            return
+        rows, weight = self.sampling.sampleVehicles(range(frame.active), self.steps)
+        rows = np.fromiter(rows, dtype=np.int64)
+        car = frame.kind[rows] != OTHER
+        velocity = frame.velocity[rows]
+        counters = np.zeros((COUNTERS, KINDS), dtype=np.int64)
+        counters[ACTIVE_COUNTERS] = frame.sumByKind([
+            velocity,
+            np.ones(len(rows), dtype=np.int64),
+            car,
+            car & (frame.last_velocity[rows] - velocity > 1),
+            frame.last_lane[rows] != frame.lane[rows],
+            (frame.last_x[rows] == frame.x[rows]) & (frame.last_lane[rows] == frame.lane[rows]),
+        ], rows)
+        counters[THROUGHPUT] = frame.sumByKind([np.ones(len(frame) - frame.active, dtype=np.int64)],
+                                               slice(frame.active, None))
+        # Vehicles which are not cars belong to no type.
+        counters = counters @ KIND_MATRIX.T
+        if self.sampling.weighted:
+            counters = counters.astype(float)
+            counters[ACTIVE_COUNTERS] *= weight
+        self.window.append(np.concatenate([counters, counters[_LEFT] * counters[_RIGHT]]))
+
+    def _counters(self, vehicle_type: VehicleType) -> np.ndarray:
+        return self.window.sum()[:, VEHICLE_TYPES.index(vehicle_type)]
+
+    def _average(self, vehicle_type: VehicleType, counter: int,
+                 count: int) -> typing.Optional[float]:
+        counters = self._counters(vehicle_type)
+        return AverageResult(counters[counter].item(), counters[count].item()).toMaybeFloat()
+
+    def _total(self, vehicle_type: VehicleType, counter: int) -> int:
+        return round(self._counters(vehicle_type)[counter].item() / self.sampling.fraction)
 
     def getAverageVelocity(self, vehicle_type: VehicleType) -> typing.Optional[float]:
-        return self.velocity[vehicle_type].value().toMaybeFloat()
-
-    def _trackThroughput(self, predicate: Filter) -> int:
-        return ilen(filter(predicate, self._road.removed))
+        return self._average(vehicle_type, VELOCITY, VEHICLES)
 
     def getAverageThroughput(self, vehicle_type: VehicleType) -> float:
-        return self.throughput[vehicle_type].value() / len(self.throughput[vehicle_type])
-
-    def _trackPercentage(self, count_filter: Filter, value_filter) -> AverageResult:
-        value, count = 0, 0
-        for vehicle in filter(count_filter, self._road.getAllActiveVehicles()):
-            if value_filter(vehicle):
-                value += 1
-            count += 1
-        return AverageResult(value=value, count=count)
-
-    def _trackDecelerations(self, predicate: Filter) -> AverageResult:
-        def isDeceleration(vehicle: Car) -> bool:
-            _, last_velocity = vehicle.path[-1]
-            return last_velocity - vehicle.velocity > 1
-
-        return self._trackPercentage(combine(predicate, isCar), isDeceleration)
+        return self._counters(vehicle_type)[THROUGHPUT].item() / max(len(self.window), 1)
 
     def getAverageDecelerationsAbsolute(self, vehicle_type: VehicleType) -> int:
-        return self.decelerations[vehicle_type].value().value
+        return self._total(vehicle_type, DECELERATIONS)
 
     def getAverageDecelerations(self, vehicle_type: VehicleType) -> typing.Optional[float]:
-        return self.decelerations[vehicle_type].value().toMaybeFloat()
-
-    def _trackLaneChanges(self, predicate: Filter) -> AverageResult:
-        def isLaneChange(vehicle: Vehicle) -> bool:
-            _, last_lane = vehicle.last_position
-            _, lane = vehicle.position
-            return last_lane != lane
-
-        return self._trackPercentage(predicate, isLaneChange)
+        return self._average(vehicle_type, DECELERATIONS, CARS)
 
     def getAverageLaneChangesAbsolute(self, vehicle_type: VehicleType) -> int:
-        return self.lane_changes[vehicle_type].value().value
+        return self._total(vehicle_type, LANE_CHANGES)
 
     def getAverageLaneChanges(self, vehicle_type: VehicleType) -> typing.Optional[float]:
-        return self.lane_changes[vehicle_type].value().toMaybeFloat()
-
-    def _trackWaiting(self, predicate: Filter) -> AverageResult:
-        def isWaiting(vehicle: Vehicle) -> bool:
-            return vehicle.position == vehicle.last_position
-
-        return self._trackPercentage(predicate, isWaiting)
+        return self._average(vehicle_type, LANE_CHANGES, VEHICLES)
 
     def getAverageWaitingAbsolute(self, vehicle_type: VehicleType) -> int:
-        return self.waiting[vehicle_type].value().value
+        return self._total(vehicle_type, WAITING)
 
     def getAverageWaiting(self, vehicle_type: VehicleType) -> typing.Optional[float]:
-        return self.waiting[vehicle_type].value().toMaybeFloat()
+        return self._average(vehicle_type, WAITING, VEHICLES)
+
+    def _product(self, counters: np.ndarray, left: int, right: int) -> float:
+        return counters[COUNTERS + PRODUCTS.index((left, right))].item()
+
+    def _meanError(self, vehicle_type: VehicleType, counter: int) -> typing.Optional[float]:
+        '''
+        :return: standard error of the mean of a counter over the sampled steps.
+        '''
+        counters, count = self._counters(vehicle_type), len(self.window)
+        if count < 2:
+            return None
+        mean = counters[counter].item() / count
+        deviations = self._product(counters, counter, counter) - count * mean ** 2
+        return math.sqrt(max(deviations, 0.) / (count * (count - 1)))
+
+    def _totalError(self, vehicle_type: VehicleType, counter: int) -> typing.Optional[float]:
+        error = self._meanError(vehicle_type, counter)
+        if error is None:
+            return None
+        return len(self.window) * error / self.sampling.fraction
+
+    def _ratioError(self, vehicle_type: VehicleType, counter: int,
+                    count: int) -> typing.Optional[float]:
+        '''
+        :return: standard error of the ratio of the sums of two counters by linearization.
+        '''
+        counters, steps = self._counters(vehicle_type), len(self.window)
+        if steps < 2 or counters[count] == 0:
+            return None
+        ratio = counters[counter].item() / counters[count].item()
+        residuals = self._product(counters, counter, counter) \
+            - 2 * ratio * self._product(counters, counter, count) \
+            + ratio ** 2 * self._product(counters, count, count)
+        return math.sqrt(max(residuals, 0.) / (steps * (steps - 1))) \
+            / (counters[count].item() / steps)
+
+    def getSamplingErrors(self) -> typing.Dict[str, typing.Optional[float]]:
+        '''
+        Returns the standard errors of the average statistics due to the sampling.
+        :return: errors by the names of the average statistics columns.
+        '''
+        errors = {}
+        for vehicle_type in VehicleType:
+            name = getVehicleTypeName(vehicle_type)
+            errors[f'velocity_{name}'] = self._ratioError(vehicle_type, VELOCITY, VEHICLES)
+            errors[f'throughput_{name}'] = self._meanError(vehicle_type, THROUGHPUT)
+            errors[f'decelerations_absolute_{name}'] = \
+                self._totalError(vehicle_type, DECELERATIONS)
+            errors[f'decelerations_{name}'] = \
+                self._ratioError(vehicle_type, DECELERATIONS, CARS)
+            errors[f'laneChanges_absolute_{name}'] = self._totalError(vehicle_type, LANE_CHANGES)
+            errors[f'laneChanges_{name}'] = \
+                self._ratioError(vehicle_type, LANE_CHANGES, VEHICLES)
+            errors[f'waiting_absolute_{name}'] = self._totalError(vehicle_type, WAITING)
+            errors[f'waiting_{name}'] = self._ratioError(vehicle_type, WAITING, VEHICLES)
+        return errors
 
     def getAverageData(self) -> pd.DataFrame:
         statistics = {}
@@ -130,7 +199,13 @@ class Tracker(Hook):
                 self.getAverageWaitingAbsolute(vehicle_type)
             statistics[f'waiting_{name}'] = self.getAverageWaiting(vehicle_type)
 
-        return pd.DataFrame(makeOrderedDict(statistics, AVERAGE_DATA_ORDER), index=[0])
+        data = makeOrderedDict(statistics, AVERAGE_DATA_ORDER)
+        # Sampled runs report the standard errors of the estimates too.
+        if not self.sampling.full:
+            errors = self.getSamplingErrors()
+            for key in AVERAGE_DATA_ORDER:
+                data[f'{key}_error'] = errors[key]
+        return pd.DataFrame(data, index=[0])
 
 
 # Order for the average statistics.
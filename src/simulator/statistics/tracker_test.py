@@ -4,198 +4,158 @@ import typing
 from unittest.mock import Mock
 
 from simulator.statistics.averageresult import AverageResult
-from simulator.statistics.filters import Filter
-from simulator.statistics.tracker import Tracker
-from simulator.vehicle.car import Car
+from simulator.statistics.tracker import CARS, DECELERATIONS, LANE_CHANGES, THROUGHPUT, \
+    VEHICLE_TYPES, VEHICLES, VELOCITY, WAITING, Tracker
+from simulator.statistics.sampling import PeriodicSampling, VehicleSampling
+from simulator.statistics.vehicletype import VehicleType
+from simulator.vehicle.autonomous import AutonomousCar
+from simulator.vehicle.conventional import ConventionalCar
 from simulator.vehicle.vehicle import Vehicle
 
 
+def makeVehicle(spec: type, velocity: int = 0, last_position=(0, 0), position=(0, 0),
+                last_velocity: int = 0) -> Mock:
+    vehicle = Mock(spec=spec)
+    vehicle.velocity = velocity
+    vehicle.last_position = last_position
+    vehicle.position = position
+    vehicle.path = [(last_position, last_velocity)]
+    vehicle.id = 0
+    return vehicle
+
+
 class TrackerTestCase(unittest.TestCase):
-    def test_trackVelocity(self):
-        vehicles: typing.List[Vehicle] = [Mock(velocity=v) for v in range(10)]
-        road = Mock()
-        road.getAllActiveVehicles = lambda: vehicles
+    def makeTracker(self, vehicles: typing.List[Vehicle],
+                    removed: typing.Sequence[Vehicle] = ()) -> Tracker:
+        road = Mock(removed=list(removed))
+        road.getAllActiveVehicles = lambda: iter(vehicles)
         tracker = Tracker(simulator=Mock(road=road))
-        # No vehicles matching the predicate.
-        result = tracker._trackVelocity(lambda _: False)
-        expected = AverageResult(value=0, count=0)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-        # All vehicles matching the predicate.
-        result = tracker._trackVelocity(lambda _: True)
-        expected = AverageResult(value=45, count=10)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-
-        # Some vehicles matching the predicate.
-        def isEven(vehicle):
-            return vehicle.velocity % 2 == 0
-
-        result = tracker._trackVelocity(isEven)
-        expected = AverageResult(value=20, count=5)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
+        tracker.run()
+        return tracker
 
-    def test_trackThroughput(self):
-        vehicles: typing.List[Vehicle] = [Mock(velocity=v) for v in range(10)]
-        road = Mock(removed=vehicles)
-        tracker = Tracker(simulator=Mock(road=road))
-        # No vehicles matching the predicate.
-        result = tracker._trackThroughput(lambda _: False)
-        self.assertEqual(result, 0)
-        # All vehicles matching the predicate.
-        result = tracker._trackThroughput(lambda _: True)
-        self.assertEqual(result, 10)
-
-        # Some vehicles matching the predicate.
-        def isEven(vehicle):
-            return vehicle.velocity % 2 == 0
-
-        result = tracker._trackThroughput(isEven)
-        self.assertEqual(result, 5)
-
-    def test_trackPercentage(self):
-        road = Mock()
-        vehicles: typing.List[Vehicle] = []
-        for x in range(100):
-            vehicles.append(Mock(position=(x, 0)))
-        road.getAllActiveVehicles = lambda: vehicles
-        tracker = Tracker(simulator=Mock(road=road))
+    def assertTracked(self, tracker: Tracker, value: int, count: typing.Optional[int],
+                      expected: typing.Dict[VehicleType, typing.Any]) -> None:
+        for vehicle_type, expected_value in expected.items():
+            counters = tracker.window.sum()[:, VEHICLE_TYPES.index(vehicle_type)]
+            result = counters[value] if count is None else \
+                AverageResult(value=counters[value], count=counters[count])
+            self.assertEqual(result, expected_value, f'{result} != {expected_value}')
 
-        def make_filter(xfilter: typing.Callable[[int], bool]) -> Filter:
-            def f(vehicle: Vehicle) -> bool:
-                x, _ = vehicle.position
-                return xfilter(x)
-
-            return f
-
-        no_filter = make_filter(lambda _: True)
-        x50_filter = make_filter(lambda x: x < 50)
-        x25_filter = make_filter(lambda x: x < 25)
-
-        # Check count working.
-        result = tracker._trackPercentage(x50_filter, no_filter)
-        expected = AverageResult(value=50, count=50)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-        # Check value working.
-        result = tracker._trackPercentage(no_filter, x50_filter)
-        expected = AverageResult(value=50, count=100)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-        # More potential count than values.
-        result = tracker._trackPercentage(x50_filter, x25_filter)
-        expected = AverageResult(value=25, count=50)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-        # More potential values than count.
-        result = tracker._trackPercentage(x25_filter, x50_filter)
-        expected = AverageResult(value=25, count=25)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
+    def test_trackVelocity(self):
+        vehicles = [makeVehicle(AutonomousCar, velocity=v) for v in range(10)]
+        vehicles += [makeVehicle(ConventionalCar, velocity=v) for v in range(5)]
+        tracker = self.makeTracker(vehicles)
+        self.assertTracked(tracker, VELOCITY, VEHICLES, {
+            VehicleType.ANY: AverageResult(value=55, count=15),
+            VehicleType.AUTONOMOUS: AverageResult(value=45, count=10),
+            VehicleType.CONVENTIONAL: AverageResult(value=10, count=5),
+            VehicleType.EMERGENCY: AverageResult(value=0, count=0),
+        })
+        self.assertEqual(tracker.getAverageVelocity(VehicleType.AUTONOMOUS), 4.5)
+        self.assertIsNone(tracker.getAverageVelocity(VehicleType.EMERGENCY))
+        # Vehicles of no tracked type are left out.
+        tracker = self.makeTracker([makeVehicle(Vehicle, velocity=5)])
+        self.assertTracked(
+            tracker, VELOCITY, VEHICLES, {VehicleType.ANY: AverageResult(value=0, count=0)})
+
+    def test_trackThroughput(self):
+        removed = [makeVehicle(AutonomousCar) for _ in range(3)]
+        removed += [makeVehicle(ConventionalCar) for _ in range(7)]
+        tracker = self.makeTracker([], removed)
+        self.assertTracked(tracker, THROUGHPUT, None, {
+            VehicleType.ANY: 10,
+            VehicleType.AUTONOMOUS: 3,
+            VehicleType.CONVENTIONAL: 7,
+            VehicleType.EMERGENCY: 0,
+        })
+        self.assertEqual(tracker.getAverageThroughput(VehicleType.ANY), 10)
 
     def test_trackDecelerations(self):
-        road = Mock()
-        vehicles: typing.List[Vehicle] = []
-        for velocity in range(10):
-            vehicle = Mock(spec=Car)
-            vehicle.velocity = velocity
-            vehicle.path = [((0, 0), 12)]
-            vehicles.append(vehicle)
-        road.getAllActiveVehicles = lambda: vehicles
-        tracker = Tracker(simulator=Mock(road=road))
-        # No vehicles matching the predicate.
-        result = tracker._trackDecelerations(lambda _: False)
-        expected = AverageResult(value=0, count=0)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-        # All vehicles matching the predicate.
-        result = tracker._trackDecelerations(lambda _: True)
-        expected = AverageResult(value=10, count=10)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-
-        # Some vehicles matching the predicate.
-        def isEven(vehicle: Vehicle) -> bool:
-            return vehicle.velocity % 2 == 0
-
-        result = tracker._trackDecelerations(isEven)
-        expected = AverageResult(value=5, count=5)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-
-        # Test decelerations filter.
-        road = Mock()
-        vehicles: typing.List[Vehicle] = []
         # Vehicles which decelerated quickly.
-        for _ in range(10):
-            vehicle = Mock(spec=Car)
-            vehicle.velocity = 5
-            vehicle.path = [((0, 0), 10)]
-            vehicles.append(vehicle)
+        vehicles = [makeVehicle(AutonomousCar, velocity=5, last_velocity=10) for _ in range(10)]
         # Not cars, therefore should not be counted.
-        for _ in range(10):
-            vehicle = Mock(spec=Vehicle)
-            vehicle.velocity = 5
-            vehicle.path = [((0, 0), 10)]
-            vehicles.append(vehicle)
+        vehicles += [makeVehicle(Vehicle, velocity=5, last_velocity=10) for _ in range(10)]
         # Vehicles which did not decelerate quickly.
-        for _ in range(10):
-            vehicle = Mock(spec=Car)
-            vehicle.velocity = 9
-            vehicle.path = [((0, 0), 10)]
-            vehicles.append(vehicle)
-        road.getAllActiveVehicles = lambda: vehicles
-        tracker = Tracker(simulator=Mock(road=road))
-        result = tracker._trackDecelerations(lambda _: True)
-        expected = AverageResult(value=10, count=20)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
+        vehicles += [makeVehicle(ConventionalCar, velocity=9, last_velocity=10) for _ in range(10)]
+        tracker = self.makeTracker(vehicles)
+        self.assertTracked(tracker, DECELERATIONS, CARS, {
+            VehicleType.ANY: AverageResult(value=10, count=20),
+            VehicleType.AUTONOMOUS: AverageResult(value=10, count=10),
+            VehicleType.CONVENTIONAL: AverageResult(value=0, count=10),
+        })
+        self.assertEqual(tracker.getAverageDecelerationsAbsolute(VehicleType.ANY), 10)
+        self.assertEqual(tracker.getAverageDecelerations(VehicleType.ANY), .5)
 
     def test_trackLaneChanges(self):
-        road = Mock()
-        vehicles: typing.List[Vehicle] = []
-        for x in range(10):
-            vehicle = Mock()
-            vehicle.position = (10 + x, 0)
-            vehicle.last_position = (x, 1)
-            vehicles.append(vehicle)
-        road.getAllActiveVehicles = lambda: vehicles
-        tracker = Tracker(simulator=Mock(road=road))
-        # No vehicles matching the predicate.
-        result = tracker._trackLaneChanges(lambda _: False)
-        expected = AverageResult(value=0, count=0)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-        # All vehicles matching the predicate.
-        result = tracker._trackLaneChanges(lambda _: True)
-        expected = AverageResult(value=10, count=10)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-
-        # Some vehicles matching the predicate.
-        def isEven(vehicle: Vehicle) -> bool:
-            x, _ = vehicle.position
-            return x % 2 == 0
-
-        result = tracker._trackLaneChanges(isEven)
-        expected = AverageResult(value=5, count=5)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
+        vehicles = [makeVehicle(AutonomousCar, last_position=(x, 1), position=(10 + x, x % 2))
+                    for x in range(10)]
+        tracker = self.makeTracker(vehicles)
+        self.assertTracked(tracker, LANE_CHANGES, VEHICLES, {
+            VehicleType.ANY: AverageResult(value=5, count=10),
+            VehicleType.AUTONOMOUS: AverageResult(value=5, count=10),
+            VehicleType.CONVENTIONAL: AverageResult(value=0, count=0),
+        })
+        self.assertEqual(tracker.getAverageLaneChanges(VehicleType.ANY), .5)
 
     def test_trackWaiting(self):
-        road = Mock()
-        vehicles: typing.List[Vehicle] = []
-        for x in range(10):
-            vehicle = Mock()
-            vehicle.position = (x, 0)
-            vehicle.last_position = (x, 0)
-            vehicles.append(vehicle)
-        road.getAllActiveVehicles = lambda: vehicles
-        tracker = Tracker(simulator=Mock(road=road))
-        # No vehicles matching the predicate.
-        result = tracker._trackWaiting(lambda _: False)
-        expected = AverageResult(value=0, count=0)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-        # All vehicles matching the predicate.
-        result = tracker._trackWaiting(lambda _: True)
-        expected = AverageResult(value=10, count=10)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
-
-        # Some vehicles matching the predicate.
-        def isEven(vehicle: Vehicle) -> bool:
-            x, _ = vehicle.position
-            return x % 2 == 0
-
-        result = tracker._trackWaiting(isEven)
-        expected = AverageResult(value=5, count=5)
-        self.assertEqual(result, expected, '{} != {}'.format(str(result), str(expected)))
+        vehicles = [makeVehicle(ConventionalCar, last_position=(x, 0), position=(x + x % 2, 0))
+                    for x in range(10)]
+        tracker = self.makeTracker(vehicles)
+        self.assertTracked(tracker, WAITING, VEHICLES, {
+            VehicleType.ANY: AverageResult(value=5, count=10),
+            VehicleType.CONVENTIONAL: AverageResult(value=5, count=10),
+            VehicleType.AUTONOMOUS: AverageResult(value=0, count=0),
+        })
+        self.assertEqual(tracker.getAverageWaitingAbsolute(VehicleType.CONVENTIONAL), 5)
+
+    def test_window(self):
+        road = Mock(removed=[])
+        road.getAllActiveVehicles = lambda: iter(vehicles)
+        tracker = Tracker(simulator=Mock(road=road), buffer_size=2, skip=1)
+        for velocity in range(5):
+            vehicles = [makeVehicle(AutonomousCar, velocity=velocity)]
+            road.removed = [makeVehicle(AutonomousCar)] * velocity
+            tracker.run()
+            if velocity == 1:
+                # Only the steps after the skipped one are averaged.
+                self.assertEqual(tracker.getAverageVelocity(VehicleType.ANY), 1)
+                self.assertEqual(tracker.getAverageThroughput(VehicleType.ANY), 1)
+        self.assertEqual(tracker.steps, 5)
+        self.assertEqual(tracker.getAverageVelocity(VehicleType.ANY), 3.5)
+        self.assertEqual(tracker.getAverageThroughput(VehicleType.AUTONOMOUS), 3.5)
+
+    def test_sampling(self):
+        road = Mock(removed=[])
+        road.getAllActiveVehicles = lambda: iter(vehicles)
+        tracker = Tracker(simulator=Mock(road=road), buffer_size=None,
+                          sampling=PeriodicSampling(2))
+        for step in range(1, 9):
+            # Two cars move and one waits in every step.
+            vehicles = [makeVehicle(ConventionalCar, velocity=step, position=(1, 0))] * 2
+            vehicles.append(makeVehicle(ConventionalCar))
+            tracker.run()
+        self.assertEqual(len(tracker.window), 4)
+        self.assertEqual(tracker.getAverageVelocity(VehicleType.ANY), 10 / 3)
+        # Totals are rescaled to all the steps.
+        self.assertEqual(tracker.getAverageWaitingAbsolute(VehicleType.ANY), 8)
+        errors = tracker.getSamplingErrors()
+        self.assertGreater(errors['velocity_all'], 0)
+        self.assertEqual(errors['waiting_absolute_all'], 0)
+        self.assertIsNone(errors['velocity_emergency'])
+        data = tracker.getAverageData()
+        self.assertIn('velocity_all_error', data)
+
+    def test_sampling__vehicles(self):
+        vehicles = [makeVehicle(AutonomousCar, velocity=2) for _ in range(6)]
+        vehicles += [makeVehicle(ConventionalCar, velocity=2) for _ in range(6)]
+        road = Mock(removed=[])
+        road.getAllActiveVehicles = lambda: iter(vehicles)
+        tracker = Tracker(simulator=Mock(road=road), sampling=VehicleSampling(4, seed=1))
+        tracker.run()
+        counters = tracker.window.sum()[:, VEHICLE_TYPES.index(VehicleType.ANY)]
+        # Every sampled vehicle stands for three of them.
+        self.assertEqual(counters[VEHICLES], 12)
+        self.assertEqual(tracker.getAverageVelocity(VehicleType.ANY), 2)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,87 @@
+import typing
+
+import numpy as np
+
+from util.kll import KLLSketch
+
+# Quantiles reported for the travel times.
+QUANTILES = (.5, .95, .99)
+
+
+class TravelTimes:
+    '''
+    Streaming distribution of the travel times of vehicles. Travel times below a bound are
+    counted exactly, the rare longer trips go to a quantile sketch, so quantiles can be asked
+    at any time of a run and distributions of different runs merge cheaply.
+    '''
+    counts: np.ndarray
+    sketch: KLLSketch
+
+    def __init__(self, bound: int, k: int = 200):
+        '''
+        :param bound: travel times counted exactly are less than the bound.
+        :param k: precision of the sketch of the longer travel times.
+        '''
+        if bound < 1:
+            raise ValueError(f'expected positive bound, got {bound}')
+        self.counts = np.zeros(bound, dtype=np.int64)
+        self.sketch = KLLSketch(k=k)
+
+    @property
+    def bound(self) -> int:
+        return len(self.counts)
+
+    def __len__(self) -> int:
+        '''
+        :return: number of travel times.
+        '''
+        return int(self.counts.sum()) + len(self.sketch)
+
+    def add(self, time: int) -> None:
+        if time < self.bound:
+            self.counts[time] += 1
+        else:
+            self.sketch.update(time)
+
+    def merge(self, other: 'TravelTimes') -> None:
+        '''
+        Adds the travel times of another distribution, f.e. of another run of a scenario.
+        :param other: distribution with the same bound.
+        '''
+        if other.bound != self.bound:
+            raise ValueError(f'expected bound {self.bound}, got {other.bound}')
+        self.counts += other.counts
+        self.sketch.merge(other.sketch)
+
+    def quantile(self, q: float) -> typing.Optional[float]:
+        '''
+        :param q: fraction of the vehicles, between 0 and 1.
+        :return: the least travel time not exceeded by at least the fraction q of the
+            vehicles, None without any vehicles. Exact below the bound.
+        '''
+        if not 0 <= q <= 1:
+            raise ValueError(f'expected quantile between 0 and 1, got {q}')
+        total = len(self)
+        if total == 0:
+            return None
+        cumulative = np.cumsum(self.counts)
+        # At least one vehicle, the least travel time for q = 0.
+        rank = max(q * total, 1)
+        if cumulative[-1] >= rank:
+            return float(np.searchsorted(cumulative, rank))
+        return self.sketch.quantile((rank - cumulative[-1]) / len(self.sketch))
+
+    def quantiles(self) -> typing.Dict[str, typing.Optional[float]]:
+        '''
+        :return: the reported quantiles by their names, f.e. p95.
+        '''
+        return {f'p{round(q * 100)}': self.quantile(q) for q in QUANTILES}
+
+    def histogram(self) -> np.ndarray:
+        '''
+        :return: number of vehicles by their travel time, the longer trips are counted in the
+            last bin.
+        '''
+        histogram = self.counts.copy()
+        histogram[-1] += len(self.sketch)
+        return histogram
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from simulator.statistics.traveltime import TravelTimes
+
+
+class TravelTimesTestCase(unittest.TestCase):
+    def test_add(self):
+        travel = TravelTimes(bound=10)
+        for time in [1, 3, 3, 12, 50]:
+            travel.add(time)
+        self.assertEqual(len(travel), 5)
+        self.assertEqual(len(travel.sketch), 2)
+        np.testing.assert_array_equal(travel.histogram(), [0, 1, 0, 2, 0, 0, 0, 0, 0, 2])
+
+    def test_quantile(self):
+        travel = TravelTimes(bound=100)
+        self.assertIsNone(travel.quantile(.5))
+        for time in range(1, 101):
+            travel.add(time)
+        # Times below the bound are exact.
+        self.assertEqual(travel.quantile(0), 1)
+        self.assertEqual(travel.quantile(.5), 50)
+        self.assertEqual(travel.quantile(.95), 95)
+        # The longest trip is beyond the bound.
+        self.assertEqual(travel.quantile(1), 100)
+        self.assertDictEqual(travel.quantiles(), {'p50': 50, 'p95': 95, 'p99': 99})
+        with self.assertRaises(ValueError):
+            travel.quantile(-.1)
+
+    def test_merge(self):
+        a, b = TravelTimes(bound=10), TravelTimes(bound=10)
+        for time in range(20):
+            (a if time % 2 else b).add(time)
+        a.merge(b)
+        self.assertEqual(len(a), 20)
+        self.assertEqual(a.quantile(.5), 9)
+        self.assertEqual(a.quantile(.75), 14)
+        with self.assertRaises(ValueError):
+            a.merge(TravelTimes(bound=5))
+
+    def test_init(self):
+        with self.assertRaises(ValueError):
+            TravelTimes(bound=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
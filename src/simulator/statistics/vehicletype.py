@@ -1,5 +1,9 @@
 import enum
+import typing
 
+import numpy as np
+
+from simulator.frame import AUTONOMOUS, CAR, CONVENTIONAL, EMERGENCY, KINDS
 from simulator.statistics.filters import Filter
 from simulator.vehicle.autonomous import isAutonomous
 from simulator.vehicle.car import isCar
@@ -26,6 +30,35 @@ def getVehicleTypeFilter(vehicle_type: VehicleType) -> Filter:
     assert False, 'unreachable'
 
 
+def getVehicleTypeKinds(vehicle_type: VehicleType) -> typing.Tuple[int, ...]:
+    '''
+    :param vehicle_type: vehicle type.
+    :return: codes of the kinds of vehicles in frames belonging to the type.
+    '''
+    if vehicle_type is VehicleType.CONVENTIONAL:
+        return CONVENTIONAL,
+    elif vehicle_type is VehicleType.AUTONOMOUS:
+        return AUTONOMOUS,
+    elif vehicle_type is VehicleType.EMERGENCY:
+        return EMERGENCY,
+    elif vehicle_type is VehicleType.ANY:
+        return CAR, AUTONOMOUS, CONVENTIONAL, EMERGENCY
+    assert False, 'unreachable'
+
+
+def makeKindMatrix(vehicle_types: typing.Sequence[VehicleType]) -> np.ndarray:
+    '''
+    Creates the matrix summing the statistics of the kinds of vehicles in frames into
+    statistics of the vehicle types.
+    :param vehicle_types: vehicle types, the rows of the matrix.
+    :return: matrix with ones where a kind, the column, belongs to a type.
+    '''
+    matrix = np.zeros((len(vehicle_types), KINDS), dtype=np.int64)
+    for row, vehicle_type in enumerate(vehicle_types):
+        matrix[row, list(getVehicleTypeKinds(vehicle_type))] = 1
+    return matrix
+
+
 def getVehicleTypeName(vehicle_type: VehicleType) -> str:
     if vehicle_type is VehicleType.CONVENTIONAL:
         return 'conventional'
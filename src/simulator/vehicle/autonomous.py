@@ -43,7 +43,8 @@ class AutonomousCar(Car):
                 #print(type(self.BlockedLane))
         best_change = 0
         best_limit = self._getMaxSpeed(position=self.position)
-        for change in shuffled([-self.road.lane_width, self.road.lane_width]):
+        for change in shuffled([-self.road.lane_width, self.road.lane_width],
+                               self.road.rng.shuffle):
             destination = (x, lane + change)
             if self._canAvoid(obstacle=vehicle, destination=destination):
                 limit = self._getMaxSpeed(position=destination)
@@ -60,7 +61,8 @@ class AutonomousCar(Car):
     def _tryAvoidBlockedLane(self) -> bool:
         x, lane = self.position
         if lane == self.BlockedLane:
-            for change in shuffled([-self.road.lane_width, self.road.lane_width]):
+            for change in shuffled([-self.road.lane_width, self.road.lane_width],
+                                   self.road.rng.shuffle):
                 destination = (x, lane + change)
                 if self._isChangePossible(destination) == True and self._isChangeSafe(destination) == True:
                     self.position = (x, lane + change)
@@ -92,7 +94,8 @@ class AutonomousCar(Car):
     def _tryAvoidEmergencyLane(self) -> bool:
         x, lane = self.position
         if lane == self.EmergencyLane:
-            for change in shuffled([-self.road.lane_width, self.road.lane_width]):
+            for change in shuffled([-self.road.lane_width, self.road.lane_width],
+                                   self.road.rng.shuffle):
                 destination = (x, lane + change)#max(2, self.velocity//2)
                 if self._isChangePossible(destination) == True and self._isChangeSafe(destination) == True:
                     self.position = (x, lane + change)
@@ -108,7 +111,8 @@ class AutonomousCar(Car):
         x, lane = self.position
         best_change = 0
         best_limit = self._getMaxSpeed(position=self.position)
-        for change in shuffled([-self.road.lane_width, self.road.lane_width]):
+        for change in shuffled([-self.road.lane_width, self.road.lane_width],
+                               self.road.rng.shuffle):
             destination = (x, lane + change)
             if self._canChangeLane(destination):
                 limit = self._getMaxSpeed(position=destination)
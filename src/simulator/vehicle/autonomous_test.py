@@ -7,12 +7,13 @@ from simulator.vehicle.autonomous import AutonomousCar, isAutonomous
 from simulator.vehicle.obstacle import Obstacle
 from simulator.vehicle.vehicle import Vehicle
 from simulator.vehicle.vehicle_test import implementsVehicle
+from util.rand import RandomStreams
 
 
 @implementsVehicle
 class AutonomousCarTestCase(unittest.TestCase):
     def getVehicle(self, position: Position) -> Vehicle:
-        road = Mock(length=100, lane_width=1, emergency=set())
+        road = Mock(length=100, lane_width=1, emergency=set(), rng=RandomStreams())
         road.isProperPosition.return_value = False
         road.getNextVehicle.return_value = (10000, None)
         road.getPreviousVehicle.return_value = (-1, None)
@@ -49,17 +50,17 @@ class AutonomousCarTestCase(unittest.TestCase):
 
     def test_tryAvoidObstacle(self):
         # No obstacles on the road.
-        road = Mock(lane_width=1)
+        road = Mock(lane_width=1, rng=RandomStreams())
         road.getNextVehicle.return_value = -1, None
         car = AutonomousCar(position=(42, 1), velocity=5, road=road)
         self.assertFalse(car._tryAvoidObstacle())
         # Not an obstacle on the road in front.
-        road = Mock(lane_width=1)
+        road = Mock(lane_width=1, rng=RandomStreams())
         road.getNextVehicle.return_value = 44, Mock()
         car = AutonomousCar(position=(42, 1), velocity=5, road=road)
         self.assertFalse(car._tryAvoidObstacle())
         # Obstacle is far away.
-        road = Mock(lane_width=1)
+        road = Mock(lane_width=1, rng=RandomStreams())
         road.getNextVehicle.return_value = 120, Obstacle(position=(120, 2), length=1, width=1)
         car = AutonomousCar(position=(42, 1), velocity=5, road=road)
         self.assertFalse(car._tryAvoidObstacle())
@@ -74,7 +75,7 @@ class AutonomousCarTestCase(unittest.TestCase):
 
             return f
 
-        road = Mock(lane_width=1)
+        road = Mock(lane_width=1, rng=RandomStreams())
         road.getNextVehicle.return_value = 5, Obstacle(position=(5, 1), length=1, width=1)
         # Unable to change lanes.
         car = AutonomousCar(position=(0, 1), velocity=5, road=road)
@@ -128,7 +129,7 @@ class AutonomousCarTestCase(unittest.TestCase):
 
             return f
 
-        road = Mock(lane_width=1)
+        road = Mock(lane_width=1, rng=RandomStreams())
         # Unable to change lanes.
         car = AutonomousCar(position=(0, 1), velocity=5, road=road)
         car._canChangeLane = Mock(return_value=False)
@@ -26,6 +26,12 @@ class Car(Vehicle):
         self.path = list()
         self.zipped = set()
 
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        # Only the most recent path entry is ever read, keep serialized cars compact.
+        state = self.__dict__.copy()
+        state['path'] = self.path[-1:]
+        return state
+
     def _getMaxSpeedUnlimited(self, position: Position) -> int:
         '''
         Returns maximum speed a car can go without causing an accident, does not apply speed limits.
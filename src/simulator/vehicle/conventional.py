@@ -1,4 +1,3 @@
-import random
 import typing
 
 from simulator.position import Position
@@ -7,7 +6,7 @@ from simulator.vehicle.car import Car
 from simulator.vehicle.obstacle import Obstacle
 from simulator.vehicle.vehicle import Vehicle
 from simulator.vehicle.emergency import EmergencyCar
-from util.rand import shuffled
+from util.rand import BufferedRandom, shuffled
 
 
 class Driver:
@@ -31,21 +30,25 @@ MaybeDriver = typing.Optional[Driver]
 
 class ConventionalCar(Car):
     driver: Driver
+    # Random stream of the driver decisions.
+    rng: BufferedRandom
 
     def __init__(self, position: Position, velocity: int, road: Road,
                  length: int = 2, width: int = 1,
-                 limit: int = 0, driver: MaybeDriver = None):
+                 limit: int = 0, driver: MaybeDriver = None,
+                 rng: typing.Optional[BufferedRandom] = None):
         super().__init__(
             position=position, velocity=velocity, road=road,
             length=length, width=width, limit=limit)
         self.driver = driver if driver is not None else Driver()
+        self.rng = rng if rng is not None else road.rng.driver
 
     def move(self) -> Position:
         # Don't move if the vehicle is not fully on a single lane.
         if not self.road.isSingleLane(self):
             return self.position
         x, lane = self.position
-        if self.velocity > 0 and random.random() < self.driver.slow:
+        if self.velocity > 0 and self.rng.random() < self.driver.slow:
             self.velocity -= 1
         else:
             self.velocity += 1
@@ -68,9 +71,10 @@ class ConventionalCar(Car):
             return False
         for xpos in range(u, x, 1):
             if isinstance(self.road.getNextVehicle(position=(xpos, lane))[1], EmergencyCar):
-                if random.random() < self.driver.defer:
+                if self.rng.random() < self.driver.defer:
                     self.driver.set_change(1)
-                    for change in shuffled([-self.road.lane_width, self.road.lane_width]):
+                    for change in shuffled([-self.road.lane_width, self.road.lane_width],
+                                           self.road.rng.shuffle):
                         destination = (x, lane + change)#max(2, self.velocity//2)
                         if self._isChangePossible(destination) == True and self._isChangeSafe(destination) == True:
                             self.position = (x, lane + change)
@@ -113,7 +117,8 @@ class ConventionalCar(Car):
         if vx - x > max(self.velocity, 1):
             return False
         # Try to switch lanes in random order.
-        for change in shuffled([-self.road.lane_width, self.road.lane_width]):
+        for change in shuffled([-self.road.lane_width, self.road.lane_width],
+                               self.road.rng.shuffle):
             if self._tryAvoidWithChange(obstacle=vehicle, change=change):
                 return True
         return False
@@ -125,7 +130,8 @@ class ConventionalCar(Car):
         '''
         # Try to switch lanes in random order.
         x, lane = self.position
-        for change in shuffled([-self.road.lane_width, self.road.lane_width]):
+        for change in shuffled([-self.road.lane_width, self.road.lane_width],
+                               self.road.rng.shuffle):
             destination = (x, lane + change)
             # Force changes for asymmetrical cases when switching from L -> R.
             force = change == 1 and not self.driver.symmetry
@@ -168,7 +174,7 @@ class ConventionalCar(Car):
     '''
     def _canChangeLane(self, destination: Position, force: bool = False) -> bool:
         change_lane = super()._canChangeLane(destination=destination, force=force)
-        return change_lane and random.random() < self.driver.change
+        return change_lane and self.rng.random() < self.driver.change
 
 
 def isConventional(vehicle: Vehicle) -> bool:
@@ -6,12 +6,13 @@ from simulator.vehicle.conventional import ConventionalCar, Driver, isConvention
 from simulator.vehicle.obstacle import Obstacle
 from simulator.vehicle.vehicle import Vehicle
 from simulator.vehicle.vehicle_test import implementsVehicle
+from util.rand import RandomStreams
 
 
 @implementsVehicle
 class ConventionalCarTestCase(unittest.TestCase):
     def getVehicle(self, position: Position) -> Vehicle:
-        road = Mock(length=100, lane_width=1, emergency=set())
+        road = Mock(length=100, lane_width=1, emergency=set(), rng=RandomStreams())
         road.isProperPosition.return_value = False
         road.getNextVehicle.return_value = (100, None)
         road.getPreviousVehicle.return_value = (-1, None)
@@ -21,7 +22,7 @@ class ConventionalCarTestCase(unittest.TestCase):
 
     @patch('simulator.vehicle.conventional.shuffled')
     def test_tryChangeLanes(self, mocked_shuffled):
-        mocked_shuffled.side_effect = lambda xs: xs
+        mocked_shuffled.side_effect = lambda xs, rng: xs
         road = Mock(lane_width=1)
         # Lanes not changed.
         car = ConventionalCar(position=(42, 1), velocity=5, road=road)
@@ -41,7 +42,7 @@ class ConventionalCarTestCase(unittest.TestCase):
 
     @patch('simulator.vehicle.conventional.shuffled')
     def test_tryAvoidObstacle(self, mocked_shuffled):
-        mocked_shuffled.side_effect = lambda xs: xs
+        mocked_shuffled.side_effect = lambda xs, rng: xs
         # No obstacles on the road.
         road = Mock(lane_width=1)
         road.getNextVehicle.return_value = -1, None
@@ -85,31 +86,32 @@ class ConventionalCarTestCase(unittest.TestCase):
         car._avoid.assert_called_once()
         self.assertEqual(car.position, (42, 2))
 
-    @patch('random.random')
-    def test_move(self, patched_random):
+    def test_move(self):
+        road = Mock()
+        patched_random = road.rng.driver.random
         # No slowdown.
-        car = ConventionalCar(position=(0, 0), velocity=5, road=Mock(), driver=Driver(slow=0))
+        car = ConventionalCar(position=(0, 0), velocity=5, road=road, driver=Driver(slow=0))
         patched_random.return_value = 1
         car._getMaxSpeed = Mock(return_value=5)
         position = car.move()
         self.assertEqual(position, (5, 0))
         # Speed up.
-        car = ConventionalCar(position=(0, 0), velocity=3, road=Mock(), driver=Driver(slow=0))
+        car = ConventionalCar(position=(0, 0), velocity=3, road=road, driver=Driver(slow=0))
         patched_random.return_value = 1
         car._getMaxSpeed = Mock(return_value=5)
         position = car.move()
         self.assertEqual(position, (4, 0))
         # Slowdown.
-        car = ConventionalCar(position=(0, 0), velocity=3, road=Mock(), driver=Driver(slow=1))
+        car = ConventionalCar(position=(0, 0), velocity=3, road=road, driver=Driver(slow=1))
         patched_random.return_value = 0
         car._getMaxSpeed = Mock(return_value=5)
         position = car.move()
         self.assertEqual(position, (2, 0))
 
-    @patch('random.random')
     @patch('simulator.vehicle.conventional.Car._canChangeLane')
-    def test_canChangeLane(self, patched_change, patched_random):
+    def test_canChangeLane(self, patched_change):
         road = Mock()
+        patched_random = road.rng.driver.random
         car = ConventionalCar(position=(0, 0), velocity=5, road=road)
         patched_change.return_value = True
         # Change probability 0.5
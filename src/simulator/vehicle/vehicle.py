@@ -23,6 +23,8 @@ class Vehicle:
 
     # Statistics purposes.
     start: int
+    # Number of the vehicle on its road, -1 before it is added.
+    id: int
 
     def __init__(self, position: Position, velocity: int = 0, length: int = 2, width: int = 1):
         self.position = position
@@ -31,6 +33,7 @@ class Vehicle:
         self.width = width
         self.last_position = position
         self.flags = VehicleFlags.NONE
+        self.id = -1
 
     def setStatistics(self, start: int) -> None:
         '''
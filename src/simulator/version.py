@@ -0,0 +1,23 @@
+import functools
+import hashlib
+import os
+
+
+@functools.lru_cache(maxsize=None)
+def codeVersion() -> str:
+    '''
+    Returns a digest of the simulator sources, changing whenever the simulation code changes.
+    :return: hexadecimal digest of the simulator package.
+    '''
+    root = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for directory, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith('.py') or name.endswith('_test.py'):
+                continue
+            path = os.path.join(directory, name)
+            digest.update(os.path.relpath(path, root).encode())
+            with open(path, 'rb') as file:
+                digest.update(file.read())
+    return digest.hexdigest()
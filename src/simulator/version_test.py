@@ -0,0 +1,16 @@
+import unittest
+
+from simulator.version import codeVersion
+
+
+class VersionTestCase(unittest.TestCase):
+    def test_codeVersion(self):
+        version = codeVersion()
+        self.assertEqual(len(version), 64)
+        int(version, 16)
+        codeVersion.cache_clear()
+        self.assertEqual(codeVersion(), version)
+
+
+if __name__ == '__main__':
+    unittest.main()
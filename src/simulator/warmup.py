@@ -0,0 +1,49 @@
+import typing
+
+from simulator.simulator import Simulator
+from simulator.snapshot import Snapshot
+from simulator.statistics.steadystate import SteadyStateMonitor
+from util.diskcache import DiskCache
+
+
+def warmUp(simulator: Simulator, steps: int, cache: typing.Optional[DiskCache] = None,
+           key: typing.Optional[str] = None) -> Simulator:
+    '''
+    Runs the warm-up steps of a simulation. When a cache is given the post warm-up state is
+    looked up by the key first and stored under the key after a cache miss.
+    :param simulator: freshly created simulator.
+    :param steps: number of warm-up steps.
+    :param cache: cache of the post warm-up states.
+    :param key: key describing the scenario and the seed of the simulator.
+    :return: warmed up simulator, a restored one on a cache hit.
+    '''
+    use_cache = cache is not None and key is not None
+    if use_cache:
+        data = cache.get(key)
+        if data is not None:
+            return Snapshot(data).restore()
+    for _ in range(steps):
+        simulator.step()
+    if use_cache:
+        cache.put(key, Snapshot.take(simulator).data)
+    return simulator
+
+
+def runUntilSettled(simulator: Simulator, max_steps: int, check_interval: int = 50) -> int:
+    '''
+    Runs a simulation until the traffic is detected to have settled by the MSER-5 rule on the
+    average velocity and the number of vehicles on the road. The series are only checked
+    every check_interval steps and the rule needs the truncation point in the first half of
+    the series, so the detection comes later than the MSER truncation point. The steps in
+    between are not recorded, a run measuring from the detection skips them too.
+    :param simulator: freshly created simulator.
+    :param max_steps: maximum number of steps.
+    :param check_interval: number of steps between checks.
+    :return: number of steps run until the detection, max_steps if the traffic did not settle.
+    '''
+    with SteadyStateMonitor(simulator=simulator, check_interval=check_interval) as monitor:
+        for _ in range(max_steps):
+            simulator.step()
+            if monitor.isCheckStep() and monitor.warmUp() is not None:
+                break
+    return len(monitor.velocity)
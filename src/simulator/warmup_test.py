@@ -0,0 +1,52 @@
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from simulator.snapshot_test import makeSimulator, trace
+from simulator.warmup import runUntilSettled, warmUp
+from util.diskcache import DiskCache
+
+
+class WarmUpTestCase(unittest.TestCase):
+    def test_warmUp(self):
+        simulator = makeSimulator()
+        self.assertIs(warmUp(simulator, steps=10), simulator)
+        self.assertEqual(simulator.steps, 10)
+        # Missing key disables the cache.
+        cache = Mock()
+        self.assertIs(warmUp(simulator, steps=5, cache=cache), simulator)
+        self.assertEqual(simulator.steps, 15)
+        cache.get.assert_not_called()
+        cache.put.assert_not_called()
+
+    def test_runUntilSettled(self):
+        simulator = makeSimulator()
+        steps = runUntilSettled(simulator, max_steps=1000, check_interval=20)
+        self.assertEqual(simulator.steps, steps)
+        self.assertEqual(steps % 20, 0)
+        self.assertLess(steps, 1000)
+        self.assertListEqual(simulator.hooks, [])
+        # Warm-up is cut at the maximum.
+        simulator = makeSimulator()
+        self.assertEqual(runUntilSettled(simulator, max_steps=10, check_interval=20), 10)
+
+    def test_warmUp__cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiskCache(directory)
+            # Cache miss runs the warm-up and stores the state.
+            simulator = makeSimulator()
+            self.assertIs(warmUp(simulator, steps=20, cache=cache, key='key'), simulator)
+            self.assertEqual(simulator.steps, 20)
+            self.assertIn('key', cache)
+            expected = trace(simulator, 20)
+            # Cache hit restores the warmed up state.
+            simulator = makeSimulator(seed=0)
+            restored = warmUp(simulator, steps=20, cache=cache, key='key')
+            self.assertIsNot(restored, simulator)
+            self.assertEqual(simulator.steps, 0)
+            self.assertEqual(restored.steps, 20)
+            self.assertEqual(trace(restored, 20), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
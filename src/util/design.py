@@ -0,0 +1,95 @@
+import itertools
+import random
+import typing
+
+Point = typing.Dict[str, typing.Any]
+
+
+def gridDesign(levels: typing.Dict[str, typing.Sequence[typing.Any]]) -> typing.List[Point]:
+    '''
+    Creates a full factorial design, every combination of the parameter levels.
+    :param levels: levels of every parameter.
+    :return: design points, the last parameter changes fastest.
+    '''
+    names = list(levels)
+    return [dict(zip(names, values)) for values in itertools.product(*levels.values())]
+
+
+def listDesign(levels: typing.Dict[str, typing.Sequence[typing.Any]]) -> typing.List[Point]:
+    '''
+    Creates a design from explicitly listed points, the i-th point takes the i-th level
+    of every parameter.
+    :param levels: levels of every parameter, all of the same length.
+    :return: design points.
+    '''
+    lengths = {len(values) for values in levels.values()}
+    if len(lengths) > 1:
+        raise ValueError(f'expected the same number of levels of every parameter, got {lengths}')
+    names = list(levels)
+    return [dict(zip(names, values)) for values in zip(*levels.values())]
+
+
+def latinHypercubeDesign(ranges: typing.Dict[str, typing.Tuple[float, float]], samples: int,
+                         rng: typing.Optional[random.Random] = None) -> typing.List[Point]:
+    '''
+    Creates a Latin hypercube design. The range of every parameter is split into equally
+    sized strata and every stratum is sampled exactly once.
+    :param ranges: lower and upper bound of every parameter.
+    :param samples: number of design points.
+    :param rng: random number generator, defaults to a new unseeded one.
+    :return: design points.
+    '''
+    if samples < 1:
+        raise ValueError(f'expected at least one sample, got {samples}')
+    rng = rng if rng is not None else random.Random()
+    columns = {}
+    for name, (low, high) in ranges.items():
+        strata = list(range(samples))
+        rng.shuffle(strata)
+        columns[name] = [
+            low + (high - low) * (stratum + rng.random()) / samples for stratum in strata]
+    return [{name: column[i] for name, column in columns.items()} for i in range(samples)]
+
+
+def allocateReplications(scores: typing.Sequence[float], costs: typing.Sequence[float],
+                         budget: float, minimum: int = 0) -> typing.List[int]:
+    '''
+    Divides a budget between design points to minimize the weighted sum of the confidence
+    interval widths, which shrink with the square root of the number of replications. The
+    optimal number of replications of a point is proportional to (score / cost) ** (2 / 3),
+    where the score is the standard deviation of its results times its weight.
+    :param scores: weighted standard deviations of the points.
+    :param costs: costs of a single replication of the points.
+    :param budget: total cost of all the replications, including the minimal ones.
+    :param minimum: minimal number of replications of every point.
+    :return: number of replications of every point.
+    '''
+    if len(scores) != len(costs):
+        raise ValueError(f'expected a cost of every point, got {len(costs)} for {len(scores)}')
+    if any(cost <= 0 for cost in costs):
+        raise ValueError('expected positive costs')
+    shares = [(max(score, 0.) / cost) ** (2 / 3) for score, cost in zip(scores, costs)]
+
+    def allocation(scale: float) -> typing.List[int]:
+        return [max(minimum, int(scale * share)) for share in shares]
+
+    def cost(counts: typing.List[int]) -> float:
+        return sum(count * cost for count, cost in zip(counts, costs))
+
+    if cost(allocation(0.)) >= budget or not any(shares):
+        return allocation(0.)
+    # Find the largest scale of the proportional allocation within the budget.
+    low, high = 0., 1.
+    while cost(allocation(high)) <= budget:
+        low, high = high, high * 2
+    for _ in range(60):
+        middle = (low + high) / 2
+        low, high = (middle, high) if cost(allocation(middle)) <= budget else (low, middle)
+    counts = allocation(low)
+    # Spend what is left on the points with the largest shares per cost.
+    remaining = budget - cost(counts)
+    for i in sorted(range(len(shares)), key=lambda i: shares[i] / costs[i], reverse=True):
+        if shares[i] > 0 and costs[i] <= remaining:
+            counts[i] += 1
+            remaining -= costs[i]
+    return counts
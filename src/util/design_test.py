@@ -0,0 +1,55 @@
+import random
+import unittest
+
+from util.design import allocateReplications, gridDesign, latinHypercubeDesign, listDesign
+
+
+class DesignTestCase(unittest.TestCase):
+    def test_gridDesign(self):
+        design = gridDesign({'a': [1, 2], 'b': ['x', 'y', 'z']})
+        self.assertEqual(len(design), 6)
+        self.assertDictEqual(design[0], {'a': 1, 'b': 'x'})
+        self.assertDictEqual(design[1], {'a': 1, 'b': 'y'})
+        self.assertDictEqual(design[5], {'a': 2, 'b': 'z'})
+        self.assertListEqual(gridDesign({'a': [1]}), [{'a': 1}])
+
+    def test_listDesign(self):
+        design = listDesign({'a': [1, 2], 'b': ['x', 'y']})
+        self.assertListEqual(design, [{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'y'}])
+        with self.assertRaises(ValueError):
+            listDesign({'a': [1, 2], 'b': ['x']})
+
+    def test_latinHypercubeDesign(self):
+        samples = 10
+        design = latinHypercubeDesign(
+            {'a': (0., 1.), 'b': (10., 20.)}, samples=samples, rng=random.Random(1))
+        self.assertEqual(len(design), samples)
+        for name, low, high in [('a', 0., 1.), ('b', 10., 20.)]:
+            # Every stratum contains exactly one sample.
+            strata = sorted(int((point[name] - low) / (high - low) * samples) for point in design)
+            self.assertListEqual(strata, list(range(samples)))
+        self.assertListEqual(
+            design, latinHypercubeDesign(
+                {'a': (0., 1.), 'b': (10., 20.)}, samples=samples, rng=random.Random(1)))
+        with self.assertRaises(ValueError):
+            latinHypercubeDesign({'a': (0., 1.)}, samples=0)
+
+    def test_allocateReplications(self):
+        counts = allocateReplications([1., 8.], [1., 1.], budget=90)
+        self.assertLessEqual(sum(counts), 90)
+        self.assertGreaterEqual(sum(counts), 89)
+        # Eight times the deviation gives four times the replications.
+        self.assertAlmostEqual(counts[1] / counts[0], 4, delta=.3)
+        # Eight times as expensive replications, a quarter of them.
+        counts = allocateReplications([1., 1.], [1., 8.], budget=100)
+        self.assertAlmostEqual(counts[0] / counts[1], 4, delta=.6)
+        self.assertLessEqual(counts[0] + 8 * counts[1], 100)
+        # The minimum is kept even over the budget.
+        self.assertListEqual(allocateReplications([1., 1.], [1., 1.], budget=3, minimum=2), [2, 2])
+        self.assertListEqual(allocateReplications([0., 0.], [1., 1.], budget=10, minimum=1), [1, 1])
+        with self.assertRaises(ValueError):
+            allocateReplications([1.], [0.], budget=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
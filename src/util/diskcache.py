@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import typing
+
+
+def hashKey(params: typing.Dict[str, typing.Any]) -> str:
+    '''
+    Creates a stable cache key from a dictionary of parameters.
+    :param params: JSON serializable parameters, other values are converted to strings.
+    :return: hexadecimal digest of the parameters.
+    '''
+    data = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class DiskCache:
+    '''
+    Directory backed key-value cache. Entries not used for longer than max_age seconds are
+    evicted and least recently used entries are evicted when the total size exceeds max_size
+    bytes. Writes are atomic, so the cache can be shared by concurrent processes.
+    '''
+    SUFFIX = '.cache'
+
+    directory: str
+    max_size: typing.Optional[int]
+    max_age: typing.Optional[float]
+
+    def __init__(self, directory: str, max_size: typing.Optional[int] = None,
+                 max_age: typing.Optional[float] = None):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}{self.SUFFIX}')
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def get(self, key: str) -> typing.Optional[bytes]:
+        '''
+        Reads an entry from the cache and marks it as recently used.
+        :param key: entry key.
+        :return: entry data or None if the entry is missing.
+        '''
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        '''
+        Atomically writes an entry to the cache and evicts stale entries.
+        :param key: entry key.
+        :param data: entry data.
+        :return: None.
+        '''
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        '''
+        Removes entries exceeding the age and size limits.
+        :return: None.
+        '''
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        # Most recently used entries first.
+        entries.sort(reverse=True)
+        now, size = time.time(), 0
+        for mtime, entry_size, path in entries:
+            size += entry_size
+            expired = self.max_age is not None and now - mtime > self.max_age
+            oversized = self.max_size is not None and size > self.max_size
+            if expired or oversized:
+                self._remove(path)
+                size -= entry_size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Already evicted by a concurrent process.
+            pass
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import time
+import unittest
+
+from util.diskcache import DiskCache, hashKey
+
+
+class HashKeyTestCase(unittest.TestCase):
+    def test_hashKey(self):
+        self.assertEqual(hashKey({'a': 1, 'b': [1, 2]}), hashKey({'b': [1, 2], 'a': 1}))
+        self.assertNotEqual(hashKey({'a': 1}), hashKey({'a': 2}))
+        self.assertNotEqual(hashKey({'a': 1}), hashKey({'b': 1}))
+        self.assertEqual(hashKey({'a': (1, 2)}), hashKey({'a': [1, 2]}))
+        self.assertEqual(len(hashKey({})), 64)
+
+
+class DiskCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def makeOld(self, cache: DiskCache, key: str, age: float) -> None:
+        mtime = time.time() - age
+        os.utime(cache._path(key), (mtime, mtime))
+
+    def test_getPut(self):
+        cache = DiskCache(self.directory.name)
+        self.assertIsNone(cache.get('a'))
+        self.assertNotIn('a', cache)
+        cache.put('a', b'data')
+        self.assertIn('a', cache)
+        self.assertEqual(cache.get('a'), b'data')
+        cache.put('a', b'other')
+        self.assertEqual(cache.get('a'), b'other')
+        # No temporary files are left behind.
+        self.assertListEqual(os.listdir(self.directory.name), ['a.cache'])
+
+    def test_evict__age(self):
+        cache = DiskCache(self.directory.name, max_age=60)
+        cache.put('old', b'x')
+        cache.put('new', b'x')
+        self.makeOld(cache, 'old', 120)
+        cache.evict()
+        self.assertNotIn('old', cache)
+        self.assertIn('new', cache)
+
+    def test_evict__size(self):
+        cache = DiskCache(self.directory.name)
+        for i, key in enumerate(['a', 'b', 'c']):
+            cache.put(key, b'0123456789')
+            self.makeOld(cache, key, 100 - i)
+        # Reading an entry marks it as recently used.
+        cache.get('a')
+        cache = DiskCache(self.directory.name, max_size=25)
+        cache.evict()
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+
+    def test_evict__unlimited(self):
+        cache = DiskCache(self.directory.name)
+        for key in ['a', 'b', 'c']:
+            cache.put(key, b'0123456789')
+            self.makeOld(cache, key, 10 ** 6)
+        cache.evict()
+        for key in ['a', 'b', 'c']:
+            self.assertIn(key, cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
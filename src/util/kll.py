@@ -0,0 +1,124 @@
+import math
+import random
+import typing
+
+
+class KLLSketch:
+    '''
+    KLL quantile sketch of a stream of numbers. Values are kept in a hierarchy of compactors,
+    an item of the level h stands for 2^h values. A full compactor sorts its items and promotes
+    every other of them to the next level, starting from a random one. The ranks of the
+    quantiles are off by at most about 1.7 / k of the number of values with high probability,
+    the memory grows with k and only logarithmically with the number of values. Sketches of
+    different streams merge into a sketch of the combined stream.
+    '''
+    # Capacities of the lower levels shrink by this factor.
+    DECAY = 2 / 3
+
+    k: int
+    count: int
+    compactors: typing.List[typing.List[float]]
+    # Number of items in the compactors and the number which triggers a compaction.
+    size: int
+    max_size: int
+    _random: random.Random
+
+    def __init__(self, k: int = 200, seed: typing.Optional[int] = 0):
+        '''
+        :param k: capacity of the top level, larger for more precise quantiles.
+        :param seed: seed of the choice of the promoted items, None for a random one.
+        '''
+        if k < 2:
+            raise ValueError(f'expected k of at least 2, got {k}')
+        self.k = k
+        self.count = 0
+        self.compactors = []
+        self.size = 0
+        self._grow()
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        '''
+        :return: number of values in the sketched stream.
+        '''
+        return self.count
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.DECAY ** depth * self.k)) + 1
+
+    def _grow(self) -> None:
+        self.compactors.append([])
+        self.max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def update(self, value: float) -> None:
+        '''
+        Adds a value to the sketch.
+        :param value: value of the stream.
+        '''
+        self.compactors[0].append(value)
+        self.count += 1
+        self.size += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+    def _compress(self) -> None:
+        for level in range(len(self.compactors)):
+            compactor = self.compactors[level]
+            if len(compactor) < self._capacity(level):
+                continue
+            if level + 1 == len(self.compactors):
+                self._grow()
+            compactor.sort()
+            # An odd item out stays on its level.
+            rest = [compactor.pop()] if len(compactor) % 2 else []
+            promoted = compactor[self._random.randint(0, 1)::2]
+            self.compactors[level + 1] += promoted
+            self.compactors[level] = rest
+            self.size -= len(compactor) - len(promoted)
+            if self.size < self.max_size:
+                break
+
+    def merge(self, other: 'KLLSketch') -> None:
+        '''
+        Adds all the values of another sketch to the sketch.
+        :param other: sketch of another stream.
+        '''
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, compactor in enumerate(other.compactors):
+            self.compactors[level] += compactor
+        self.count += other.count
+        self.size += other.size
+        while self.size >= self.max_size:
+            self._compress()
+
+    def _weighted(self) -> typing.List[typing.Tuple[float, int]]:
+        return sorted((value, 2 ** level) for level, compactor in enumerate(self.compactors)
+                      for value in compactor)
+
+    def quantile(self, q: float) -> typing.Optional[float]:
+        '''
+        :param q: fraction of the values, between 0 and 1.
+        :return: the least value with at least the fraction q of the values not greater than
+            it, None for an empty sketch.
+        '''
+        if not 0 <= q <= 1:
+            raise ValueError(f'expected quantile between 0 and 1, got {q}')
+        items = self._weighted()
+        if not items:
+            return None
+        total = sum(weight for _, weight in items)
+        rank, cumulative = q * total, 0
+        for value, weight in items:
+            cumulative += weight
+            if cumulative >= rank:
+                return value
+        return items[-1][0]
+
+    def rank(self, value: float) -> int:
+        '''
+        :param value: any value.
+        :return: approximate number of values of the stream not greater than the value.
+        '''
+        return sum(weight for item, weight in self._weighted() if item <= value)
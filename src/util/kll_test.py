@@ -0,0 +1,61 @@
+import random
+import unittest
+
+from util.kll import KLLSketch
+
+
+class KLLSketchTestCase(unittest.TestCase):
+    def assertRankClose(self, values, sketch: KLLSketch, q: float, tolerance: float = .02):
+        estimate = sketch.quantile(q)
+        rank = sum(value <= estimate for value in values) / len(values)
+        self.assertAlmostEqual(rank, q, delta=tolerance)
+
+    def test_quantile(self):
+        sketch = KLLSketch(k=100)
+        self.assertIsNone(sketch.quantile(.5))
+        rng = random.Random(1)
+        values = [rng.expovariate(.1) for _ in range(20000)]
+        for value in values:
+            sketch.update(value)
+        self.assertEqual(len(sketch), len(values))
+        # Far fewer items than values are kept.
+        self.assertLess(sketch.size, 1000)
+        for q in (.1, .5, .95, .99):
+            self.assertRankClose(values, sketch, q)
+        self.assertAlmostEqual(sketch.rank(sketch.quantile(.5)), len(values) / 2,
+                               delta=.02 * len(values))
+        with self.assertRaises(ValueError):
+            sketch.quantile(1.5)
+
+    def test_quantile__exact(self):
+        # Small streams are kept whole.
+        sketch = KLLSketch()
+        for value in [5, 1, 4, 2, 3]:
+            sketch.update(value)
+        self.assertEqual(sketch.quantile(0), 1)
+        self.assertEqual(sketch.quantile(.5), 3)
+        self.assertEqual(sketch.quantile(1), 5)
+        self.assertEqual(sketch.rank(2), 2)
+
+    def test_merge(self):
+        rng = random.Random(2)
+        values = [rng.random() for _ in range(30000)]
+        sketches = [KLLSketch(k=100, seed=i) for i in range(3)]
+        for i, value in enumerate(values):
+            sketches[i % 3].update(value)
+        merged = sketches[0]
+        merged.merge(sketches[1])
+        merged.merge(sketches[2])
+        self.assertEqual(len(merged), len(values))
+        self.assertEqual(merged.size, sum(len(compactor) for compactor in merged.compactors))
+        self.assertLess(merged.size, merged.max_size)
+        for q in (.5, .95, .99):
+            self.assertRankClose(values, merged, q)
+
+    def test_init(self):
+        with self.assertRaises(ValueError):
+            KLLSketch(k=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import numpy as np
+
+
+def largestTriangleThreeBuckets(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    '''
+    Downsamples a line with the Largest-Triangle-Three-Buckets algorithm, which keeps the shape
+    of the line including its peaks. The first and the last points are always kept, the other
+    points are split into threshold - 2 buckets and from each of them the point forming the
+    largest triangle with the point kept from the previous bucket and the average of the next
+    bucket is kept.
+    :param x: increasing x coordinates of the points.
+    :param y: y coordinates of the points.
+    :param threshold: maximum number of points kept, at least 3.
+    :return: indices of the kept points, increasing.
+    '''
+    if threshold < 3:
+        raise ValueError(f'expected threshold of at least 3, got {threshold}')
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    count = len(x)
+    if count <= threshold:
+        return np.arange(count)
+    # Bounds of the buckets of the inner points.
+    bounds = np.linspace(1, count - 1, threshold - 1).astype(int)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, count - 1
+    for bucket in range(threshold - 2):
+        begin, end = bounds[bucket], bounds[bucket + 1]
+        if bucket + 2 < len(bounds):
+            next_x = x[end:bounds[bucket + 2]].mean()
+            next_y = y[end:bounds[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        previous = kept[bucket]
+        areas = np.abs((x[previous] - next_x) * (y[begin:end] - y[previous])
+                       - (x[previous] - x[begin:end]) * (next_y - y[previous]))
+        kept[bucket + 1] = begin + int(np.argmax(areas))
+    return kept
@@ -0,0 +1,31 @@
+import unittest
+
+import numpy as np
+
+from util.lttb import largestTriangleThreeBuckets
+
+
+class LargestTriangleThreeBucketsTestCase(unittest.TestCase):
+    def test_short(self):
+        np.testing.assert_array_equal(largestTriangleThreeBuckets([0, 1, 2], [1, 2, 3], 5),
+                                      [0, 1, 2])
+
+    def test_peaks(self):
+        x = np.arange(1000)
+        y = np.zeros(1000)
+        y[300], y[700] = 10, -10
+        kept = largestTriangleThreeBuckets(x, y, 10)
+        self.assertEqual(len(kept), 10)
+        self.assertEqual(kept[0], 0)
+        self.assertEqual(kept[-1], 999)
+        self.assertTrue(np.all(np.diff(kept) > 0))
+        self.assertIn(300, kept)
+        self.assertIn(700, kept)
+
+    def test_threshold(self):
+        with self.assertRaises(ValueError):
+            largestTriangleThreeBuckets([0, 1, 2], [0, 1, 2], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
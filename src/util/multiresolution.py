@@ -0,0 +1,82 @@
+import typing
+
+import numpy as np
+
+
+class MultiResolutionSeries:
+    '''
+    Series of rows summed into buckets of increasing width, recent rows are kept at the finest
+    resolution and older ones in coarser buckets. Every level holds at most capacity buckets,
+    the buckets of a level cover twice as many rows as those of the level below. Once a level
+    is full, the pairs of its older half are merged into the next level, the last level merges
+    its pairs in place. A bucket left without a pair stays for the next merge. The memory is
+    bounded by capacity times the number of levels and an append takes amortized constant time.
+    '''
+    capacity: int
+    max_levels: int
+    start: int
+    appended: int
+    # Buckets of the levels, oldest first, as their first row, number of rows and sums.
+    levels: typing.List[typing.List[typing.Tuple[int, int, np.ndarray]]]
+
+    def __init__(self, capacity: int = 512, max_levels: int = 16, start: int = 0):
+        '''
+        :param capacity: maximum number of buckets of a level, even.
+        :param max_levels: maximum number of levels.
+        :param start: number of the first row.
+        '''
+        if capacity < 2 or capacity % 2:
+            raise ValueError(f'expected even capacity of at least 2, got {capacity}')
+        if max_levels < 1:
+            raise ValueError(f'expected positive number of levels, got {max_levels}')
+        self.capacity = capacity
+        self.max_levels = max_levels
+        self.start = start
+        self.appended = 0
+        self.levels = [[]]
+
+    def __len__(self) -> int:
+        '''
+        :return: number of buckets.
+        '''
+        return sum(len(level) for level in self.levels)
+
+    def append(self, row: typing.Union[np.ndarray, typing.Sequence, float]) -> None:
+        self.levels[0].append((self.start + self.appended, 1, np.asarray(row)))
+        self.appended += 1
+        level = 0
+        while len(self.levels[level]) >= self.capacity:
+            self._merge(level)
+            level += 1
+            if level == len(self.levels):
+                break
+
+    @staticmethod
+    def _pairs(buckets: typing.List[typing.Tuple[int, int, np.ndarray]]) \
+            -> typing.List[typing.Tuple[int, int, np.ndarray]]:
+        merged = [(first, count + other_count, sums + other_sums)
+                  for (first, count, sums), (_, other_count, other_sums)
+                  in zip(buckets[::2], buckets[1::2])]
+        return merged + buckets[len(merged) * 2:]
+
+    def _merge(self, level: int) -> None:
+        buckets = self.levels[level]
+        if level + 1 == self.max_levels:
+            self.levels[level] = self._pairs(buckets)
+            return
+        if level + 1 == len(self.levels):
+            self.levels.append([])
+        # An even number of the older buckets, so that every merged bucket has a pair.
+        merged = max(2, self.capacity // 2 // 2 * 2)
+        self.levels[level + 1] += self._pairs(buckets[:merged])
+        del buckets[:merged]
+
+    def buckets(self) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''
+        :return: first rows, numbers of rows and sums of the buckets, oldest first.
+        '''
+        buckets = [bucket for level in reversed(self.levels) for bucket in level]
+        if not buckets:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        firsts, counts, sums = zip(*buckets)
+        return np.array(firsts), np.array(counts), np.stack(sums)
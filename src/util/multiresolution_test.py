@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+
+from util.multiresolution import MultiResolutionSeries
+
+
+class MultiResolutionSeriesTestCase(unittest.TestCase):
+    def test_append(self):
+        series = MultiResolutionSeries(capacity=4)
+        for i in range(3):
+            series.append([i, 1])
+        firsts, counts, sums = series.buckets()
+        np.testing.assert_array_equal(firsts, [0, 1, 2])
+        np.testing.assert_array_equal(counts, [1, 1, 1])
+        np.testing.assert_array_equal(sums, [[0, 1], [1, 1], [2, 1]])
+
+    def test_append__merge(self):
+        series = MultiResolutionSeries(capacity=4, start=1)
+        for i in range(1, 101):
+            series.append([i, 1])
+        firsts, counts, sums = series.buckets()
+        # Buckets cover all the rows in order, the recent ones in full detail.
+        self.assertEqual(counts.sum(), 100)
+        np.testing.assert_array_equal(firsts, np.cumsum(counts) - counts + 1)
+        np.testing.assert_array_equal(sums[:, 1], counts)
+        np.testing.assert_array_equal(sums[:, 0], [sum(range(first, first + count))
+                                                   for first, count in zip(firsts, counts)])
+        self.assertEqual(counts[-1], 1)
+        self.assertTrue(np.all(np.diff(counts) <= 0))
+        self.assertTrue(all(len(level) < 4 for level in series.levels))
+
+    def test_append__bounded(self):
+        series = MultiResolutionSeries(capacity=4, max_levels=2)
+        for i in range(1000):
+            series.append(1)
+        firsts, counts, sums = series.buckets()
+        self.assertLessEqual(len(series), 8)
+        self.assertEqual(counts.sum(), 1000)
+        np.testing.assert_array_equal(sums, counts)
+
+    def test_append__oddHalf(self):
+        # Halves of the capacities have no pair for their last bucket.
+        for capacity in (2, 6, 10):
+            for max_levels in (2, 16):
+                series = MultiResolutionSeries(capacity=capacity, max_levels=max_levels)
+                for i in range(1000):
+                    series.append(i)
+                firsts, counts, sums = series.buckets()
+                self.assertEqual(counts.sum(), 1000)
+                np.testing.assert_array_equal(firsts, np.cumsum(counts) - counts)
+                self.assertEqual(sums.sum(), sum(range(1000)))
+
+    def test_buckets__empty(self):
+        firsts, counts, sums = MultiResolutionSeries().buckets()
+        self.assertEqual(len(firsts), 0)
+        self.assertEqual(len(counts), 0)
+        self.assertEqual(len(sums), 0)
+
+    def test_init(self):
+        with self.assertRaises(ValueError):
+            MultiResolutionSeries(capacity=3)
+        with self.assertRaises(ValueError):
+            MultiResolutionSeries(max_levels=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,225 @@
+import copy
+import itertools
 import random
 import typing
 
+import numpy as np
+
 T = typing.TypeVar('T')
 
 
-def shuffled(xs: typing.List[T]) -> typing.List[T]:
+class BufferedRandom:
+    '''
+    Random number generator drawing uniform numbers from NumPy in large blocks. Numbers are
+    taken from a plain iterator over the current block, so a single number costs about as
+    much as a call of random.random. Implements the parts of random.Random used by the
+    simulator. Blocks grow from first_block to block_size numbers, the NumPy generator is
+    only created by the first draw after seeding, so reseeding a stream which is seldom used
+    is cheap.
+    '''
+    # NumPy generator, None until the first draw after seeding.
+    generator: typing.Optional[np.random.Generator]
+    block_size: int
+    first_block: int
+    # Uniform number from [0, 1).
+    random: typing.Callable[[], float]
+    _seed: typing.Union[None, int, np.random.SeedSequence]
+    _current: typing.Iterator[float]
+
+    def __init__(self, seed: typing.Union[None, int, np.random.SeedSequence] = None,
+                 block_size: int = 4096, first_block: typing.Optional[int] = None):
+        '''
+        :param seed: seed of the NumPy generator.
+        :param block_size: number of uniform numbers drawn at once.
+        :param first_block: number of uniform numbers drawn first after seeding, the following
+            blocks double up to block_size, block_size by default.
+        '''
+        self.block_size = block_size
+        self.first_block = first_block if first_block is not None else block_size
+        self.seed(seed)
+
+    def _start(self, block: typing.List[float]) -> None:
+        self._current = iter(block)
+        self.random = itertools.chain.from_iterable(self._blocks()).__next__
+
+    def _getGenerator(self) -> np.random.Generator:
+        if self.generator is None:
+            self.generator = np.random.default_rng(self._seed)
+        return self.generator
+
+    def _blocks(self) -> typing.Iterator[typing.Iterator[float]]:
+        yield self._current
+        # The numbers do not depend on the block sizes, only on the seed.
+        size = self.first_block
+        while True:
+            # Python floats are faster to compare than NumPy scalars.
+            self._current = iter(self._getGenerator().random(size).tolist())
+            yield self._current
+            size = min(size * 2, self.block_size)
+
+    def randint(self, a: int, b: int) -> int:
+        '''
+        :return: uniform integer from [a, b].
+        '''
+        return a + int(self.random() * (b - a + 1))
+
+    def sample(self, population: typing.Sequence[T], k: int) -> typing.List[T]:
+        '''
+        Chooses k unique elements in random order.
+        :param population: elements to choose from.
+        :param k: number of elements.
+        :return: chosen elements.
+        '''
+        result = list(population)
+        n = len(result)
+        if not 0 <= k <= n:
+            raise ValueError(f'expected sample size between 0 and {n}, got {k}')
+        # Partial Fisher-Yates shuffle, the last element of a full shuffle stays in place.
+        for i in range(min(k, n - 1)):
+            j = i + int(self.random() * (n - i))
+            result[i], result[j] = result[j], result[i]
+        return result[:k]
+
+    def seed(self, seed: typing.Union[None, int, np.random.SeedSequence] = None) -> None:
+        '''
+        Restarts the generator from a new seed.
+        :param seed: seed of the NumPy generator.
+        :return: None.
+        '''
+        self.generator = None
+        self._seed = seed
+        self._start([])
+
+    def shuffle(self, xs: typing.List[T]) -> None:
+        '''
+        Shuffles a list in place.
+        :param xs: list to shuffle.
+        :return: None.
+        '''
+        random = self.random
+        for i in range(len(xs) - 1, 0, -1):
+            j = int(random() * (i + 1))
+            xs[i], xs[j] = xs[j], xs[i]
+
+    def getstate(self) -> typing.Tuple[dict, typing.Tuple[float, ...]]:
+        # Copying the iterator keeps the numbers left in the current block.
+        return self._getGenerator().bit_generator.state, tuple(copy.copy(self._current))
+
+    def setstate(self, state: typing.Tuple[dict, typing.Tuple[float, ...]]) -> None:
+        self._getGenerator().bit_generator.state, block = state
+        self._start(list(block))
+
+    def __getstate__(self) -> dict:
+        return dict(
+            generator=self._getGenerator(), block_size=self.block_size,
+            first_block=self.first_block, block=list(copy.copy(self._current)))
+
+    def __setstate__(self, state: dict) -> None:
+        self.generator = state['generator']
+        self._seed = None
+        self.block_size = state['block_size']
+        self.first_block = state.get('first_block', self.block_size)
+        self._start(state['block'])
+
+
+class RandomStreams:
+    '''
+    Independent random number generators of a single simulation, derived from one seed.
+    Separate streams keep e.g. driver decisions from shifting the vehicle arrivals and allow
+    any number of simulations to run in one process without interfering with each other.
+
+    Synchronized streams are reseeded at every step from the seed and the step number, they
+    draw small blocks first as a step uses only a few numbers of every stream. Runs
+    of different scenarios sharing a seed then use common random numbers: the same arrivals
+    and vehicle draws, even when the scenarios consume a different amount of numbers. Every
+    vehicle also gets its own stream, keyed by the step and position it entered the road, so
+    that the same vehicles make the same decisions in all of the runs.
+    '''
+    STREAMS = ('arrival', 'vehicle', 'driver', 'shuffle')
+    # First block of a stream reseeded at every step and of a stream of a vehicle.
+    SYNCHRONIZED_BLOCK = 16
+    VEHICLE_BLOCK = 4
+
+    entropy: int
+    synchronized: bool
+    # Last synchronized step.
+    step: int
+    # Number of vehicles arriving and the order of lanes they are dispatched to.
+    arrival: BufferedRandom
+    # Types and speed limits of new vehicles.
+    vehicle: BufferedRandom
+    # Slowdowns and lane changes of human drivers.
+    driver: BufferedRandom
+    # Order of lanes tried by vehicles.
+    shuffle: BufferedRandom
+
+    def __init__(self, seed: typing.Optional[int] = None, synchronized: bool = False):
+        '''
+        :param seed: seed of all the streams, a random one is used if not given.
+        :param synchronized: reseed the streams at every step.
+        '''
+        sequence = np.random.SeedSequence(seed)
+        self.entropy = sequence.entropy
+        self.synchronized = synchronized
+        self.step = -1
+        first_block = self.SYNCHRONIZED_BLOCK if synchronized else None
+        for name, child in zip(self.STREAMS, sequence.spawn(len(self.STREAMS))):
+            setattr(self, name, BufferedRandom(child, first_block=first_block))
+
+    def synchronize(self, step: int) -> None:
+        '''
+        Reseeds synchronized streams for a simulation step, does nothing otherwise.
+        :param step: simulation step.
+        :return: None.
+        '''
+        if not self.synchronized:
+            return
+        self.step = step
+        for i, name in enumerate(self.STREAMS):
+            getattr(self, name).seed(np.random.SeedSequence(self.entropy, spawn_key=(i, step)))
+
+    def vehicleStreams(self, position: typing.Tuple[int, int]
+                       ) -> typing.Tuple[BufferedRandom, BufferedRandom]:
+        '''
+        Returns the streams of a new vehicle.
+        :param position: position the vehicle enters the road at.
+        :return: streams of the vehicle type and speed limit and of the driver decisions.
+        '''
+        if not self.synchronized:
+            return self.vehicle, self.driver
+        x, lane = position
+        key = (len(self.STREAMS), self.step + 1, x, lane)
+        rng = BufferedRandom(np.random.SeedSequence(self.entropy, spawn_key=key), block_size=64,
+                             first_block=self.VEHICLE_BLOCK)
+        return rng, rng
+
+
+def newSeed() -> int:
+    '''
+    :return: fresh seed taken from the operating system entropy.
+    '''
+    return np.random.SeedSequence().entropy
+
+
+def childSeed(seed: int, *key: int) -> int:
+    '''
+    Derives an independent seed from a master seed, e.g. for a single run of an experiment.
+    :param seed: master seed.
+    :param key: non-negative integers identifying the child, equal keys give equal seeds.
+    :return: 64-bit child seed.
+    '''
+    sequence = np.random.SeedSequence(seed, spawn_key=key)
+    return int(sequence.generate_state(1, dtype=np.uint64)[0])
+
+
+def shuffled(xs: typing.Iterable[T],
+             rng: typing.Optional[BufferedRandom] = None) -> typing.List[T]:
     '''
     Creates a shuffled version of a given list.
     :param xs: list to shuffle.
+    :param rng: random number generator, defaults to the global one.
     :return: shuffled list.
     '''
-    return random.sample(xs, len(xs))
+    xs = list(xs)
+    (rng if rng is not None else random).shuffle(xs)
+    return xs
@@ -1,6 +1,7 @@
+import pickle
 import unittest
 
-from util.rand import shuffled
+from util.rand import BufferedRandom, RandomStreams, childSeed, newSeed, shuffled
 
 
 class RandTestCase(unittest.TestCase):
@@ -12,6 +13,102 @@ class RandTestCase(unittest.TestCase):
         sample = [0] * 10
         self.assertEqual(len(shuffled(sample)), len(sample))
         self.assertCountEqual(shuffled(sample), sample)
+        # Shuffles from equally seeded streams are the same.
+        self.assertListEqual(shuffled(range(10), RandomStreams(1).shuffle),
+                             shuffled(range(10), RandomStreams(1).shuffle))
+
+    def test_bufferedRandom(self):
+        rng = BufferedRandom(1, block_size=8)
+        values = [rng.random() for _ in range(100)]
+        self.assertTrue(all(0 <= value < 1 for value in values))
+        self.assertListEqual(values, [BufferedRandom(1, block_size=8).random()] + values[1:])
+        self.assertSetEqual({rng.randint(-1, 1) for _ in range(100)}, {-1, 0, 1})
+        self.assertCountEqual(rng.sample(range(10), 10), range(10))
+        self.assertEqual(len(set(rng.sample(range(10), 3))), 3)
+        with self.assertRaises(ValueError):
+            rng.sample(range(2), 3)
+        xs = list(range(10))
+        rng.shuffle(xs)
+        self.assertCountEqual(xs, range(10))
+
+    def test_bufferedRandom__firstBlock(self):
+        rng = BufferedRandom(1, block_size=64, first_block=4)
+        # The generator is created by the first draw.
+        self.assertIsNone(rng.generator)
+        values = [rng.random() for _ in range(100)]
+        self.assertIsNotNone(rng.generator)
+        # Block sizes do not change the numbers.
+        other = BufferedRandom(1, block_size=8)
+        self.assertListEqual([other.random() for _ in range(100)], values)
+        rng.seed(2)
+        self.assertIsNone(rng.generator)
+        self.assertEqual(rng.random(), BufferedRandom(2).random())
+
+    def test_bufferedRandom__state(self):
+        rng = BufferedRandom(1, block_size=8)
+        for _ in range(5):
+            rng.random()
+        state = rng.getstate()
+        copy = pickle.loads(pickle.dumps(rng))
+        # Continue across the end of the current block.
+        values = [rng.random() for _ in range(20)]
+        self.assertListEqual([copy.random() for _ in range(20)], values)
+        rng.setstate(state)
+        self.assertListEqual([rng.random() for _ in range(20)], values)
+
+    def test_randomStreams(self):
+        first, second = RandomStreams(42), RandomStreams(42)
+        self.assertEqual(first.entropy, 42)
+        for name in RandomStreams.STREAMS:
+            self.assertListEqual([getattr(first, name).random() for _ in range(5)],
+                                 [getattr(second, name).random() for _ in range(5)])
+        # Drawing from one stream does not shift the others.
+        first, second = RandomStreams(42), RandomStreams(42)
+        for _ in range(100):
+            first.driver.random()
+        self.assertEqual(first.arrival.random(), second.arrival.random())
+        self.assertNotEqual(first.arrival.getstate(), first.driver.getstate())
+        self.assertNotEqual(RandomStreams(1).arrival.random(), RandomStreams(2).arrival.random())
+        self.assertNotEqual(RandomStreams().entropy, RandomStreams().entropy)
+
+    def test_randomStreams__synchronize(self):
+        first, second = RandomStreams(42, synchronized=True), RandomStreams(42, synchronized=True)
+        # Scenarios consuming a different amount of numbers in a step.
+        for _ in range(3):
+            first.driver.random()
+        first.synchronize(1)
+        second.synchronize(1)
+        for name in RandomStreams.STREAMS:
+            self.assertEqual(getattr(first, name).random(), getattr(second, name).random())
+        # Steps get different numbers.
+        value = first.arrival.random()
+        first.synchronize(2)
+        self.assertNotEqual(first.arrival.random(), value)
+        # Streams which are not synchronized are left alone.
+        streams = RandomStreams(42)
+        state = streams.driver.getstate()
+        streams.synchronize(1)
+        self.assertEqual(streams.driver.getstate(), state)
+
+    def test_randomStreams__vehicleStreams(self):
+        streams = RandomStreams(42)
+        self.assertTupleEqual(streams.vehicleStreams((0, 1)), (streams.vehicle, streams.driver))
+        first, second = RandomStreams(42, synchronized=True), RandomStreams(42, synchronized=True)
+        first.synchronize(3)
+        second.synchronize(3)
+        vehicle, driver = first.vehicleStreams((0, 1))
+        self.assertIs(vehicle, driver)
+        self.assertEqual(vehicle.random(), second.vehicleStreams((0, 1))[0].random())
+        self.assertNotEqual(
+            first.vehicleStreams((0, 1))[0].random(), first.vehicleStreams((0, 2))[0].random())
+
+    def test_childSeed(self):
+        self.assertEqual(childSeed(42, 300000, 1), childSeed(42, 300000, 1))
+        seeds = {childSeed(42, p, i) for p in range(10) for i in range(10)}
+        self.assertEqual(len(seeds), 100)
+        self.assertNotEqual(childSeed(42, 0), childSeed(43, 0))
+        self.assertNotEqual(childSeed(42, 1, 0), childSeed(42, 1))
+        self.assertNotEqual(newSeed(), newSeed())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,50 @@
+import typing
+
+import numpy as np
+
+
+class RollingWindow:
+    '''
+    Sums of the rows appended last, kept as a ring buffer of prefix sums. Appending a row and
+    summing the window take constant time and the memory is bounded by the window size.
+    Without a window size all the rows are summed and only their total is kept.
+    '''
+    size: typing.Optional[int]
+    appended: int
+    _prefix: np.ndarray
+
+    def __init__(self, size: typing.Optional[int],
+                 shape: typing.Union[int, typing.Tuple[int, ...]] = (),
+                 dtype: typing.Any = np.int64):
+        '''
+        :param size: number of rows in the window, None for all the rows.
+        :param shape: shape of a row.
+        :param dtype: data type of the rows.
+        '''
+        if size is not None and size < 1:
+            raise ValueError(f'expected positive window size, got {size}')
+        self.size = size
+        self.appended = 0
+        shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        self._prefix = np.zeros((1 if size is None else size + 1, *shape), dtype=dtype)
+
+    def __len__(self) -> int:
+        '''
+        :return: number of rows in the window.
+        '''
+        return self.appended if self.size is None else min(self.appended, self.size)
+
+    def append(self, row: typing.Union[np.ndarray, typing.Sequence, float]) -> None:
+        slots = len(self._prefix)
+        self._prefix[(self.appended + 1) % slots] = self._prefix[self.appended % slots] + row
+        self.appended += 1
+
+    def sum(self) -> np.ndarray:
+        '''
+        :return: sum of the rows in the window, zeros for an empty window.
+        '''
+        slots = len(self._prefix)
+        last = self._prefix[self.appended % slots]
+        if self.size is None:
+            return last.copy()
+        return last - self._prefix[max(self.appended - self.size, 0) % slots]
@@ -0,0 +1,45 @@
+import unittest
+
+import numpy as np
+
+from util.rollingwindow import RollingWindow
+
+
+class RollingWindowTestCase(unittest.TestCase):
+    def test_sum(self):
+        window = RollingWindow(20)
+        self.assertEqual(0, window.sum())
+        self.assertEqual(0, len(window))
+        for i in range(1, 21):
+            window.append(1)
+            self.assertEqual(i, window.sum())
+            self.assertEqual(i, len(window))
+        for _ in range(100):
+            window.append(1)
+            self.assertEqual(20, window.sum())
+            self.assertEqual(20, len(window))
+
+    def test_sum__rows(self):
+        window = RollingWindow(3, shape=(2, 2))
+        rows = [np.full((2, 2), i) for i in range(10)]
+        for i, row in enumerate(rows):
+            window.append(row)
+            np.testing.assert_array_equal(window.sum(), sum(rows[max(i - 2, 0):i + 1]))
+
+    def test_sum__unbounded(self):
+        window = RollingWindow(None, shape=2)
+        for i in range(100):
+            window.append([i, 1])
+        np.testing.assert_array_equal(window.sum(), [4950, 100])
+        self.assertEqual(100, len(window))
+        # The sum is a copy of the total.
+        window.sum()[0] = 0
+        np.testing.assert_array_equal(window.sum(), [4950, 100])
+
+    def test_init(self):
+        with self.assertRaises(ValueError):
+            RollingWindow(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,363 @@
+import concurrent.futures
+import hashlib
+import multiprocessing
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import typing
+import uuid
+
+Task = typing.Tuple[str, bytes]
+
+
+class WorkQueue:
+    '''
+    Work queue stored in an SQLite database in a shared directory, so that workers on any
+    number of hosts can take part without a central service. Workers lease the tasks they
+    claim and have to renew the lease while working on them. Tasks of workers which stopped
+    renewing their leases are claimed again, at most max_attempts times. Finished tasks are
+    kept until their submitter removes them, failed tasks put again are retried.
+    '''
+    FILE_NAME = 'queue.sqlite'
+
+    PENDING = 'pending'
+    LEASED = 'leased'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    directory: str
+    lease: float
+    max_attempts: int
+
+    def __init__(self, directory: str, lease: float = 60., max_attempts: int = 3):
+        '''
+        :param directory: shared queue directory.
+        :param lease: time in seconds a claimed task stays reserved without renewal.
+        :param max_attempts: number of times a task is claimed before it is marked failed.
+        '''
+        self.directory = directory
+        self.lease = lease
+        self.max_attempts = max_attempts
+        os.makedirs(directory, exist_ok=True)
+        with self._transaction() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS tasks ('
+                'key TEXT PRIMARY KEY, payload BLOB NOT NULL, state TEXT NOT NULL, '
+                'owner TEXT, expires REAL, attempts INTEGER NOT NULL DEFAULT 0, '
+                'result BLOB, created REAL NOT NULL)')
+
+    def _transaction(self) -> '_Transaction':
+        # A new connection for every operation keeps the queue usable from threads and
+        # forked processes.
+        connection = sqlite3.connect(
+            os.path.join(self.directory, self.FILE_NAME), timeout=60, isolation_level=None)
+        return _Transaction(connection)
+
+    def put(self, key: str, payload: bytes) -> None:
+        '''
+        Adds a task to the queue, tasks already in the queue are left as they are unless they
+        failed, failed tasks are pending again.
+        :param key: unique task key.
+        :param payload: task data.
+        :return: None.
+        '''
+        with self._transaction() as connection:
+            connection.execute(
+                'INSERT INTO tasks (key, payload, state, created) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET state = excluded.state, owner = NULL, '
+                'expires = NULL, attempts = 0, result = NULL, created = excluded.created '
+                'WHERE state = ?',
+                (key, payload, self.PENDING, time.time(), self.FAILED))
+
+    def claim(self, owner: str) -> typing.Optional[Task]:
+        '''
+        Leases the oldest pending task or a task with an expired lease.
+        :param owner: worker identifier.
+        :return: task key and payload or None if there is nothing to do.
+        '''
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                'UPDATE tasks SET state = ?, owner = NULL WHERE state = ? AND expires < ? '
+                'AND attempts >= ?', (self.FAILED, self.LEASED, now, self.max_attempts))
+            row = connection.execute(
+                'SELECT key, payload FROM tasks WHERE state = ? OR (state = ? AND expires < ?) '
+                'ORDER BY created LIMIT 1', (self.PENDING, self.LEASED, now)).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                'UPDATE tasks SET state = ?, owner = ?, expires = ?, attempts = attempts + 1 '
+                'WHERE key = ?', (self.LEASED, owner, now + self.lease, row[0]))
+            return row[0], row[1]
+
+    def renew(self, key: str, owner: str) -> bool:
+        '''
+        Extends the lease of a claimed task.
+        :param key: task key.
+        :param owner: worker identifier.
+        :return: False if the task is no longer leased by the worker.
+        '''
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                'UPDATE tasks SET expires = ? WHERE key = ? AND owner = ? AND state = ?',
+                (time.time() + self.lease, key, owner, self.LEASED))
+            return cursor.rowcount == 1
+
+    def complete(self, key: str, result: bytes, failed: bool = False) -> None:
+        '''
+        Stores the result of a task. The first result wins if the task was retried.
+        :param key: task key.
+        :param result: task result.
+        :param failed: the result is an error, the task is marked failed.
+        :return: None.
+        '''
+        with self._transaction() as connection:
+            connection.execute(
+                'UPDATE tasks SET state = ?, owner = NULL, result = ? '
+                'WHERE key = ? AND (state = ? OR (state = ? AND result IS NULL))',
+                (self.FAILED if failed else self.DONE, result, key, self.LEASED, self.FAILED))
+
+    def status(self, key: str) -> typing.Tuple[typing.Optional[str], typing.Optional[bytes]]:
+        '''
+        Returns the state of a task.
+        :param key: task key.
+        :return: task state and its result, both None for unknown tasks.
+        '''
+        with self._transaction() as connection:
+            row = connection.execute(
+                'SELECT state, result FROM tasks WHERE key = ?', (key,)).fetchone()
+        return (row[0], row[1]) if row is not None else (None, None)
+
+    def finished(self, keys: typing.Sequence[str]
+                 ) -> typing.Dict[str, typing.Tuple[str, typing.Optional[bytes]]]:
+        '''
+        Returns the tasks which are done or failed.
+        :param keys: keys of the tasks to check.
+        :return: state and result of the finished tasks.
+        '''
+        finished = {}
+        with self._transaction() as connection:
+            # Stay below the SQLite limit of query parameters.
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = connection.execute(
+                    f'SELECT key, state, result FROM tasks WHERE state IN (?, ?) '
+                    f'AND key IN ({", ".join("?" * len(chunk))})',
+                    (self.DONE, self.FAILED, *chunk)).fetchall()
+                finished.update((key, (state, result)) for key, state, result in rows)
+        return finished
+
+    def missing(self, keys: typing.Sequence[str]) -> typing.List[str]:
+        '''
+        :param keys: keys of the tasks to check.
+        :return: keys of the tasks which are not in the queue.
+        '''
+        found = set()
+        with self._transaction() as connection:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = connection.execute(
+                    f'SELECT key FROM tasks WHERE key IN ({", ".join("?" * len(chunk))})',
+                    chunk).fetchall()
+                found.update(key for key, in rows)
+        return [key for key in keys if key not in found]
+
+    def remove(self, keys: typing.Sequence[str]) -> None:
+        '''
+        Removes finished tasks, whose results were collected.
+        :param keys: keys of the tasks.
+        :return: None.
+        '''
+        with self._transaction() as connection:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                connection.execute(
+                    f'DELETE FROM tasks WHERE state IN (?, ?) '
+                    f'AND key IN ({", ".join("?" * len(chunk))})',
+                    (self.DONE, self.FAILED, *chunk))
+
+    def counts(self) -> typing.Dict[str, int]:
+        with self._transaction() as connection:
+            rows = connection.execute(
+                'SELECT state, COUNT(*) FROM tasks GROUP BY state').fetchall()
+        return dict(rows)
+
+
+class _Transaction:
+    '''
+    Context manager running the statements of a connection in a single write transaction.
+    '''
+    connection: sqlite3.Connection
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, *args) -> None:
+        try:
+            self.connection.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+        finally:
+            self.connection.close()
+
+
+def workerId() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+def work(queue: WorkQueue, poll: float = 1., exit_when_idle: bool = False,
+         initializer: typing.Optional[typing.Callable[[], None]] = None) -> int:
+    '''
+    Runs tasks submitted by a QueueExecutor, renewing their leases while they run.
+    :param queue: work queue.
+    :param poll: time in seconds between checks for new tasks.
+    :param exit_when_idle: return once there are no tasks to claim.
+    :param initializer: called before the first task.
+    :return: number of completed tasks.
+    '''
+    if initializer is not None:
+        initializer()
+    owner = workerId()
+    completed = 0
+    while True:
+        task = queue.claim(owner)
+        if task is None:
+            if exit_when_idle:
+                return completed
+            time.sleep(poll)
+            continue
+        key, payload = task
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=_renewLease, args=(queue, key, owner, stop), daemon=True)
+        heartbeat.start()
+        try:
+            fn, args, kwargs = pickle.loads(payload)
+            result = (True, fn(*args, **kwargs))
+        except Exception as e:
+            result = (False, e)
+        finally:
+            stop.set()
+            heartbeat.join()
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            result = (False, RuntimeError(f'unpicklable task result: {e}'))
+            data = pickle.dumps(result)
+        queue.complete(key, data, failed=not result[0])
+        completed += 1
+
+
+def _renewLease(queue: WorkQueue, key: str, owner: str, stop: threading.Event) -> None:
+    while not stop.wait(queue.lease / 3):
+        if not queue.renew(key, owner):
+            return
+
+
+def _workProcess(directory: str, lease: float, max_attempts: int, poll: float,
+                 initializer: typing.Optional[typing.Callable[[], None]]) -> None:
+    work(WorkQueue(directory, lease=lease, max_attempts=max_attempts), poll=poll,
+         initializer=initializer)
+
+
+class QueueExecutor(concurrent.futures.Executor):
+    '''
+    Executor submitting calls to a WorkQueue. Calls are run by local worker processes started
+    by the executor and by any other workers sharing the queue directory. Identical calls
+    submitted together are run once. Tasks are keyed by the call and a namespace, e.g. the
+    version of the code, and removed from the queue once their results are collected.
+    '''
+    queue: WorkQueue
+    poll: float
+    namespace: str
+    _futures: typing.Dict[str, concurrent.futures.Future]
+    _payloads: typing.Dict[str, bytes]
+    _workers: typing.List[multiprocessing.Process]
+    _lock: threading.Lock
+    _shutdown: threading.Event
+    _poller: threading.Thread
+
+    def __init__(self, queue: WorkQueue, local_workers: int = 0, poll: float = 1.,
+                 initializer: typing.Optional[typing.Callable[[], None]] = None,
+                 namespace: str = ''):
+        '''
+        :param queue: work queue.
+        :param local_workers: number of worker processes started on this host.
+        :param poll: time in seconds between checks for finished tasks.
+        :param initializer: called by local workers before their first task.
+        :param namespace: part of the task keys, calls in other namespaces are not shared.
+        '''
+        self.queue = queue
+        self.poll = poll
+        self.namespace = namespace
+        self._futures = {}
+        self._payloads = {}
+        self._lock = threading.Lock()
+        self._shutdown = threading.Event()
+        self._workers = [
+            multiprocessing.Process(
+                target=_workProcess, daemon=True,
+                args=(queue.directory, queue.lease, queue.max_attempts, poll, initializer))
+            for _ in range(local_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        self._poller = threading.Thread(target=self._pollResults, daemon=True)
+        self._poller.start()
+
+    def submit(self, fn, *args, **kwargs) -> concurrent.futures.Future:
+        payload = pickle.dumps((fn, args, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+        key = hashlib.sha256(self.namespace.encode() + payload).hexdigest()
+        with self._lock:
+            if self._shutdown.is_set():
+                raise RuntimeError('cannot submit after shutdown')
+            future = self._futures.get(key)
+            # Failed calls are retried.
+            if future is None or future.done() and future.exception() is not None:
+                self._futures[key] = concurrent.futures.Future()
+                self._payloads[key] = payload
+                self.queue.put(key, payload)
+            return self._futures[key]
+
+    def _pollResults(self) -> None:
+        while True:
+            with self._lock:
+                waiting = [(key, future) for key, future in self._futures.items()
+                           if not future.done()]
+            keys = [key for key, _ in waiting]
+            finished = self.queue.finished(keys) if waiting else {}
+            for key, (state, result) in finished.items():
+                future = self._futures[key]
+                # Dropped before the future is resolved, a retry puts the payload again.
+                self._payloads.pop(key, None)
+                if result is not None:
+                    ok, value = pickle.loads(result)
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+                else:
+                    future.set_exception(RuntimeError(
+                        f'task {key} failed after {self.queue.max_attempts} attempts'))
+            if finished:
+                self.queue.remove(list(finished))
+            # Tasks removed by another executor which submitted the same call are put again.
+            pending = [key for key in keys if key not in finished]
+            for key in self.queue.missing(pending) if pending else []:
+                self.queue.put(key, self._payloads[key])
+            if self._shutdown.is_set() and not waiting:
+                return
+            time.sleep(self.poll)
+
+    def shutdown(self, wait: bool = True, **kwargs) -> None:
+        self._shutdown.set()
+        if wait:
+            self._poller.join()
+        for worker in self._workers:
+            worker.terminate()
+            worker.join()
@@ -0,0 +1,147 @@
+import concurrent.futures
+import pickle
+import tempfile
+import time
+import unittest
+
+from util.workqueue import QueueExecutor, WorkQueue, work
+
+
+def fail(message: str) -> None:
+    raise ValueError(message)
+
+
+class WorkQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_claimComplete(self):
+        queue = WorkQueue(self.directory.name)
+        queue.put('a', b'first')
+        queue.put('b', b'second')
+        # Tasks already in the queue are not replaced.
+        queue.put('a', b'other')
+        self.assertEqual(queue.claim('w1'), ('a', b'first'))
+        self.assertEqual(queue.claim('w2'), ('b', b'second'))
+        self.assertIsNone(queue.claim('w3'))
+        self.assertEqual(queue.status('a'), (WorkQueue.LEASED, None))
+        queue.complete('a', b'result')
+        self.assertEqual(queue.status('a'), (WorkQueue.DONE, b'result'))
+        self.assertEqual(queue.status('c'), (None, None))
+        self.assertDictEqual(queue.finished(['a', 'b', 'c']), {'a': (WorkQueue.DONE, b'result')})
+        self.assertDictEqual(queue.counts(), {WorkQueue.DONE: 1, WorkQueue.LEASED: 1})
+        self.assertListEqual(queue.missing(['a', 'b', 'c']), ['c'])
+        # Only finished tasks are removed.
+        queue.remove(['a', 'b'])
+        self.assertEqual(queue.status('a'), (None, None))
+        self.assertDictEqual(queue.counts(), {WorkQueue.LEASED: 1})
+
+    def test_put__failed(self):
+        queue = WorkQueue(self.directory.name)
+        queue.put('a', b'data')
+        queue.claim('w1')
+        queue.complete('a', b'error', failed=True)
+        self.assertEqual(queue.status('a'), (WorkQueue.FAILED, b'error'))
+        # A failed task put again is retried.
+        queue.put('a', b'data')
+        self.assertEqual(queue.status('a'), (WorkQueue.PENDING, None))
+        self.assertEqual(queue.claim('w1'), ('a', b'data'))
+
+    def test_renew(self):
+        queue = WorkQueue(self.directory.name)
+        queue.put('a', b'data')
+        queue.claim('w1')
+        self.assertTrue(queue.renew('a', 'w1'))
+        self.assertFalse(queue.renew('a', 'w2'))
+        queue.complete('a', b'result')
+        self.assertFalse(queue.renew('a', 'w1'))
+
+    def test_claim__expired(self):
+        queue = WorkQueue(self.directory.name, lease=.05, max_attempts=2)
+        queue.put('a', b'data')
+        self.assertEqual(queue.claim('w1'), ('a', b'data'))
+        self.assertIsNone(queue.claim('w2'))
+        time.sleep(.1)
+        # The lease of the first worker expired, the task is retried.
+        self.assertEqual(queue.claim('w2'), ('a', b'data'))
+        self.assertFalse(queue.renew('a', 'w1'))
+        time.sleep(.1)
+        # No attempts left.
+        self.assertIsNone(queue.claim('w3'))
+        self.assertEqual(queue.status('a'), (WorkQueue.FAILED, None))
+
+    def test_work(self):
+        queue = WorkQueue(self.directory.name)
+        queue.put('a', pickle.dumps((pow, (2, 10), {})))
+        queue.put('b', pickle.dumps((fail, ('error',), {})))
+        self.assertEqual(work(queue, exit_when_idle=True), 2)
+        self.assertEqual(pickle.loads(queue.status('a')[1]), (True, 1024))
+        state, result = queue.status('b')
+        self.assertEqual(state, WorkQueue.FAILED)
+        ok, error = pickle.loads(result)
+        self.assertFalse(ok)
+        self.assertIsInstance(error, ValueError)
+
+
+class QueueExecutorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_submit(self):
+        queue = WorkQueue(self.directory.name)
+        with QueueExecutor(queue, local_workers=2, poll=.05) as executor:
+            futures = [executor.submit(pow, 2, i) for i in range(10)]
+            # Identical calls are run once.
+            self.assertIs(executor.submit(pow, 2, 0), futures[0])
+            error = executor.submit(fail, 'error')
+            results = [future.result(timeout=30) for future in futures]
+            with self.assertRaises(ValueError):
+                error.result(timeout=30)
+        self.assertListEqual(results, [2 ** i for i in range(10)])
+        # Collected results are removed from the queue.
+        self.assertDictEqual(queue.counts(), {})
+
+    def test_submit__retry(self):
+        queue = WorkQueue(self.directory.name)
+        with QueueExecutor(queue, poll=.05) as executor:
+            error = executor.submit(fail, 'error')
+            work(queue, exit_when_idle=True)
+            with self.assertRaises(ValueError):
+                error.result(timeout=30)
+            # A failed call submitted again is run again.
+            retry = executor.submit(fail, 'error')
+            self.assertIsNot(retry, error)
+            self.assertEqual(work(queue, exit_when_idle=True), 1)
+            with self.assertRaises(ValueError):
+                retry.result(timeout=30)
+
+    def test_submit__namespace(self):
+        queue = WorkQueue(self.directory.name)
+        # Results of other namespaces, f.e. older versions of the code, are not shared.
+        queue.put('stale', pickle.dumps((pow, (2, 3), {})))
+        with QueueExecutor(queue, poll=.05, namespace='v1') as first, \
+                QueueExecutor(queue, poll=.05, namespace='v2') as second:
+            futures = [first.submit(pow, 2, 3), second.submit(pow, 2, 3)]
+            self.assertEqual(queue.counts(), {WorkQueue.PENDING: 3})
+            work(queue, exit_when_idle=True)
+            self.assertListEqual([future.result(timeout=30) for future in futures], [8, 8])
+
+    def test_submit__remoteWorker(self):
+        queue = WorkQueue(self.directory.name)
+        with QueueExecutor(queue, poll=.05) as executor:
+            futures = [executor.submit(pow, 3, i) for i in range(3)]
+            # A worker sharing the queue directory, running elsewhere.
+            work(WorkQueue(self.directory.name), exit_when_idle=True)
+            done, _ = concurrent.futures.wait(futures, timeout=30)
+        self.assertEqual(len(done), 3)
+        self.assertListEqual([future.result() for future in futures], [1, 3, 9])
+
+
+if __name__ == '__main__':
+    unittest.main()